@@ -1,36 +1,85 @@
+import os
+
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from config import Config
-from app.database_helper import BindDBToApp, EnableDBMigrations
-from app.models import Movie, Actor
+from flask_cors import CORS
+from app.database_helper import BindDBToApp, EnableDBMigrations, db
+from app.json_provider import FastJSONProvider
+from app.metrics import setup_metrics
+from app.replica import setup_read_replica
+from app.versioning import track_changes
 from app.controllers import setupControllers
-from app.auth import *
 from app.authControllers import setupAuthController
-from dotenv import find_dotenv, load_dotenv
-from flask_cors import CORS
 
-ENV_FILE = find_dotenv()
-if ENV_FILE:
-    load_dotenv(ENV_FILE)
 
-'''Initialize Flask application'''
-app = Flask(__name__)
+def create_app(config=None, migrations=None):
+    """
+    Create the Flask application and wire its extensions and routes.
+
+    Args:
+        config (object): Configuration class or object. Defaults to
+                         config.Config, evaluated after the .env file has
+                         been loaded.
+        migrations (bool): Register Flask-Migrate for the `flask db`
+                           commands. Defaults to True only when run by the
+                           flask command, so that servers and tests do not
+                           import Alembic.
+
+    Returns:
+        Flask: The configured application.
+    """
+    if config is None:
+        '''Load the .env file before the configuration reads the environment'''
+        from dotenv import find_dotenv, load_dotenv
+        env_file = find_dotenv()
+        if env_file:
+            load_dotenv(env_file)
+        from config import Config
+        config = Config
+    if migrations is None:
+        migrations = os.environ.get('FLASK_RUN_FROM_CLI') == 'true'
+
+    '''Initialize Flask application'''
+    app = Flask(__name__)
+
+    '''Load configuration settings from the configuration class'''
+    app.config.from_object(config)
+
+    '''Encode JSON responses with orjson when it is installed'''
+    app.json = FastJSONProvider(app)
+
+    '''Time requests and their SQL statements for GET /metrics'''
+    setup_metrics(app)
+
+    '''Bind SQLAlchemy database to the Flask application'''
+    BindDBToApp(app)
+
+    '''Send the reads of GET requests to the read replica, if configured'''
+    setup_read_replica(app)
+
+    '''Bump table versions whenever a commit changes them'''
+    track_changes(db)
+
+    '''Enable database migrations when the CLI needs them'''
+    if migrations:
+        EnableDBMigrations(app, db)
 
-'''Load configuration settings from the Config class'''
-app.config.from_object(Config)
+    '''Enable CORS for the Flask application'''
+    CORS(app)
 
-'''Bind SQLAlchemy database to the Flask application'''
-db = BindDBToApp(app)
+    '''Setup authentication controllers for the Flask application'''
+    setupAuthController(app)
 
-'''Enable database migrations for the Flask application'''
-migrate = EnableDBMigrations(app, db)
+    '''Setup controllers for handling application routes and endpoints'''
+    setupControllers(app)
 
-'''Enable CORS for the Flask application'''
-CORS(app)
+    return app
 
-'''Setup authentication controllers for the Flask application'''
-setupAuthController(app)
 
-'''Setup controllers for handling application routes and endpoints'''
-setupControllers(app)
+def __getattr__(name):
+    '''Create the default application on first use of `app.app`, so that
+    importing the package or its modules stays cheap'''
+    if name == 'app':
+        application = create_app()
+        globals()['app'] = application
+        return application
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,4 +1,10 @@
+import hashlib
 import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
 from os import environ as env
 
 from flask import request, abort
@@ -6,8 +12,13 @@ from functools import wraps
 from jose import jwt
 from urllib.request import urlopen
 
+from app.metrics import phase
+from app.profiler import authorize_sql_profile
+
 ALGORITHMS = ['RS256']
 
+logger = logging.getLogger(__name__)
+
 ''' AuthError Exception
 
     Custom exception class for handling authentication errors.
@@ -24,6 +35,25 @@ class AuthError(Exception):
         self.status_code = status_code
 
 
+''' VerifiedPayload
+
+    Decoded JWT payload whose permissions are precompiled into a frozenset.
+
+    Behaves exactly like the payload dict handed to endpoints before; the
+    extra `permission_set` attribute is computed once per verified token so
+    check_permissions is a constant-time set lookup.
+
+    Attributes:
+        permission_set (frozenset): The token's `permissions` claim.
+'''
+
+
+class VerifiedPayload(dict):
+    def __init__(self, payload):
+        super().__init__(payload)
+        self.permission_set = frozenset(self.get('permissions') or ())
+
+
 ''' Method get_token_auth_header()
     Obtains the Access Token from the Authorization Header.
 
@@ -76,7 +106,8 @@ def get_token_auth_header():
 
     Args:
         permission (str): The string representation of the desired permission (e.g., 'post:drink').
-        payload (dict): The decoded JWT payload containing user information.
+        payload (dict): The decoded JWT payload containing user information. A
+                        VerifiedPayload reuses its precompiled permission set.
 
     Raises:
         AuthError: If permissions are not included in the payload or if the requested
@@ -94,7 +125,10 @@ def check_permissions(permission, payload):
             'description': 'Permissions not included in JWT.'
         }, 400)
 
-    if permission not in payload['permissions']:
+    granted = getattr(payload, 'permission_set', None)
+    if granted is None:
+        granted = frozenset(payload['permissions'])
+    if permission not in granted:
         raise AuthError({
             'code': 'unauthorized',
             'description': 'Permission not found.'
@@ -102,14 +136,194 @@ def check_permissions(permission, payload):
     return True
 
 
+''' JWKSKeyStore
+
+    In-process cache of the RSA signing keys published at a JWKS endpoint.
+
+    The key set is fetched once and indexed by `kid`. Cached keys are served
+    for `ttl` seconds; once they are within `refresh_ahead` seconds of expiry
+    a background thread reloads them while requests keep using the current
+    set. A token carrying an unknown `kid` forces a synchronous reload, at
+    most once every `min_refresh_interval` seconds. When a reload fails the
+    previously loaded keys keep being served.
+
+    Attributes:
+        url (str): Location of the JWKS document. Anything urlopen accepts
+                   works, including file:// URLs for local testing.
+        ttl (float): Seconds a loaded key set is considered fresh.
+        refresh_ahead (float): Seconds before expiry at which a background
+                               refresh is started.
+        min_refresh_interval (float): Minimum seconds between two refresh
+                                      attempts triggered by unknown kids or
+                                      failed loads.
+        timeout (float): Socket timeout for a single fetch.
+'''
+
+
+class JWKSKeyStore:
+    def __init__(self, url, ttl=600, refresh_ahead=60,
+                 min_refresh_interval=30, timeout=5):
+        self.url = url
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys = {}
+        self._loaded_at = None
+        self._last_attempt = None
+        self._refresh_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._background_refresh = None
+
+    def fetch(self):
+        """
+        Download and parse the key set.
+
+        Returns:
+            dict: RSA keys indexed by their `kid`.
+        """
+        with urlopen(self.url, timeout=self.timeout) as response:
+            jwks = json.loads(response.read())
+        keys = {}
+        for key in jwks.get('keys', []):
+            if 'kid' not in key:
+                continue
+            keys[key['kid']] = {
+                field: key[field]
+                for field in ('kty', 'kid', 'use', 'n', 'e') if field in key
+            }
+        return keys
+
+    def refresh(self, min_interval=0):
+        """
+        Reload the key set, keeping the current keys if the load fails.
+
+        Concurrent callers are serialised; a caller that waited for another
+        thread's reload does not fetch again.
+
+        Args:
+            min_interval (float): Skip the reload if the last attempt was less
+                                  than this many seconds ago.
+
+        Returns:
+            bool: True if a usable key set is loaded afterwards.
+        """
+        requested_at = time.monotonic()
+        with self._refresh_lock:
+            last_attempt = self._last_attempt
+            if last_attempt is not None and last_attempt >= requested_at:
+                return bool(self._keys)
+            if last_attempt is not None and \
+                    requested_at - last_attempt < min_interval:
+                return bool(self._keys)
+            self._last_attempt = time.monotonic()
+            try:
+                keys = self.fetch()
+            except Exception as e:
+                logger.warning('JWKS refresh failed: %s', e)
+                return bool(self._keys)
+            self._keys = keys
+            self._loaded_at = time.monotonic()
+            return True
+
+    def _refresh_in_background(self):
+        with self._thread_lock:
+            thread = self._background_refresh
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(
+                target=self.refresh,
+                kwargs={'min_interval': self.min_refresh_interval},
+                name='jwks-refresh',
+                daemon=True)
+            self._background_refresh = thread
+            thread.start()
+
+    def get_key(self, kid):
+        """
+        Look up the signing key for a `kid`, loading or refreshing as needed.
+
+        Args:
+            kid (str): Key id taken from the token header.
+
+        Returns:
+            dict: The RSA key, or None if the endpoint does not publish it.
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is None:
+            self.refresh()
+        else:
+            age = time.monotonic() - loaded_at
+            if age >= self.ttl:
+                self.refresh(min_interval=self.min_refresh_interval)
+            elif age >= self.ttl - self.refresh_ahead:
+                self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and self._loaded_at is not None:
+            self.refresh(min_interval=self.min_refresh_interval)
+            key = self._keys.get(kid)
+        return key
+
+
+_jwks_store = None
+_jwks_store_lock = threading.Lock()
+
+
+''' Method get_jwks_store()
+    Returns the process-wide JWKS key store, creating it on first use.
+
+    The store is configured from the environment:
+        AUTH0_JWKS_URL: JWKS location, defaults to the AUTH0_DOMAIN endpoint.
+        JWKS_CACHE_TTL: Seconds keys stay fresh (default 600).
+        JWKS_REFRESH_AHEAD: Seconds before expiry to refresh (default 60).
+        JWKS_MIN_REFRESH_INTERVAL: Rate limit for forced refreshes (default 30).
+
+    Returns:
+        JWKSKeyStore: The shared key store.
+'''
+
+
+def get_jwks_store():
+    global _jwks_store
+    if _jwks_store is None:
+        with _jwks_store_lock:
+            if _jwks_store is None:
+                url = env.get('AUTH0_JWKS_URL') or \
+                    f'https://{env.get("AUTH0_DOMAIN")}/.well-known/jwks.json'
+                _jwks_store = JWKSKeyStore(
+                    url,
+                    ttl=float(env.get('JWKS_CACHE_TTL', 600)),
+                    refresh_ahead=float(env.get('JWKS_REFRESH_AHEAD', 60)),
+                    min_refresh_interval=float(
+                        env.get('JWKS_MIN_REFRESH_INTERVAL', 30)))
+    return _jwks_store
+
+
+''' Method set_jwks_store(store)
+    Replaces the process-wide JWKS key store, e.g. with one reading a local file.
+
+    Args:
+        store (JWKSKeyStore): The store to use, or None to rebuild it from the
+                              environment on next use.
+'''
+
+
+def set_jwks_store(store):
+    global _jwks_store
+    with _jwks_store_lock:
+        _jwks_store = store
+
+
 ''' Method verify_decode_jwt(token)
     Verifies and decodes a JSON Web Token (JWT) using Auth0's JSON Web Key Set (JWKS).
+    Signing keys come from the cached store returned by get_jwks_store().
 
     Args:
         token (str): A JSON Web Token string.
 
     Returns:
-        payload (dict): The decoded payload from the token.
+        payload (VerifiedPayload): The decoded payload from the token.
 
     Raises:
         AuthError: If the token is invalid, expired, or contains incorrect claims.
@@ -118,26 +332,14 @@ def check_permissions(permission, payload):
 
 
 def verify_decode_jwt(token):
-    jsonurl = urlopen(
-        f'https://{env.get("AUTH0_DOMAIN")}/.well-known/jwks.json')
-    jwks = json.loads(jsonurl.read())
     unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
     if 'kid' not in unverified_header:
         raise AuthError({
             'code': 'invalid_header',
             'description': 'Authorization malformed.'
         }, 401)
 
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
-                'kty': key['kty'],
-                'kid': key['kid'],
-                'use': key['use'],
-                'n': key['n'],
-                'e': key['e']
-            }
+    rsa_key = get_jwks_store().get_key(unverified_header['kid'])
     if rsa_key:
         try:
             payload = jwt.decode(
@@ -147,7 +349,7 @@ def verify_decode_jwt(token):
                 audience=env.get("AUTH0_AUDIENCE"),
                 issuer='https://' + env.get("AUTH0_DOMAIN") + '/'
             )
-            return payload
+            return VerifiedPayload(payload)
 
         except jwt.ExpiredSignatureError as e:
             print('Expired token', e)
@@ -174,8 +376,161 @@ def verify_decode_jwt(token):
     }, 400)
 
 
+''' VerifiedTokenCache
+
+    Bounded LRU cache of tokens that already passed verify_decode_jwt.
+
+    Entries are keyed by the SHA-256 digest of the raw bearer token, so the
+    token itself is never kept in memory, and hold the decoded payload. An
+    entry is dropped once the token's `exp` passes, or after `max_age`
+    seconds so that revoked signing keys stop being honoured, and the least
+    recently used entry is evicted when more than `maxsize` are held.
+
+    Attributes:
+        maxsize (int): Maximum number of cached tokens; 0 disables caching.
+        max_age (float): Upper bound in seconds on how long an entry is kept.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that required full verification.
+        evictions (int): Entries dropped to stay within `maxsize`.
+        expirations (int): Entries dropped because they expired.
+'''
+
+
+class VerifiedTokenCache:
+    def __init__(self, maxsize=1024, max_age=300):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        """
+        Return the cached payload for a token, or None on a miss.
+
+        Args:
+            token (str): The raw bearer token.
+
+        Returns:
+            dict: The decoded payload if the token is cached and unexpired.
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token, payload):
+        """
+        Cache the payload of a verified token until it expires.
+
+        Tokens without a numeric `exp` claim are not cached.
+
+        Args:
+            token (str): The raw bearer token.
+            payload (dict): The payload returned by verify_decode_jwt.
+        """
+        exp = payload.get('exp')
+        if self.maxsize <= 0 or not isinstance(exp, (int, float)):
+            return
+        expires_at = min(exp, time.time() + self.max_age)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Snapshot of the cache counters.
+
+        Returns:
+            dict: Hits, misses, evictions, expirations, size and maxsize.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+''' Method get_token_cache()
+    Returns the process-wide verified-token cache, creating it on first use.
+
+    The cache is configured from the environment:
+        TOKEN_CACHE_SIZE: Maximum cached tokens, 0 disables (default 1024).
+        TOKEN_CACHE_MAX_AGE: Longest time in seconds a token stays cached
+                             (default 300).
+
+    Returns:
+        VerifiedTokenCache: The shared token cache.
+'''
+
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = VerifiedTokenCache(
+                    maxsize=int(env.get('TOKEN_CACHE_SIZE', 1024)),
+                    max_age=float(env.get('TOKEN_CACHE_MAX_AGE', 300)))
+    return _token_cache
+
+
+''' Method set_token_cache(cache)
+    Replaces the process-wide verified-token cache.
+
+    Args:
+        cache (VerifiedTokenCache): The cache to use, or None to rebuild it
+                                    from the environment on next use.
+'''
+
+
+def set_token_cache(cache):
+    global _token_cache
+    with _token_cache_lock:
+        _token_cache = cache
+
+
 ''' Decorator requires_auth(permission)
     Decorator to enforce authentication and authorization for API endpoints.
+    Tokens found in the verified-token cache skip signature verification.
+
+    The required permission is resolved once, when the route is registered,
+    and recorded on the view as `required_permission` so route_permissions()
+    can list it.
 
     Args:
         permission (str): The required permission for the endpoint (i.e., 'post:drink').
@@ -189,18 +544,57 @@ def verify_decode_jwt(token):
 
 
 def requires_auth(permission=''):
+    required = sys.intern(permission)
+
     def requires_auth_decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            token = get_token_auth_header()
-            try:
-                payload = verify_decode_jwt(token)
-            except BaseException:
-                abort(401)
-            try:
-                check_permissions(permission, payload)
-            except Exception as e:
-                abort(e.status_code)
+            with phase('auth'):
+                try:
+                    token = get_token_auth_header()
+                except AuthError as e:
+                    abort(e.status_code)
+                token_cache = get_token_cache()
+                payload = token_cache.get(token)
+                if payload is None:
+                    try:
+                        payload = verify_decode_jwt(token)
+                    except BaseException:
+                        abort(401)
+                    token_cache.put(token, payload)
+                try:
+                    check_permissions(required, payload)
+                except Exception as e:
+                    abort(e.status_code)
+                authorize_sql_profile(payload)
             return f(payload, *args, **kwargs)
+        wrapper.required_permission = required
         return wrapper
     return requires_auth_decorator
+
+
+''' Method route_permissions(app)
+    Lists every registered route together with the permission it requires.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        list: One dict per route and method with `rule`, `method`, `endpoint`
+              and `permission` keys. Public routes have a `permission` of None.
+'''
+
+
+def route_permissions(app):
+    routes = []
+    for rule in app.url_map.iter_rules():
+        view = app.view_functions.get(rule.endpoint)
+        permission = getattr(view, 'required_permission', None)
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            routes.append({
+                'rule': rule.rule,
+                'method': method,
+                'endpoint': rule.endpoint,
+                'permission': permission,
+            })
+    return sorted(routes, key=lambda route: (route['rule'], route['method']))
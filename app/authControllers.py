@@ -1,6 +1,13 @@
+import json
+
+import click
+
+from app.auth import route_permissions
+
+
 def setupAuthController(app):
     """
-    Set up CORS headers on the response.
+    Set up CORS headers on the response and the auth CLI commands.
 
     Args:
         app (Flask): The Flask application instance.
@@ -28,4 +35,23 @@ def setupAuthController(app):
             'GET,PUT,POST,DELETE,OPTIONS')
         return response
 
+    @app.cli.command('route-permissions')
+    @click.option('--as-json', is_flag=True,
+                  help='Print the mapping as a JSON document.')
+    def dump_route_permissions(as_json):
+        """
+        Print every route with the permission it requires, for auditing.
+
+        Args:
+            as_json (bool): Print JSON instead of an aligned table.
+        """
+        routes = route_permissions(app)
+        if as_json:
+            click.echo(json.dumps(routes, indent=2))
+            return
+        for route in routes:
+            click.echo('{method:<7} {rule:<40} {permission}'.format(
+                method=route['method'], rule=route['rule'],
+                permission=route['permission'] or '(public)'))
+
     return app
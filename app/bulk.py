@@ -0,0 +1,302 @@
+# This file contains the batch writes behind the /actors/bulk and
+# /movies/bulk endpoints. A batch is validated as a whole and written with
+# multi-row statements in one transaction: either every item is applied
+# or none is.
+
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+
+from app.models import Actor, Movie, movie_actors, db
+from app.versioning import record_changes
+
+
+class BulkError(ValueError):
+    """
+    Exception raised when a batch is rejected.
+
+    Attributes:
+        errors (list): One dict per invalid item, with its `index`, the
+                       offending `field` when known, and a `message`.
+    """
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+
+def _string(max_length):
+    def validate(value):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError('must be a non-empty string')
+        if len(value) > max_length:
+            raise ValueError(f'must be at most {max_length} characters')
+        return value
+    return validate
+
+
+def _integer(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError('must be a non-negative integer')
+    return value
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError('must be a date in YYYY-MM-DD format')
+
+
+# Writable fields of each resource and their validators
+ACTOR_SCHEMA = {
+    'name': _string(128),
+    'age': _integer,
+    'gender': _string(10),
+}
+MOVIE_SCHEMA = {
+    'title': _string(128),
+    'release_date': _date,
+}
+
+
+def _check_size(items, allow_empty=False):
+    if not isinstance(items, list) or not (items or allow_empty):
+        raise BulkError('Expected a non-empty list of items')
+    limit = current_app.config.get('BULK_MAX_ITEMS', 5000)
+    if len(items) > limit:
+        raise BulkError(f'At most {limit} items are accepted per request')
+
+
+def _raise_for(errors, count):
+    if errors:
+        invalid = len({error['index'] for error in errors})
+        raise BulkError(f'{invalid} of {count} items are invalid', errors)
+
+
+def validate_items(items, schema, partial=False):
+    """
+    Validate a batch of items against a resource schema.
+
+    Args:
+        items (list): Items from the request body.
+        schema (dict): ACTOR_SCHEMA or MOVIE_SCHEMA.
+        partial (bool): Items are updates: `id` is required and every
+                        other field is optional.
+
+    Raises:
+        BulkError: If the batch or any of its items is invalid.
+
+    Returns:
+        list: One dict of converted column values per item.
+    """
+    _check_size(items)
+    rows, errors, seen = [], [], set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'message': 'must be an object'})
+            continue
+        row = {}
+        if partial:
+            try:
+                row['id'] = _integer(item.get('id'))
+            except ValueError as e:
+                errors.append({'index': index, 'field': 'id',
+                               'message': str(e)})
+            else:
+                if row['id'] in seen:
+                    errors.append({'index': index, 'field': 'id',
+                                   'message': 'is repeated in the batch'})
+                seen.add(row['id'])
+        for name in item:
+            if name not in schema and not (partial and name == 'id'):
+                errors.append({'index': index, 'field': name,
+                               'message': 'is not a known field'})
+        for name, validate in schema.items():
+            if name not in item:
+                if not partial:
+                    errors.append({'index': index, 'field': name,
+                                   'message': 'is required'})
+                continue
+            try:
+                row[name] = validate(item[name])
+            except ValueError as e:
+                errors.append({'index': index, 'field': name,
+                               'message': str(e)})
+        if partial and len(row) == 1 and 'id' in row:
+            errors.append({'index': index,
+                           'message': 'has no fields to update'})
+        rows.append(row)
+    _raise_for(errors, len(items))
+    return rows
+
+
+def validate_ids(ids, allow_empty=False):
+    """
+    Validate a batch of primary keys.
+
+    Args:
+        ids (list): Ids from the request body.
+        allow_empty (bool): Accept an empty list.
+
+    Raises:
+        BulkError: If the batch or any of its ids is invalid or repeated.
+
+    Returns:
+        list: The ids.
+    """
+    _check_size(ids, allow_empty)
+    errors, seen = [], set()
+    for index, value in enumerate(ids):
+        try:
+            _integer(value)
+        except ValueError as e:
+            errors.append({'index': index, 'field': 'id', 'message': str(e)})
+            continue
+        if value in seen:
+            errors.append({'index': index, 'field': 'id',
+                           'message': 'is repeated in the batch'})
+        seen.add(value)
+    _raise_for(errors, len(ids))
+    return ids
+
+
+def check_exist(model, ids):
+    """
+    Check that every id exists, selecting only the id column.
+
+    Args:
+        model: Actor or Movie.
+        ids (list): Validated ids.
+
+    Raises:
+        BulkError: Listing the index of every id that does not exist.
+    """
+    existing = set(db.session.scalars(
+        select(model.id).where(model.id.in_(ids))))
+    errors = [{'index': index, 'field': 'id', 'message': 'not found'}
+              for index, value in enumerate(ids) if value not in existing]
+    _raise_for(errors, len(ids))
+
+
+def _transaction(write):
+    try:
+        result = write()
+        db.session.commit()
+        return result
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def bulk_create(model, schema, items):
+    """
+    Insert a batch of rows with multi-row INSERT ... RETURNING.
+
+    Args:
+        model: Actor or Movie.
+        schema (dict): ACTOR_SCHEMA or MOVIE_SCHEMA.
+        items (list): Items from the request body.
+
+    Raises:
+        BulkError: If any item is invalid; nothing is written.
+
+    Returns:
+        list: Ids of the new rows, in item order.
+    """
+    rows = validate_items(items, schema)
+
+    def write():
+        # The new ids are only known once inserted, so they are recorded
+        # afterwards and the search index loads just these rows
+        ids = db.session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True)
+            .execution_options(changed_ids=()), rows).all()
+        record_changes(db.session, model.__tablename__, ids)
+        return ids
+    return _transaction(write)
+
+
+def bulk_update(model, schema, items):
+    """
+    Update a batch of rows by primary key with executemany UPDATEs.
+
+    Args:
+        model: Actor or Movie.
+        schema (dict): ACTOR_SCHEMA or MOVIE_SCHEMA.
+        items (list): Items from the request body, each with an `id`.
+
+    Raises:
+        BulkError: If any item is invalid or does not exist; nothing is
+                   written.
+
+    Returns:
+        list: Ids of the updated rows, in item order.
+    """
+    rows = validate_items(items, schema, partial=True)
+    ids = [row['id'] for row in rows]
+
+    def write():
+        check_exist(model, ids)
+        db.session.execute(update(model).execution_options(changed_ids=ids),
+                           rows)
+        return ids
+    return _transaction(write)
+
+
+def bulk_delete(model, link_column, ids):
+    """
+    Delete a batch of rows and their cast links.
+
+    Args:
+        model: Actor or Movie.
+        link_column (Column): The movie_actors column referencing `model`.
+        ids (list): Ids from the request body.
+
+    Raises:
+        BulkError: If any id is invalid or does not exist; nothing is
+                   deleted.
+
+    Returns:
+        list: The deleted ids, in item order.
+    """
+    ids = validate_ids(ids)
+
+    def write():
+        check_exist(model, ids)
+        # Record which casts change, so the co-star graph is updated in place
+        movie_ids = db.session.scalars(
+            select(movie_actors.c.movie_id).where(link_column.in_(ids))
+            .distinct()).all()
+        db.session.execute(
+            delete(movie_actors).where(link_column.in_(ids))
+            .execution_options(changed_ids=movie_ids))
+        db.session.execute(delete(model).where(model.id.in_(ids))
+                           .execution_options(changed_ids=ids))
+        return ids
+    return _transaction(write)
+
+
+def create_actors(items):
+    return bulk_create(Actor, ACTOR_SCHEMA, items)
+
+
+def update_actors(items):
+    return bulk_update(Actor, ACTOR_SCHEMA, items)
+
+
+def delete_actors(ids):
+    return bulk_delete(Actor, movie_actors.c.actor_id, ids)
+
+
+def create_movies(items):
+    return bulk_create(Movie, MOVIE_SCHEMA, items)
+
+
+def update_movies(items):
+    return bulk_update(Movie, MOVIE_SCHEMA, items)
+
+
+def delete_movies(ids):
+    return bulk_delete(Movie, movie_actors.c.movie_id, ids)
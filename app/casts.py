@@ -0,0 +1,132 @@
+# This file contains the cast writes behind /movies/<id>/actors. Casts
+# are changed with set operations on movie_actors by actor id: one
+# multi-row INSERT ... ON CONFLICT DO NOTHING for the added actors and one
+# DELETE for the removed ones. Actor entities are never loaded.
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.bulk import check_exist, validate_ids
+from app.models import Actor, movie_actors, db
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def cast_ids(movie_id):
+    """
+    Args:
+        movie_id (int): Id of the movie.
+
+    Returns:
+        list: Sorted ids of the movie's actors.
+    """
+    return sorted(db.session.scalars(
+        select(movie_actors.c.actor_id)
+        .where(movie_actors.c.movie_id == movie_id)))
+
+
+def _add(movie_id, actor_ids):
+    if not actor_ids:
+        return
+    rows = [{'movie_id': movie_id, 'actor_id': actor_id}
+            for actor_id in actor_ids]
+    dialect_insert = _INSERTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(movie_actors).on_conflict_do_nothing()
+    else:
+        # Without ON CONFLICT support only insert links that are missing
+        existing = set(cast_ids(movie_id))
+        rows = [row for row in rows if row['actor_id'] not in existing]
+        statement = insert(movie_actors)
+    if rows:
+        db.session.execute(statement.execution_options(
+            changed_ids=[movie_id]), rows)
+
+
+def _remove(movie_id, actor_ids):
+    if actor_ids:
+        db.session.execute(
+            delete(movie_actors)
+            .where(movie_actors.c.movie_id == movie_id)
+            .where(movie_actors.c.actor_id.in_(actor_ids))
+            .execution_options(changed_ids=[movie_id]))
+
+
+def _write(movie_id, actor_ids, apply, allow_empty=False, check=True):
+    actor_ids = validate_ids(actor_ids, allow_empty)
+    try:
+        if check and actor_ids:
+            check_exist(Actor, actor_ids)
+        added, removed = apply(set(cast_ids(movie_id)), set(actor_ids))
+        _add(movie_id, sorted(added))
+        _remove(movie_id, sorted(removed))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'actors': cast_ids(movie_id),
+            'added': len(added), 'removed': len(removed)}
+
+
+def set_cast(movie_id, actor_ids):
+    """
+    Replace a movie's cast.
+
+    Args:
+        movie_id (int): Id of an existing movie.
+        actor_ids (list): Ids of the new cast, may be empty.
+
+    Raises:
+        BulkError: If an id is invalid, repeated or unknown.
+
+    Returns:
+        dict: The resulting cast ids and the number of links added and
+              removed.
+    """
+    return _write(movie_id, actor_ids,
+                  lambda current, wanted: (wanted - current,
+                                           current - wanted),
+                  allow_empty=True)
+
+
+def add_to_cast(movie_id, actor_ids):
+    """
+    Add actors to a movie's cast; actors already cast are left alone.
+
+    Args:
+        movie_id (int): Id of an existing movie.
+        actor_ids (list): Ids of the actors to add.
+
+    Raises:
+        BulkError: If an id is invalid, repeated or unknown.
+
+    Returns:
+        dict: The resulting cast ids and the number of links added and
+              removed.
+    """
+    return _write(movie_id, actor_ids,
+                  lambda current, wanted: (wanted - current, set()))
+
+
+def remove_from_cast(movie_id, actor_ids):
+    """
+    Remove actors from a movie's cast; actors not cast are ignored.
+
+    Args:
+        movie_id (int): Id of an existing movie.
+        actor_ids (list): Ids of the actors to remove.
+
+    Raises:
+        BulkError: If an id is invalid or repeated.
+
+    Returns:
+        dict: The resulting cast ids and the number of links added and
+              removed.
+    """
+    return _write(movie_id, actor_ids,
+                  lambda current, wanted: (set(), current & wanted),
+                  check=False)
@@ -1,7 +1,36 @@
-from flask import jsonify, request
-from app.models import Movie, Actor, db
+from flask import Response, jsonify, request, stream_with_context
+from sqlalchemy import func, select, text
+from app.models import Movie, Actor, movie_actors, db
+from app.database_helper import pool_status
 from app.auth import requires_auth
-from datetime import datetime
+from app.pagination import (
+    PaginationError, parse_page_args, keyset_page, order_by_sort)
+from app.filters import (
+    ACTOR_FILTERS, ACTOR_SORTS, MOVIE_FILTERS, MOVIE_SORTS, FilterError,
+    parse_filters, parse_sort)
+from app.export import EXPORT_FORMATS, export_actors, export_movies
+from app.queries import (
+    ACTOR_COLUMNS, ACTOR_FIELDS, MOVIE_COLUMNS, MOVIE_FIELDS, FieldsError,
+    encode_rows, filmography_query, parse_fields, select_columns)
+from app.json_provider import json_list_response
+from app.search import (
+    SearchError, parse_search_args, search_actors, search_movies)
+from app.graph import (
+    GraphError, get_graph, labels, parse_costar_args, parse_path_args)
+from app.stats import (
+    ACTOR_STATS_TABLES, MOVIE_STATS_TABLES, StatsError, actor_stats,
+    movie_stats, parse_age_bucket)
+from app import bulk, casts
+from app.bulk import BulkError
+from app.versioning import conditional
+from app.response_cache import cached, get_response_cache
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_metrics
+import time
+from datetime import date
+
+# Tables the movie representation is built from: an actor rename changes
+# the cast names of every movie they appear in
+MOVIE_TABLES = ('movie', 'movie_actors', 'actor')
 
 
 def setupControllers(appContext):
@@ -34,6 +63,47 @@ def setupControllers(appContext):
         """
         return jsonify({"success": True})
 
+    @app.route('/metrics/cache', methods=['GET'])
+    def get_cache_metrics():
+        """Report response cache hit ratio and latency saved.
+
+        Returns:
+            object: A JSON response containing the cache counters.
+        """
+        return jsonify(get_response_cache().stats())
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics_text():
+        """Report request and SQL metrics in the Prometheus text format.
+
+        Returns:
+            object: Latency, phase and statement-count histograms and
+                    request counters per route, for this worker.
+        """
+        return Response(get_metrics().render(),
+                        content_type=METRICS_CONTENT_TYPE)
+
+    @app.route('/health/db', methods=['GET'])
+    def get_database_health():
+        """Check the database connection and report the pool state.
+
+        Returns:
+            object: A JSON response with the round-trip time of a trivial
+                    query and the pool counters of this worker, with status
+                    503 when the database cannot be reached.
+        """
+        started = time.perf_counter()
+        try:
+            db.session.execute(text('SELECT 1'))
+        except Exception:
+            db.session.rollback()
+            return jsonify({'success': False, 'database': 'unavailable',
+                            'pool': pool_status(db.engine)}), 503
+        latency_ms = (time.perf_counter() - started) * 1000
+        return jsonify({'success': True, 'database': 'ok',
+                        'latency_ms': round(latency_ms, 2),
+                        'pool': pool_status(db.engine)})
+
     # Custom error handler for 400 Bad Request
     @app.errorhandler(400)
     def bad_request(error):
@@ -113,10 +183,20 @@ def setupControllers(appContext):
     # GET request to retrieve all actors
     @app.route('/actors', methods=['GET'])
     @requires_auth('view:actors')
+    @conditional('actor')
+    @cached('actor')
     def get_actors(payload):
-        """Endpoint to retrieve all actors.
-
-        This endpoint requires 'view:actors' permission.
+        """Endpoint to retrieve actors, one page at a time.
+
+        This endpoint requires 'view:actors' permission. Actors are ordered by
+        id; `limit` sets the page size and `after` takes the `next_cursor` of
+        the previous page. `paginate=false` returns every actor at once.
+        `fields` (e.g. 'id,name') limits the columns that are selected.
+        `gender`, `age_min` and `age_max` filter the actors and `sort`
+        (e.g. '-age') changes their order.
+        Responses carry an ETag; a matching If-None-Match gets a 304.
+        Successful responses are served from the response cache until an
+        actor changes.
 
         Args:
             payload (dict): The decoded JWT payload containing user information.
@@ -125,21 +205,47 @@ def setupControllers(appContext):
             object: A JSON response containing a list of actors.
         """
         try:
-            actors = db.session.query(Actor).all()
-            if not actors:
+            criteria = parse_filters(request.args, ACTOR_FILTERS)
+            sort = parse_sort(request.args.get('sort'), ACTOR_SORTS)
+            page = parse_page_args(request.args, sort)
+            fields = parse_fields(request.args.get('fields'), ACTOR_FIELDS)
+        except (PaginationError, FieldsError, FilterError) as e:
+            return bad_request(str(e))
+        try:
+            query = select_columns(ACTOR_COLUMNS, fields).filter(*criteria)
+            if page is None:
+                actors = order_by_sort(query, Actor.id, sort).all()
+                next_cursor = None
+            else:
+                actors, next_cursor = keyset_page(query, Actor.id, page, sort)
+            if not actors and not criteria and \
+                    (page is None or page.after is None):
                 return not_found('No actors')
-            formatted_actors = [actor.format() for actor in actors]
-            return jsonify({'actors': formatted_actors})
+            formatted_actors = encode_rows(ACTOR_COLUMNS, actors, fields)
+            if page is None:
+                return json_list_response(app, 'actors', formatted_actors)
+            return json_list_response(app, 'actors', formatted_actors,
+                                      next_cursor=next_cursor)
         except Exception as e:
             return internal_server_error(e)
 
     # GET request to retrieve all movies
     @app.route('/movies', methods=['GET'])
     @requires_auth('view:movies')
+    @conditional(*MOVIE_TABLES)
+    @cached(*MOVIE_TABLES)
     def get_movies(payload):
-        """Endpoint to retrieve all movies.
-
-        This endpoint requires 'view:movies' permission.
+        """Endpoint to retrieve movies, one page at a time.
+
+        This endpoint requires 'view:movies' permission. Movies are ordered by
+        id; `limit` sets the page size and `after` takes the `next_cursor` of
+        the previous page. `paginate=false` returns every movie at once.
+        `fields` (e.g. 'id,title') limits the columns that are selected; casts
+        are only loaded when 'actors' is among them. `released_after` and
+        `released_before` filter the movies and `sort` (e.g. 'release_date')
+        changes their order. Responses carry an
+        ETag; a matching If-None-Match gets a 304. Successful responses
+        are served from the response cache until a movie or actor changes.
 
         Args:
             payload (dict): The decoded JWT payload containing user information.
@@ -148,14 +254,553 @@ def setupControllers(appContext):
             object: A JSON response containing a list of movies.
         """
         try:
-            movies = db.session.query(Movie).all()
-            if not movies:
+            criteria = parse_filters(request.args, MOVIE_FILTERS)
+            sort = parse_sort(request.args.get('sort'), MOVIE_SORTS)
+            page = parse_page_args(request.args, sort)
+            fields = parse_fields(request.args.get('fields'), MOVIE_FIELDS)
+        except (PaginationError, FieldsError, FilterError) as e:
+            return bad_request(str(e))
+        try:
+            query = select_columns(MOVIE_COLUMNS, fields).filter(*criteria)
+            if page is None:
+                movies = order_by_sort(query, Movie.id, sort).all()
+                next_cursor = None
+            else:
+                movies, next_cursor = keyset_page(query, Movie.id, page, sort)
+            if not movies and not criteria and \
+                    (page is None or page.after is None):
                 return not_found('No movies')
-            formatted_movies = [movie.format() for movie in movies]
-            return jsonify({'movies': formatted_movies})
+            # Casts for the whole page come from one aggregated query
+            formatted_movies = encode_rows(MOVIE_COLUMNS, movies, fields)
+            if page is None:
+                return json_list_response(app, 'movies', formatted_movies)
+            return json_list_response(app, 'movies', formatted_movies,
+                                      next_cursor=next_cursor)
         except Exception as e:
             return internal_server_error(e)
 
+    def search_response(search, key):
+        """Run a name search with the `q` and `limit` query parameters.
+
+        Args:
+            search (function): search_actors or search_movies.
+            key (str): Name of the result list in the response.
+
+        Returns:
+            object: A JSON response with the ranked matches, or a 400 error.
+        """
+        try:
+            query, limit = parse_search_args(request.args)
+        except SearchError as e:
+            return bad_request(str(e))
+        try:
+            return jsonify({'success': True, key: search(query, limit)})
+        except Exception as e:
+            return internal_server_error(e)
+
+    # GET request to search actors by name
+    @app.route('/actors/search', methods=['GET'])
+    @requires_auth('view:actors')
+    @conditional('actor')
+    @cached('actor')
+    def search_actors_by_name(payload):
+        """Endpoint for type-ahead search of actor names.
+
+        This endpoint requires 'view:actors' permission. `q` is matched
+        case-insensitively against the beginning of names, then fuzzily;
+        at most `limit` actors are returned, best matches first.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response containing the matching actors.
+        """
+        return search_response(search_actors, 'actors')
+
+    # GET request to search movies by title
+    @app.route('/movies/search', methods=['GET'])
+    @requires_auth('view:movies')
+    @conditional('movie')
+    @cached('movie')
+    def search_movies_by_title(payload):
+        """Endpoint for type-ahead search of movie titles.
+
+        This endpoint requires 'view:movies' permission. `q` is matched
+        case-insensitively against the beginning of titles, then fuzzily;
+        at most `limit` movies are returned, best matches first.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response containing the matching movies.
+        """
+        return search_response(search_movies, 'movies')
+
+    # GET request to retrieve the movies of an actor
+    @app.route('/actors/<int:actor_id>/movies', methods=['GET'])
+    @requires_auth('view:movies')
+    @conditional(*MOVIE_TABLES)
+    @cached(*MOVIE_TABLES)
+    def get_actor_movies(payload, actor_id):
+        """Endpoint to retrieve the movies an actor appears in.
+
+        This endpoint requires 'view:movies' permission. Movies are ordered
+        by id and paginated like GET /movies, and `fields` selects their
+        columns in the same way.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+            actor_id (int): The ID of the actor.
+
+        Returns:
+            object: A JSON response containing a page of the actor's movies.
+        """
+        try:
+            page = parse_page_args(request.args)
+            fields = parse_fields(request.args.get('fields'), MOVIE_FIELDS)
+        except (PaginationError, FieldsError) as e:
+            return bad_request(str(e))
+        try:
+            if db.session.scalar(
+                    select(Actor.id).where(Actor.id == actor_id)) is None:
+                return not_found('Actor not found')
+            query = filmography_query(actor_id, fields)
+            if page is None:
+                movies = query.order_by(movie_actors.c.movie_id).all()
+                next_cursor = None
+            else:
+                movies, next_cursor = keyset_page(
+                    query, movie_actors.c.movie_id, page)
+            formatted_movies = encode_rows(MOVIE_COLUMNS, movies, fields)
+            if page is None:
+                return json_list_response(app, 'movies', formatted_movies)
+            return json_list_response(app, 'movies', formatted_movies,
+                                      next_cursor=next_cursor)
+        except Exception as e:
+            return internal_server_error(e)
+
+    # GET request to retrieve the co-stars of an actor
+    @app.route('/actors/<int:actor_id>/costars', methods=['GET'])
+    @requires_auth('view:actors')
+    @conditional(*MOVIE_TABLES)
+    @cached(*MOVIE_TABLES)
+    def get_actor_costars(payload, actor_id):
+        """Endpoint to retrieve the actors who worked with an actor.
+
+        This endpoint requires 'view:actors' permission. Co-stars are
+        found in the in-memory co-star graph and ordered by the number of
+        movies they share with the actor; `limit` caps their number.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+            actor_id (int): The ID of the actor.
+
+        Returns:
+            object: A JSON response containing the co-stars.
+        """
+        try:
+            limit = parse_costar_args(request.args)
+        except GraphError as e:
+            return bad_request(str(e))
+        try:
+            if db.session.scalar(
+                    select(Actor.id).where(Actor.id == actor_id)) is None:
+                return not_found('Actor not found')
+            costars = get_graph().costars(actor_id, limit)
+            names = labels(Actor.id, Actor.name,
+                           [costar_id for costar_id, _ in costars])
+            return jsonify({'success': True, 'actor_id': actor_id,
+                            'costars': [{'id': costar_id,
+                                         'name': names.get(costar_id),
+                                         'shared_movies': shared}
+                                        for costar_id, shared in costars]})
+        except Exception as e:
+            return internal_server_error(e)
+
+    # GET request to find how two actors are connected
+    @app.route('/actors/<int:actor_id>/path/<int:other_id>',
+               methods=['GET'])
+    @requires_auth('view:actors')
+    @conditional(*MOVIE_TABLES)
+    @cached(*MOVIE_TABLES)
+    def get_actor_path(payload, actor_id, other_id):
+        """Endpoint to find a shortest collaboration path between actors.
+
+        This endpoint requires 'view:actors' permission. Consecutive
+        actors on the path share the movie listed between them; paths
+        longer than `max_depth` movies (at most GRAPH_MAX_DEPTH) are not
+        searched.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+            actor_id (int): The ID of the first actor.
+            other_id (int): The ID of the second actor.
+
+        Returns:
+            object: A JSON response containing the actors and movies on the
+                    path, or a 404 error when there is none.
+        """
+        try:
+            max_depth = parse_path_args(request.args)
+        except GraphError as e:
+            return bad_request(str(e))
+        try:
+            ids = {actor_id, other_id}
+            if db.session.scalar(select(func.count(Actor.id))
+                                 .where(Actor.id.in_(ids))) != len(ids):
+                return not_found('Actor not found')
+            path = get_graph().path(actor_id, other_id, max_depth)
+            if path is None:
+                return not_found('No path found')
+            actor_ids, movie_ids = path
+            names = labels(Actor.id, Actor.name, actor_ids)
+            titles = labels(Movie.id, Movie.title, movie_ids)
+            return jsonify({
+                'success': True, 'degrees': len(movie_ids),
+                'actors': [{'id': path_actor_id,
+                            'name': names.get(path_actor_id)}
+                           for path_actor_id in actor_ids],
+                'movies': [{'id': movie_id, 'title': titles.get(movie_id)}
+                           for movie_id in movie_ids]})
+        except Exception as e:
+            return internal_server_error(e)
+
+    # GET request to retrieve aggregate actor statistics
+    @app.route('/stats/actors', methods=['GET'])
+    @requires_auth('view:actors')
+    @conditional(*ACTOR_STATS_TABLES)
+    def get_actor_stats(payload):
+        """Endpoint to count actors by gender and age.
+
+        This endpoint requires 'view:actors' permission. The counts are
+        computed by GROUP BY queries and reused until the actor table
+        changes; `age_bucket` sets the width of the age histogram buckets.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response containing the actor statistics.
+        """
+        try:
+            age_bucket = parse_age_bucket(request.args)
+        except StatsError as e:
+            return bad_request(str(e))
+        try:
+            return jsonify({'success': True, **actor_stats(age_bucket)})
+        except Exception as e:
+            return internal_server_error(e)
+
+    # GET request to retrieve aggregate movie statistics
+    @app.route('/stats/movies', methods=['GET'])
+    @requires_auth('view:movies')
+    @conditional(*MOVIE_STATS_TABLES)
+    def get_movie_stats(payload):
+        """Endpoint to count movies per year and measure cast sizes.
+
+        This endpoint requires 'view:movies' permission. The figures are
+        computed by GROUP BY and COUNT queries and reused until the movie
+        or movie_actors table changes.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response containing the movie statistics.
+        """
+        try:
+            return jsonify({'success': True, **movie_stats()})
+        except Exception as e:
+            return internal_server_error(e)
+
+    def export_response(export, fmt):
+        """Build a streamed response for a full-table export.
+
+        Args:
+            export (function): export_actors or export_movies.
+            fmt (str): Requested format, 'ndjson' or 'json'.
+
+        Returns:
+            object: A streamed response, or a 400 error for unknown formats.
+        """
+        if fmt not in EXPORT_FORMATS:
+            return bad_request(
+                'format must be one of ' + ', '.join(sorted(EXPORT_FORMATS)))
+        return Response(stream_with_context(export(fmt)),
+                        mimetype=EXPORT_FORMATS[fmt])
+
+    # GET request to stream every actor
+    @app.route('/actors/export', methods=['GET'])
+    @requires_auth('view:actors')
+    @conditional('actor')
+    def export_all_actors(payload):
+        """Endpoint to stream the whole actor table.
+
+        This endpoint requires 'view:actors' permission. Rows are read from a
+        server-side cursor and encoded as they arrive, so memory use does not
+        grow with the table. `format` is 'ndjson' (default) or 'json'.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A streamed NDJSON or JSON response containing every actor.
+        """
+        return export_response(
+            export_actors, request.args.get('format', 'ndjson'))
+
+    # GET request to stream every movie
+    @app.route('/movies/export', methods=['GET'])
+    @requires_auth('view:movies')
+    @conditional(*MOVIE_TABLES)
+    def export_all_movies(payload):
+        """Endpoint to stream the whole movie table with casts.
+
+        This endpoint requires 'view:movies' permission. Rows are read from a
+        server-side cursor and encoded as they arrive, so memory use does not
+        grow with the table. `format` is 'ndjson' (default) or 'json'.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A streamed NDJSON or JSON response containing every movie.
+        """
+        return export_response(
+            export_movies, request.args.get('format', 'ndjson'))
+
+    def bulk_error(error):
+        """Build the 400 response for a rejected batch.
+
+        Args:
+            error (BulkError): The validation error.
+
+        Returns:
+            object: A JSON response listing every invalid item.
+        """
+        return jsonify({'error': 'Bad Request', 'message': str(error),
+                        'errors': error.errors}), 400
+
+    def bulk_response(write, items, status):
+        """Apply a batch write and report the outcome of every item.
+
+        Args:
+            write (function): One of the app.bulk write functions.
+            items (list): Items or ids from the request body.
+            status (str): Status reported for each item, e.g. 'created'.
+
+        Returns:
+            object: A JSON response with one result per item, or a 400 error
+                    listing the invalid items when the batch is rejected.
+        """
+        try:
+            ids = write(items)
+        except BulkError as e:
+            return bulk_error(e)
+        except Exception as e:
+            return internal_server_error(e)
+        return jsonify({'success': True, 'count': len(ids), 'results': [
+            {'index': index, 'id': item_id, 'status': status}
+            for index, item_id in enumerate(ids)]})
+
+    def bulk_items(key):
+        """Return the list under `key` in the JSON request body, if any."""
+        data = request.get_json(silent=True)
+        return data.get(key) if isinstance(data, dict) else None
+
+    # POST request to create actors in bulk
+    @app.route('/actors/bulk', methods=['POST'])
+    @requires_auth('post:actors')
+    def create_actors_bulk(payload):
+        """Endpoint to create many actors in one transaction.
+
+        This endpoint requires 'post:actors' permission. The body is
+        {"actors": [{"name": ..., "age": ..., "gender": ...}, ...]}, with at
+        most BULK_MAX_ITEMS items. Either every actor is created or none is.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response with the new id of every item, in order.
+        """
+        return bulk_response(bulk.create_actors, bulk_items('actors'),
+                             'created')
+
+    # PATCH request to update actors in bulk
+    @app.route('/actors/bulk', methods=['PATCH'])
+    @requires_auth('update:actors')
+    def update_actors_bulk(payload):
+        """Endpoint to update many actors in one transaction.
+
+        This endpoint requires 'update:actors' permission. The body is
+        {"actors": [{"id": ..., <fields to change>}, ...]}. Either every
+        actor is updated or none is.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response with a result for every item.
+        """
+        return bulk_response(bulk.update_actors, bulk_items('actors'),
+                             'updated')
+
+    # DELETE request to delete actors in bulk
+    @app.route('/actors/bulk', methods=['DELETE'])
+    @requires_auth('delete:actors')
+    def delete_actors_bulk(payload):
+        """Endpoint to delete many actors in one transaction.
+
+        This endpoint requires 'delete:actors' permission. The body is
+        {"ids": [...]}. Either every actor is deleted, together with their
+        cast entries, or none is.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response with a result for every id.
+        """
+        return bulk_response(bulk.delete_actors, bulk_items('ids'),
+                             'deleted')
+
+    # POST request to create movies in bulk
+    @app.route('/movies/bulk', methods=['POST'])
+    @requires_auth('post:movies')
+    def create_movies_bulk(payload):
+        """Endpoint to create many movies in one transaction.
+
+        This endpoint requires 'post:movies' permission. The body is
+        {"movies": [{"title": ..., "release_date": "YYYY-MM-DD"}, ...]}, with
+        at most BULK_MAX_ITEMS items. Either every movie is created or none
+        is.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response with the new id of every item, in order.
+        """
+        return bulk_response(bulk.create_movies, bulk_items('movies'),
+                             'created')
+
+    # PATCH request to update movies in bulk
+    @app.route('/movies/bulk', methods=['PATCH'])
+    @requires_auth('update:movies')
+    def update_movies_bulk(payload):
+        """Endpoint to update many movies in one transaction.
+
+        This endpoint requires 'update:movies' permission. The body is
+        {"movies": [{"id": ..., <fields to change>}, ...]}. Either every
+        movie is updated or none is.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response with a result for every item.
+        """
+        return bulk_response(bulk.update_movies, bulk_items('movies'),
+                             'updated')
+
+    # DELETE request to delete movies in bulk
+    @app.route('/movies/bulk', methods=['DELETE'])
+    @requires_auth('delete:movies')
+    def delete_movies_bulk(payload):
+        """Endpoint to delete many movies in one transaction.
+
+        This endpoint requires 'delete:movies' permission. The body is
+        {"ids": [...]}. Either every movie is deleted, together with its cast
+        entries, or none is.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+
+        Returns:
+            object: A JSON response with a result for every id.
+        """
+        return bulk_response(bulk.delete_movies, bulk_items('ids'),
+                             'deleted')
+
+    def cast_response(write, movie_id):
+        """Apply a cast change to a movie and report the resulting cast.
+
+        Args:
+            write (function): One of the app.casts write functions.
+            movie_id (int): The ID of the movie.
+
+        Returns:
+            object: A JSON response with the cast ids and the number of
+                    actors added and removed, or a 400/404 error.
+        """
+        if db.session.scalar(select(Movie.id).where(Movie.id == movie_id)) \
+                is None:
+            return not_found('Movie not found')
+        try:
+            result = write(movie_id, bulk_items('actors'))
+        except BulkError as e:
+            return bulk_error(e)
+        except Exception as e:
+            return internal_server_error(e)
+        return jsonify(dict(result, success=True, movie_id=movie_id))
+
+    # PUT request to replace the cast of a movie
+    @app.route('/movies/<int:movie_id>/actors', methods=['PUT'])
+    @requires_auth('update:movies')
+    def set_movie_actors(payload, movie_id):
+        """Endpoint to replace the cast of a movie.
+
+        This endpoint requires 'update:movies' permission. The body is
+        {"actors": [<actor id>, ...]}; an empty list clears the cast.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+            movie_id (int): The ID of the movie.
+
+        Returns:
+            object: A JSON response with the new cast ids.
+        """
+        return cast_response(casts.set_cast, movie_id)
+
+    # POST request to add actors to the cast of a movie
+    @app.route('/movies/<int:movie_id>/actors', methods=['POST'])
+    @requires_auth('update:movies')
+    def add_movie_actors(payload, movie_id):
+        """Endpoint to add actors to the cast of a movie.
+
+        This endpoint requires 'update:movies' permission. The body is
+        {"actors": [<actor id>, ...]}; actors already cast are ignored.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+            movie_id (int): The ID of the movie.
+
+        Returns:
+            object: A JSON response with the new cast ids.
+        """
+        return cast_response(casts.add_to_cast, movie_id)
+
+    # DELETE request to remove actors from the cast of a movie
+    @app.route('/movies/<int:movie_id>/actors', methods=['DELETE'])
+    @requires_auth('update:movies')
+    def remove_movie_actors(payload, movie_id):
+        """Endpoint to remove actors from the cast of a movie.
+
+        This endpoint requires 'update:movies' permission. The body is
+        {"actors": [<actor id>, ...]}; actors not in the cast are ignored.
+
+        Args:
+            payload (dict): The decoded JWT payload containing user information.
+            movie_id (int): The ID of the movie.
+
+        Returns:
+            object: A JSON response with the new cast ids.
+        """
+        return cast_response(casts.remove_from_cast, movie_id)
+
     # DELETE request to delete an actor by ID
     @app.route('/actors/<int:actor_id>', methods=['DELETE'])
     @requires_auth('delete:actors')
@@ -267,8 +912,13 @@ def setupControllers(appContext):
 
             if title is None or release_date is None:
                 return bad_request('Title and release_date are required')
+            try:
+                release_date = date.fromisoformat(release_date)
+            except (TypeError, ValueError):
+                return bad_request('release_date must be a date in '
+                                   'YYYY-MM-DD format')
 
-            new_movie = Movie(title=title, release_date=datetime.now())
+            new_movie = Movie(title=title, release_date=release_date)
             db.session.add(new_movie)
             db.session.commit()
 
@@ -335,6 +985,8 @@ def setupControllers(appContext):
         """
         try:
             data = request.json
+            # The commit expires the movie, so its cast is only loaded by
+            # format(), with one query whatever its size
             movie = db.session.get(Movie, movie_id)
 
             if movie is None:
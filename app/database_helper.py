@@ -2,10 +2,13 @@
 # DB app binding and Migration setup
 
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 
-# Initialize SQLAlchemy object
-db = SQLAlchemy()
+from app.profiler import install_sql_diagnostics
+from app.replica import RoutingSession
+
+# Initialize SQLAlchemy object; its sessions send the reads of GET requests
+# to the read replica when one is configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Function to bind the database to the Flask application
 
@@ -20,11 +23,11 @@ def BindDBToApp(app):
     Returns:
         SQLAlchemy: The SQLAlchemy database object.
     """
-    # Load configuration settings from the 'config' module
-    app.config.from_object('config')
     # Bind the SQLAlchemy database to the Flask application
     db.app = app
     db.init_app(app)
+    # Slow-query log and SQL profiler on the engines just created
+    install_sql_diagnostics(app, db)
     return db
 
 # Function to enable database migrations for the Flask application
@@ -34,6 +37,9 @@ def EnableDBMigrations(app, db):
     """
     Enable database migrations for the Flask application.
 
+    Flask-Migrate, and with it Alembic, is only imported here, since only
+    the `flask db` commands need it.
+
     Args:
         app (Flask): The Flask application instance.
         db (SQLAlchemy): The SQLAlchemy database object.
@@ -41,6 +47,7 @@ def EnableDBMigrations(app, db):
     Returns:
         Migrate: The database migration object.
     """
+    from flask_migrate import Migrate
     return Migrate(app, db)
 
 # Function to get the application-bound database context
@@ -54,3 +61,25 @@ def GetAppBoundDBContext():
         SQLAlchemy: The SQLAlchemy database object bound to the Flask application.
     """
     return db
+
+# Function to report the state of the connection pool
+
+
+def pool_status(engine):
+    """
+    Report how many connections of an engine's pool are in use.
+
+    Args:
+        engine (Engine): The SQLAlchemy engine.
+
+    Returns:
+        dict: The pool class and, for queue pools, its size and the number
+              of checked-in, checked-out and overflow connections.
+    """
+    pool = engine.pool
+    status = {'class': type(pool).__name__}
+    if hasattr(pool, 'checkedout'):
+        status.update(size=pool.size(), checked_in=pool.checkedin(),
+                      checked_out=pool.checkedout(),
+                      overflow=max(0, pool.overflow()))
+    return status
@@ -0,0 +1,104 @@
+# This file contains the generators that stream full-table exports for
+# the /actors/export and /movies/export endpoints
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.models import Actor, Movie, db
+from app.queries import (
+    ACTOR_COLUMNS, ACTOR_FIELDS, MOVIE_COLUMNS, MOVIE_FIELDS, encode_rows)
+
+# Supported export formats and their response mimetypes
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def _batch_size():
+    return current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+
+
+def _stream_rows(statement):
+    """
+    Execute a statement on a server-side cursor and yield batches of rows.
+
+    Args:
+        statement (Select): Column-only select to stream.
+
+    Yields:
+        list: Up to EXPORT_BATCH_SIZE rows at a time.
+    """
+    result = db.session.execute(
+        statement.execution_options(yield_per=_batch_size()))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _encode(batches, key, fmt):
+    """
+    Join batches of encoded objects into NDJSON lines or one JSON document.
+
+    Args:
+        batches (iterable): Lists of encoded JSON objects.
+        key (str): Name of the top-level list in the JSON format.
+        fmt (str): Either 'ndjson' or 'json'.
+
+    Yields:
+        str: One chunk of output per batch.
+    """
+    if fmt == 'ndjson':
+        for batch in batches:
+            yield ''.join(item + '\n' for item in batch)
+        return
+
+    yield '{"%s":[' % key
+    separator = ''
+    for batch in batches:
+        if batch:
+            yield separator + ','.join(batch)
+            separator = ','
+    yield ']}\n'
+
+
+def _actor_batches():
+    statement = select(*ACTOR_COLUMNS.values()).order_by(Actor.id)
+    for rows in _stream_rows(statement):
+        yield encode_rows(ACTOR_COLUMNS, rows, ACTOR_FIELDS)
+
+
+def _movie_batches():
+    statement = select(*MOVIE_COLUMNS.values()).order_by(Movie.id)
+    for rows in _stream_rows(statement):
+        yield encode_rows(MOVIE_COLUMNS, rows, MOVIE_FIELDS)
+
+
+def export_actors(fmt):
+    """
+    Stream every actor without loading the table into memory.
+
+    Args:
+        fmt (str): Either 'ndjson' or 'json'.
+
+    Returns:
+        generator: Encoded chunks of the export.
+    """
+    return _encode(_actor_batches(), 'actors', fmt)
+
+
+def export_movies(fmt):
+    """
+    Stream every movie with its cast without loading the table into memory.
+
+    Casts are fetched with one query per batch of movies.
+
+    Args:
+        fmt (str): Either 'ndjson' or 'json'.
+
+    Returns:
+        generator: Encoded chunks of the export.
+    """
+    return _encode(_movie_batches(), 'movies', fmt)
@@ -0,0 +1,100 @@
+# This file contains the whitelisted filter and sort query parameters of
+# the list endpoints. Every filter and sort column is covered by an index:
+# actor(gender, age) for the actor filters, actor(age) for sort=age, and
+# movie(release_date).
+
+from collections import namedtuple
+from datetime import date
+
+from app.models import Actor, Movie
+
+# Parsed `sort` parameter: its name as given, the column and the direction
+Sort = namedtuple('Sort', ['name', 'column', 'descending'])
+
+# Filter parameter name mapped to (column, comparison, value parser)
+ACTOR_FILTERS = {
+    'gender': (Actor.gender, '==', str),
+    'age_min': (Actor.age, '>=', int),
+    'age_max': (Actor.age, '<=', int),
+}
+MOVIE_FILTERS = {
+    'released_after': (Movie.release_date, '>=', date.fromisoformat),
+    'released_before': (Movie.release_date, '<=', date.fromisoformat),
+}
+
+# Columns a client may sort by with `sort=`, prefixed with '-' to reverse
+ACTOR_SORTS = {
+    'id': Actor.id,
+    'age': Actor.age,
+}
+MOVIE_SORTS = {
+    'id': Movie.id,
+    'release_date': Movie.release_date,
+}
+
+_COMPARISONS = {
+    '==': lambda column, value: column == value,
+    '>=': lambda column, value: column >= value,
+    '<=': lambda column, value: column <= value,
+}
+
+
+class FilterError(ValueError):
+    """
+    Exception raised for an invalid filter or sort query parameter.
+    """
+
+
+def parse_filters(args, filters):
+    """
+    Build SQL criteria from the filter parameters in the query string.
+
+    Parameters that are not filters of the resource are left alone, so
+    pagination and field arguments can share the query string.
+
+    Args:
+        args (MultiDict): The request query parameters.
+        filters (dict): ACTOR_FILTERS or MOVIE_FILTERS.
+
+    Raises:
+        FilterError: If a filter value cannot be parsed.
+
+    Returns:
+        list: Criteria to apply with Query.filter(), in parameter order.
+    """
+    criteria = []
+    for name, (column, comparison, parse) in filters.items():
+        value = args.get(name)
+        if value is None:
+            continue
+        try:
+            value = parse(value)
+        except ValueError:
+            raise FilterError(f'Invalid value for {name}: "{value}"')
+        criteria.append(_COMPARISONS[comparison](column, value))
+    return criteria
+
+
+def parse_sort(value, sorts):
+    """
+    Parse the `sort` parameter against a whitelist of columns.
+
+    Args:
+        value (str): The raw parameter, e.g. 'age' or '-release_date', or
+                     None for the default order.
+        sorts (dict): ACTOR_SORTS or MOVIE_SORTS.
+
+    Raises:
+        FilterError: If the column cannot be sorted by.
+
+    Returns:
+        Sort: The requested order, or None for ascending id.
+    """
+    if value is None or value == 'id':
+        return None
+    name = value[1:] if value.startswith('-') else value
+    if name not in sorts:
+        raise FilterError(
+            f'Unknown sort "{value}", expected any of ' +
+            ', '.join(sorts) + ', optionally prefixed with "-"')
+    return Sort(value, sorts[name], value.startswith('-'))
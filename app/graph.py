@@ -0,0 +1,479 @@
+# This file contains the in-memory co-star graph behind
+# /actors/<id>/costars and /actors/<a>/path/<b>. The actor-movie links of
+# movie_actors are held as CSR (compressed sparse row) integer arrays in
+# both directions, so the graph costs a few bytes per link and BFS never
+# touches the database. Casts changed through the API are patched in
+# place; other changes to movie_actors rebuild the graph in a background
+# thread, while requests keep using the previous one.
+
+import logging
+import threading
+from array import array
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.models import movie_actors, db
+from app.replica import on_primary
+from app.versioning import VersionWatch, mark_response_stale, on_bump
+
+logger = logging.getLogger(__name__)
+
+
+class GraphError(ValueError):
+    """
+    Exception raised for invalid graph query parameters.
+    """
+
+
+def _bounded_int(args, name, default, maximum):
+    value = args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise GraphError(f'{name} must be an integer')
+    if value < 1 or value > maximum:
+        raise GraphError(f'{name} must be between 1 and {maximum}')
+    return value
+
+
+def parse_costar_args(args):
+    """
+    Args:
+        args (MultiDict): The request query parameters.
+
+    Raises:
+        GraphError: If `limit` is invalid.
+
+    Returns:
+        int: The number of co-stars to return.
+    """
+    return _bounded_int(args, 'limit',
+                        current_app.config.get('PAGE_SIZE_DEFAULT', 50),
+                        current_app.config.get('PAGE_SIZE_MAX', 500))
+
+
+def parse_path_args(args):
+    """
+    Args:
+        args (MultiDict): The request query parameters.
+
+    Raises:
+        GraphError: If `max_depth` is invalid.
+
+    Returns:
+        int: The largest number of movies a path may go through.
+    """
+    maximum = current_app.config.get('GRAPH_MAX_DEPTH', 6)
+    return _bounded_int(args, 'max_depth', maximum, maximum)
+
+
+def build_csr(sources, targets, size):
+    """
+    Group (source, target) pairs by source into CSR arrays.
+
+    Args:
+        sources (array): Source ids, each below `size`.
+        targets (array): Target ids, parallel to `sources`.
+        size (int): One more than the largest source id.
+
+    Returns:
+        tuple: `offsets`, where the targets of source `s` are
+               `targets[offsets[s]:offsets[s + 1]]`, and the grouped targets.
+    """
+    offsets = array('q', bytes(8 * (size + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for position in range(1, size + 1):
+        offsets[position] += offsets[position - 1]
+    cursor = offsets[:-1]
+    grouped = array('i', bytes(4 * len(sources)))
+    for source, target in zip(sources, targets):
+        grouped[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, grouped
+
+
+class CostarGraph:
+    """
+    Bipartite actor-movie graph with CSR adjacency arrays.
+
+    Links changed after the arrays were built are kept in small override
+    dicts holding the full adjacency of every changed actor and movie.
+    Once the overrides grow past `max_overrides` the graph is rebuilt.
+
+    Only the first load blocks a request. Later rebuilds read the table and
+    build the arrays in a background thread, and the previous graph keeps
+    being patched and served until the new one is swapped in.
+
+    Attributes:
+        max_overrides (int): Largest number of patched actors and movies
+                             before a rebuild, 0 for 1% of the links.
+        background (bool): Rebuild in a background thread once loaded.
+        links (int): Number of actor-movie links in the arrays.
+    """
+
+    def __init__(self, max_overrides=0, background=True):
+        self.max_overrides = max_overrides
+        self.background = background
+        self.links = 0
+        self._loaded = False
+        self._rebuilding = None
+        self._patched = None
+        self._behind = False
+        self._actors = (array('q', [0]), array('i'))
+        self._movies = (array('q', [0]), array('i'))
+        self._actor_overrides = {}
+        self._movie_overrides = {}
+        self._stale = True
+        self._dirty_movies = set()
+        self._watch = VersionWatch(movie_actors.name)
+        self._lock = threading.Lock()
+
+    def mark(self, movie_ids):
+        """
+        Record that casts changed.
+
+        Args:
+            movie_ids (list): Ids of the movies whose cast changed, or None
+                              when unknown, in which case the graph is
+                              rebuilt.
+        """
+        self._watch.seen()
+        with self._lock:
+            if movie_ids is None:
+                self._stale = True
+            else:
+                self._dirty_movies.update(movie_ids)
+
+    def load(self, movie_ids, actor_ids):
+        """
+        Replace the graph with the given links.
+
+        Args:
+            movie_ids (array): Movie id of every link.
+            actor_ids (array): Actor id of every link, parallel to
+                               `movie_ids`.
+        """
+        self._install(*self._build(movie_ids, actor_ids))
+
+    @staticmethod
+    def _build(movie_ids, actor_ids):
+        return (build_csr(movie_ids, actor_ids,
+                          max(movie_ids, default=0) + 1),
+                build_csr(actor_ids, movie_ids,
+                          max(actor_ids, default=0) + 1),
+                len(movie_ids))
+
+    def _install(self, movies, actors, links):
+        self._movies, self._actors, self.links = movies, actors, links
+        self._actor_overrides = {}
+        self._movie_overrides = {}
+        self._loaded = True
+        self._behind = False
+
+    @staticmethod
+    def _read_links():
+        movie_ids, actor_ids = array('i'), array('i')
+        result = db.session.execute(
+            select(movie_actors.c.movie_id, movie_actors.c.actor_id)
+            .execution_options(yield_per=10000))
+        for movie_id, actor_id in result:
+            movie_ids.append(movie_id)
+            actor_ids.append(actor_id)
+        return movie_ids, actor_ids
+
+    def _rebuild(self):
+        self.load(*self._read_links())
+        self._stale = False
+        self._dirty_movies.clear()
+
+    def _start_rebuild(self):
+        """Rebuild in a thread; called with the lock held."""
+        if self._rebuilding is not None:
+            return
+        self._stale = False
+        self._patched = set()
+        self._rebuilding = threading.Thread(
+            target=self._rebuild_in_background,
+            args=(current_app._get_current_object(),),
+            name='costar-graph-rebuild', daemon=True)
+        self._rebuilding.start()
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context(), on_primary():
+                try:
+                    links = self._read_links()
+                finally:
+                    db.session.remove()
+            built = self._build(*links)
+            del links
+            with self._lock:
+                self._install(*built)
+                # Casts patched into the previous graph may be missing from
+                # the links read, so they are read again
+                self._dirty_movies.update(self._patched)
+        except Exception:
+            logger.exception('Co-star graph rebuild failed')
+            with self._lock:
+                self._stale = True
+        finally:
+            with self._lock:
+                self._rebuilding = None
+                self._patched = None
+
+    def wait(self, timeout=None):
+        """
+        Wait for a background rebuild to finish.
+
+        Args:
+            timeout (float): Seconds to wait at most, None for no limit.
+
+        Returns:
+            bool: Whether no rebuild is running any more.
+        """
+        thread = self._rebuilding
+        if thread is not None:
+            thread.join(timeout)
+        return self._rebuilding is None
+
+    @staticmethod
+    def _neighbours(csr, overrides, node):
+        patched = overrides.get(node)
+        if patched is not None:
+            return patched
+        offsets, targets = csr
+        if node + 1 >= len(offsets):
+            return ()
+        return targets[offsets[node]:offsets[node + 1]]
+
+    def movies_of(self, actor_id):
+        """
+        Returns:
+            sequence: Ids of the movies of an actor.
+        """
+        return self._neighbours(self._actors, self._actor_overrides,
+                                actor_id)
+
+    def actors_of(self, movie_id):
+        """
+        Returns:
+            sequence: Ids of the actors of a movie.
+        """
+        return self._neighbours(self._movies, self._movie_overrides,
+                                movie_id)
+
+    def set_cast(self, movie_id, actor_ids):
+        """
+        Patch the cast of one movie into the graph.
+
+        Args:
+            movie_id (int): Id of the movie.
+            actor_ids (iterable): Ids of its whole new cast.
+        """
+        old, new = set(self.actors_of(movie_id)), set(actor_ids)
+        if old == new:
+            return
+        self._movie_overrides[movie_id] = tuple(sorted(new))
+        for actor_id in old - new:
+            self._actor_overrides[actor_id] = tuple(
+                other for other in self.movies_of(actor_id)
+                if other != movie_id)
+        for actor_id in new - old:
+            self._actor_overrides[actor_id] = \
+                tuple(self.movies_of(actor_id)) + (movie_id,)
+
+    def refresh(self):
+        """
+        Bring the graph up to date with movie_actors.
+
+        The whole table is read on first use and after unknown changes,
+        including those made by other processes, which only show in the
+        table's version; otherwise the casts of changed movies are read with
+        one query and patched in. Both read the primary, since casts patched
+        in from a lagging replica would be kept until the next rebuild.
+        """
+        with self._lock, on_primary():
+            if self._watch.changed_elsewhere():
+                self._stale = True
+            if not self._loaded or (self._stale and not self.background):
+                self._rebuild()
+                return
+            if self._stale:
+                self._behind = True
+                self._start_rebuild()
+            if self._behind:
+                # Answered from the previous graph until the rebuild is done
+                mark_response_stale()
+            if not self._dirty_movies:
+                return
+            ids = sorted(self._dirty_movies)
+            self._dirty_movies.clear()
+            if self._patched is not None:
+                self._patched.update(ids)
+            casts = {movie_id: [] for movie_id in ids}
+            for movie_id, actor_id in db.session.execute(
+                    select(movie_actors.c.movie_id, movie_actors.c.actor_id)
+                    .where(movie_actors.c.movie_id.in_(ids))):
+                casts[movie_id].append(actor_id)
+            for movie_id, actor_ids in casts.items():
+                self.set_cast(movie_id, actor_ids)
+            limit = self.max_overrides or max(1000, self.links // 100)
+            if len(self._actor_overrides) + len(self._movie_overrides) > \
+                    limit:
+                if self.background:
+                    self._start_rebuild()
+                else:
+                    self._rebuild()
+
+    def costars(self, actor_id, limit):
+        """
+        Find the actors who share a movie with an actor.
+
+        Args:
+            actor_id (int): Id of the actor.
+            limit (int): Maximum number of co-stars.
+
+        Returns:
+            list: (actor id, shared movie count) tuples, most shared movies
+                  first, then by id.
+        """
+        self.refresh()
+        counts = Counter()
+        for movie_id in self.movies_of(actor_id):
+            counts.update(self.actors_of(movie_id))
+        counts.pop(actor_id, None)
+        return sorted(counts.items(),
+                      key=lambda item: (-item[1], item[0]))[:limit]
+
+    def _expand(self, frontier, parents, seen_movies):
+        """Advance one side of the search by one movie."""
+        reached = []
+        for actor_id in frontier:
+            for movie_id in self.movies_of(actor_id):
+                if movie_id in seen_movies:
+                    continue
+                seen_movies.add(movie_id)
+                for other in self.actors_of(movie_id):
+                    if other not in parents:
+                        parents[other] = (actor_id, movie_id)
+                        reached.append(other)
+        return reached
+
+    def path(self, source, target, max_depth):
+        """
+        Find a shortest collaboration path between two actors.
+
+        A bidirectional BFS expands the smaller frontier first, so only a
+        small part of the graph is visited for close actors.
+
+        Args:
+            source (int): Id of the first actor.
+            target (int): Id of the second actor.
+            max_depth (int): Largest number of movies on the path.
+
+        Returns:
+            tuple: The actor ids from `source` to `target` and the ids of
+                   the movies linking each consecutive pair, or None when
+                   no path of at most `max_depth` movies exists.
+        """
+        self.refresh()
+        if source == target:
+            return [source], []
+        forward, backward = {source: None}, {target: None}
+        forward_frontier, backward_frontier = [source], [target]
+        forward_movies, backward_movies = set(), set()
+        for _ in range(max_depth):
+            if not forward_frontier or not backward_frontier:
+                return None
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier = self._expand(
+                    forward_frontier, forward, forward_movies)
+                meeting = [actor_id for actor_id in forward_frontier
+                           if actor_id in backward]
+            else:
+                backward_frontier = self._expand(
+                    backward_frontier, backward, backward_movies)
+                meeting = [actor_id for actor_id in backward_frontier
+                           if actor_id in forward]
+            if meeting:
+                # Meeting actors may lie at different depths on the other
+                # side; keep the shortest path, then the smallest ids
+                return min((self._join(actor_id, forward, backward)
+                            for actor_id in meeting),
+                           key=lambda path: (len(path[1]), path[0]))
+        return None
+
+    @staticmethod
+    def _join(meeting, forward, backward):
+        actors, movies = [meeting], []
+        node = meeting
+        while forward[node] is not None:
+            node, movie_id = forward[node]
+            actors.insert(0, node)
+            movies.insert(0, movie_id)
+        node = meeting
+        while backward[node] is not None:
+            node, movie_id = backward[node]
+            actors.append(node)
+            movies.append(movie_id)
+        return actors, movies
+
+
+def labels(id_column, label_column, ids):
+    """
+    Load the names or titles of a few rows with one query.
+
+    Args:
+        id_column (Column): Actor.id or Movie.id.
+        label_column (Column): Actor.name or Movie.title.
+        ids (list): Ids of the rows.
+
+    Returns:
+        dict: Id mapped to label.
+    """
+    if not ids:
+        return {}
+    return dict(db.session.execute(
+        select(id_column, label_column).where(id_column.in_(ids))).all())
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """
+    Return the process-wide co-star graph, creating it on first use.
+
+    Returns:
+        CostarGraph: The shared graph.
+    """
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = CostarGraph()
+    return _graph
+
+
+def set_graph(graph):
+    """
+    Replace the process-wide co-star graph.
+
+    Args:
+        graph (CostarGraph): The graph to use, or None to create a new one
+                             on next use.
+    """
+    global _graph
+    with _graph_lock:
+        _graph = graph
+
+
+@on_bump
+def _mark_changed(table, ids):
+    graph = _graph
+    if graph is not None and table == 'movie_actors':
+        graph.mark(ids)
@@ -0,0 +1,197 @@
+# This file contains the application's JSON provider and the row encoder
+# used by list and export endpoints. orjson is used when it is installed,
+# otherwise everything falls back to the standard library.
+
+import json
+from json.encoder import encode_basestring
+from operator import itemgetter
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.metrics import phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_value(value):
+    """
+    Encode a single value as compact JSON text.
+
+    Args:
+        value: A JSON-serialisable value.
+
+    Returns:
+        str: The encoded value.
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value, separators=(',', ':'))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes with orjson when it is available.
+
+    Output matches DefaultJSONProvider: keys are sorted, dates go through the
+    same `default` hook, and debug mode pretty-prints. Calls that pass
+    stdlib-specific keyword arguments use the stdlib encoder.
+    """
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default,
+                            option=self._orjson_options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        with phase('serialization'):
+            if orjson is None:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or \
+                self.compact is False
+            body = orjson.dumps(obj, default=self.default,
+                                option=self._orjson_options(indent))
+            return self._app.response_class(body + b'\n',
+                                            mimetype=self.mimetype)
+
+
+def _null_aware(convert):
+    """
+    Args:
+        convert (function): Renders a non-null value, None to render as is.
+
+    Returns:
+        function: Renders None as 'null' and other values with convert.
+    """
+    if convert is None:
+        return lambda value: 'null' if value is None else value
+    return lambda value: 'null' if value is None else convert(value)
+
+
+class RowEncoder:
+    """
+    Encodes rows of a fixed shape straight to JSON objects.
+
+    Keys, braces and separators are baked into a template once per shape.
+    Rows are encoded a column at a time: each field is read with an
+    itemgetter and rendered by mapping the converter for its kind over the
+    column, then the columns are zipped back into rows and formatted. For
+    index sources the per-row work happens in C. No intermediate dict is
+    created.
+
+    Field kinds:
+        'int': Integer column, rendered with str().
+        'str': String column, escaped with the C string encoder.
+        'date': Date column, rendered as a quoted ISO date.
+        'json': Anything else, encoded with dumps_value().
+
+    Attributes:
+        fields (list): Output keys, in order.
+    """
+
+    # Converter of each kind, None to let the template render the value
+    CONVERTERS = {
+        'int': None,
+        'str': encode_basestring,
+        'date': '"%s"'.__mod__,
+        'json': dumps_value,
+    }
+
+    def __init__(self, fields, sources, kinds=None):
+        """
+        Args:
+            fields (list): Output keys, in order.
+            sources (list): Per field, either the index of the value in the
+                            row or a callable `getter(row, context)`.
+            kinds (list): Per field kind, see above. Values produced by
+                          callables are always encoded as 'json'.
+        """
+        self.fields = list(fields)
+        kinds = list(kinds or ['json'] * len(self.fields))
+        self._template = '{' + ','.join(
+            json.dumps(name).replace('%', '%%') + ':%s'
+            for name in self.fields) + '}'
+        self._columns = []
+        for source, kind in zip(sources, kinds):
+            if callable(source):
+                self._columns.append((source, None, dumps_value))
+            else:
+                self._columns.append((None, itemgetter(int(source)),
+                                      self.CONVERTERS.get(kind, dumps_value)))
+
+    def encode(self, row, context=None):
+        """
+        Encode one row as a JSON object.
+
+        Args:
+            row (tuple): The row, e.g. a SQLAlchemy Row.
+            context: Passed to callable sources.
+
+        Returns:
+            str: The encoded object.
+        """
+        return self.encode_many([row], context)[0]
+
+    def encode_many(self, rows, context=None):
+        """
+        Encode rows as JSON objects.
+
+        Args:
+            rows (list): The rows, e.g. SQLAlchemy Rows.
+            context: Passed to callable sources.
+
+        Returns:
+            list: One encoded object (str) per row.
+        """
+        if not rows:
+            return []
+        columns = []
+        for getter, fetch, convert in self._columns:
+            if getter is not None:
+                column = [getter(row, context) for row in rows]
+            else:
+                column = list(map(fetch, rows))
+            if convert is not dumps_value and None in column:
+                column = map(_null_aware(convert), column)
+            elif convert is not None:
+                column = map(convert, column)
+            columns.append(column)
+        return list(map(self._template.__mod__, zip(*columns)))
+
+
+def json_list_response(app, key, items, **extra):
+    """
+    Build a JSON response around a list of already encoded items.
+
+    Args:
+        app (Flask): The Flask application instance.
+        key (str): Name of the list in the response object.
+        items (list): Encoded JSON values, e.g. from RowEncoder.encode.
+        **extra: Further top-level members, encoded normally.
+
+    Returns:
+        Response: An application/json response.
+    """
+    with phase('serialization'):
+        members = [json.dumps(key) + ':[' + ','.join(items) + ']']
+        for name in sorted(extra):
+            members.append(json.dumps(name) + ':' + dumps_value(extra[name]))
+        return app.response_class('{' + ','.join(members) + '}\n',
+                                  mimetype='application/json')
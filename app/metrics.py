@@ -0,0 +1,324 @@
+# This file contains the request instrumentation behind GET /metrics.
+# Every request is timed as a whole and split into the time spent
+# verifying its token, waiting on the database and encoding JSON; the
+# number of SQL statements it ran is counted too. Observations go into
+# in-process histograms rendered in the Prometheus text format, so each
+# worker reports its own figures.
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds in seconds of the latency buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the statements-per-request buckets
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+PHASES = ('auth', 'db', 'serialization')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """
+    Cumulative histogram of observations, one series per label set.
+
+    Attributes:
+        name (str): Metric name.
+        description (str): Text of the HELP line.
+        buckets (tuple): Increasing upper bounds; +Inf is implied.
+    """
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        """
+        Record one observation. Callers hold the registry lock.
+
+        Args:
+            labels (tuple): (name, value) pairs identifying the series.
+            value (float): The observed value.
+        """
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = \
+                [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        """
+        Returns:
+            list: The lines of the metric in the Prometheus text format.
+        """
+        lines = [f'# HELP {self.name} {self.description}',
+                 f'# TYPE {self.name} histogram']
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket'
+                             f'{_labels(labels + (("le", bound),))} '
+                             f'{cumulative}')
+            lines.append(f'{self.name}_sum{_labels(labels)} '
+                         f'{_format_value(total)}')
+            lines.append(f'{self.name}_count{_labels(labels)} {count}')
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter, one series per label set.
+
+    Attributes:
+        name (str): Metric name.
+        description (str): Text of the HELP line.
+    """
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._series = {}
+
+    def inc(self, labels, amount=1):
+        """
+        Add to a series. Callers hold the registry lock.
+
+        Args:
+            labels (tuple): (name, value) pairs identifying the series.
+            amount (float): The increment.
+        """
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self):
+        """
+        Returns:
+            list: The lines of the metric in the Prometheus text format.
+        """
+        lines = [f'# HELP {self.name} {self.description}',
+                 f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{_labels(labels)} '
+                         f'{_format_value(value)}')
+        return lines
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels) + '}'
+
+
+class RequestTimer:
+    """
+    Time and statement counts accumulated by one request.
+
+    Attributes:
+        started (float): perf_counter() at the start of the request.
+        phases (dict): Seconds spent in each of PHASES.
+        statements (int): SQL statements executed.
+        status (int): Response status, once known.
+    """
+
+    __slots__ = ('started', 'phases', 'statements', 'status')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.statements = 0
+        self.status = None
+
+
+class Metrics:
+    """
+    The request metrics of one process.
+    """
+
+    def __init__(self):
+        self.requests = Counter(
+            'http_requests_total', 'Requests by route and status.')
+        self.latency = Histogram(
+            'http_request_duration_seconds',
+            'Request latency by route.', LATENCY_BUCKETS)
+        self.phases = Histogram(
+            'http_request_phase_seconds',
+            'Time spent per request in auth, the database and JSON '
+            'serialization.', LATENCY_BUCKETS)
+        self.statements = Histogram(
+            'http_request_sql_statements',
+            'SQL statements executed per request.', STATEMENT_BUCKETS)
+        self._lock = threading.Lock()
+
+    def record(self, method, route, timer):
+        """
+        Record a finished request.
+
+        Args:
+            method (str): HTTP method.
+            route (str): URL rule of the matched route.
+            timer (RequestTimer): What the request accumulated.
+        """
+        duration = time.perf_counter() - timer.started
+        labels = (('method', method), ('route', route))
+        with self._lock:
+            self.requests.inc(labels + (('status', str(timer.status)),))
+            self.latency.observe(labels, duration)
+            for name, seconds in timer.phases.items():
+                self.phases.observe(labels + (('phase', name),), seconds)
+            self.statements.observe(labels, timer.statements)
+
+    def render(self):
+        """
+        Returns:
+            str: Every metric in the Prometheus text format.
+        """
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.phases,
+                           self.statements):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Return the process-wide metrics, creating them on first use.
+
+    Returns:
+        Metrics: The shared metrics.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def set_metrics(metrics):
+    """
+    Replace the process-wide metrics.
+
+    Args:
+        metrics (Metrics): The metrics to use, or None to start afresh on
+                           next use.
+    """
+    global _metrics
+    with _metrics_lock:
+        _metrics = metrics
+
+
+def _current_timer():
+    if not has_app_context():
+        return None
+    return g.get('request_timer')
+
+
+@contextmanager
+def phase(name):
+    """
+    Add the time spent in a block to a phase of the current request.
+
+    Database time inside the block is left out, since it is counted in
+    the 'db' phase already. Outside instrumented requests this does
+    nothing.
+
+    Args:
+        name (str): 'auth' or 'serialization'.
+    """
+    timer = _current_timer()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    db_before = timer.phases['db']
+    try:
+        yield
+    finally:
+        timer.phases[name] += time.perf_counter() - started - \
+            (timer.phases['db'] - db_before)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if context is not None and _current_timer() is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    started = getattr(context, 'metrics_started', None)
+    timer = _current_timer()
+    if started is not None and timer is not None:
+        timer.phases['db'] += time.perf_counter() - started
+        timer.statements += 1
+
+
+def setup_metrics(app):
+    """
+    Instrument the requests of an application when METRICS_ENABLED is set.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        Flask: The application.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return app
+    # Engine-wide listeners, shared by every app; adding them again for a
+    # second app would count each statement twice
+    if not event.contains(Engine, 'before_cursor_execute',
+                          _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_timer():
+        g.request_timer = RequestTimer()
+
+    @app.after_request
+    def record_status(response):
+        timer = g.get('request_timer')
+        if timer is not None:
+            timer.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(error):
+        # Runs once streamed responses have been sent, so their whole
+        # duration and every query they made are included
+        timer = g.pop('request_timer', None)
+        if timer is None:
+            return
+        if timer.status is None:
+            timer.status = 500
+        rule = request.url_rule
+        get_metrics().record(request.method,
+                             rule.rule if rule is not None else 'unmatched',
+                             timer)
+
+    return app
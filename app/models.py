@@ -1,5 +1,7 @@
 # This file contains All models used in the application
 
+from sqlalchemy import DDL, event
+
 from app.database_helper import GetAppBoundDBContext
 
 # Get the SQLAlchemy database context bound to the Flask application
@@ -21,6 +23,9 @@ class Movie(db.Model):
         actors (relationship): Relationship with the Actor model representing the actors in the movie.
     """
 
+    # Serves the release date filters and sort of GET /movies
+    __table_args__ = (db.Index('ix_movie_release_date', 'release_date'),)
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(128), nullable=False)
     release_date = db.Column(db.Date, nullable=False)
@@ -60,6 +65,10 @@ class Actor(db.Model):
         gender (str): The gender of the actor.
     """
 
+    # Serve the gender and age filters and sort=age of GET /actors
+    __table_args__ = (db.Index('ix_actor_gender_age', 'gender', 'age'),
+                      db.Index('ix_actor_age', 'age'))
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), nullable=False)
     age = db.Column(db.Integer, nullable=False)
@@ -83,10 +92,36 @@ class Actor(db.Model):
         }
 
 
+# Search indexes on PostgreSQL: a btree on the lower-cased text in byte
+# order serves prefix matches in rank order, and a pg_trgm GiST index serves
+# fuzzy matches ordered by word similarity
+event.listen(db.metadata, 'before_create', DDL(
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql'))
+db.Index('ix_actor_name_prefix',
+         db.func.lower(Actor.name).collate('C')).ddl_if(dialect='postgresql')
+db.Index('ix_actor_name_trgm',
+         db.func.lower(Actor.name).label('name_lower'),
+         postgresql_using='gist',
+         postgresql_ops={'name_lower': 'gist_trgm_ops'}).ddl_if(
+             dialect='postgresql')
+db.Index('ix_movie_title_prefix',
+         db.func.lower(Movie.title).collate('C')).ddl_if(dialect='postgresql')
+db.Index('ix_movie_title_trgm',
+         db.func.lower(Movie.title).label('title_lower'),
+         postgresql_using='gist',
+         postgresql_ops={'title_lower': 'gist_trgm_ops'}).ddl_if(
+             dialect='postgresql')
+
+
 # Association table for many-to-many relationship between movies and actors
 movie_actors = db.Table('movie_actors',
                         db.Column('movie_id', db.Integer, db.ForeignKey(
                             'movie.id'), primary_key=True),
                         db.Column('actor_id', db.Integer, db.ForeignKey(
-                            'actor.id'), primary_key=True)
+                            'actor.id'), primary_key=True),
+                        # The primary key leads with movie_id; this index
+                        # serves lookups of the movies of an actor
+                        db.Index('ix_movie_actors_actor_id_movie_id',
+                                 'actor_id', 'movie_id')
                         )
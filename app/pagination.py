@@ -0,0 +1,203 @@
+# This file contains the helpers used by list endpoints for keyset
+# (cursor) pagination
+
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import Date, Integer, tuple_
+
+# Parsed pagination arguments: page size, the id to continue after and,
+# for pages sorted by another column, that column's value in the same row
+PageRequest = namedtuple('PageRequest', ['limit', 'after', 'key'],
+                         defaults=(None,))
+
+
+class PaginationError(ValueError):
+    """
+    Exception raised for malformed pagination query parameters.
+    """
+
+
+def encode_cursor(position):
+    """
+    Encode a position in an ordered listing as an opaque cursor.
+
+    Args:
+        position (dict): JSON-serialisable description of the last row seen.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): Cursor string taken from the `after` query parameter.
+
+    Raises:
+        PaginationError: If the cursor cannot be decoded.
+
+    Returns:
+        dict: The position the cursor points at.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error):
+        raise PaginationError('Invalid cursor')
+    if not isinstance(position, dict):
+        raise PaginationError('Invalid cursor')
+    return position
+
+
+def _load_key(column, value):
+    """
+    Convert a sort value read from a cursor back to the column's type.
+
+    Raises:
+        PaginationError: If the value does not fit the column.
+    """
+    if isinstance(column.type, Integer):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif isinstance(column.type, Date):
+        if isinstance(value, str):
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                pass
+    elif isinstance(value, str):
+        return value
+    raise PaginationError('Invalid cursor')
+
+
+def _dump_key(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def parse_page_args(args, sort=None):
+    """
+    Read `limit`, `after` and `paginate` from the request query string.
+
+    Pagination is on by default; `paginate=false` restores the original
+    behavior of returning every row.
+
+    Args:
+        args (MultiDict): The request query parameters.
+        sort (Sort): The order of the listing, or None for ascending id.
+                     A cursor is only accepted for the order it was
+                     issued for.
+
+    Raises:
+        PaginationError: If `limit` or `after` are invalid.
+
+    Returns:
+        PageRequest: The requested page, or None when pagination is disabled.
+    """
+    if args.get('paginate', 'true').lower() in ('false', '0', 'no'):
+        return None
+
+    max_limit = current_app.config.get('PAGE_SIZE_MAX', 500)
+    limit = args.get('limit', current_app.config.get('PAGE_SIZE_DEFAULT', 50))
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1 or limit > max_limit:
+        raise PaginationError(f'limit must be between 1 and {max_limit}')
+
+    after = args.get('after')
+    if not after:
+        return PageRequest(limit, None)
+    position = decode_cursor(after)
+    after = position.get('id')
+    if not isinstance(after, int):
+        raise PaginationError('Invalid cursor')
+    if position.get('sort') != (sort.name if sort else None):
+        raise PaginationError('Cursor does not match sort')
+    if sort is None:
+        return PageRequest(limit, after)
+    return PageRequest(limit, after, _load_key(sort.column,
+                                               position.get('key')))
+
+
+def order_by_sort(query, id_column, sort=None):
+    """
+    Order a query by the requested sort, breaking ties by id.
+
+    Args:
+        query (Query): The query to order.
+        id_column (Column): The id column of the listed table.
+        sort (Sort): The requested order, or None for ascending id.
+
+    Returns:
+        Query: The ordered query.
+    """
+    if sort is None:
+        return query.order_by(id_column)
+    columns = [id_column] if sort.column is id_column \
+        else [sort.column, id_column]
+    if sort.descending:
+        columns = [column.desc() for column in columns]
+    return query.order_by(*columns)
+
+
+def keyset_page(query, id_column, page, sort=None):
+    """
+    Fetch one page of a query ordered by its id column or a sort column.
+
+    Rows are selected with `id > after ORDER BY id LIMIT n`, which walks the
+    primary key index, so every page costs the same regardless of its depth.
+    When sorted by another column the seek becomes
+    `(column, id) > (key, after)` and the index on that column is walked
+    instead; descending sorts use `<`.
+
+    Args:
+        query (Query): Query returning entities or rows with an `id`.
+        id_column (Column): The id column to order and filter on.
+        page (PageRequest): The requested page.
+        sort (Sort): The requested order, or None for ascending id.
+
+    Returns:
+        tuple: The rows of the page and the cursor for the next page, which
+               is None on the last page.
+    """
+    column = None
+    if sort is not None and sort.column is not id_column:
+        column = sort.column
+        # The sort value of the last row is needed for the next cursor
+        query = query.add_columns(column)
+    descending = sort is not None and sort.descending
+
+    if page.after is not None:
+        if column is None:
+            position, after = id_column, page.after
+        else:
+            position = tuple_(column, id_column)
+            after = tuple_(page.key, page.after)
+        query = query.filter(
+            position < after if descending else position > after)
+    rows = order_by_sort(query, id_column, sort) \
+        .limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        cursor = {'id': rows[-1].id}
+        if sort is not None:
+            cursor['sort'] = sort.name
+            cursor['key'] = _dump_key(
+                rows[-1].id if column is None else rows[-1][-1])
+        next_cursor = encode_cursor(cursor)
+    else:
+        next_cursor = None
+    if column is not None:
+        rows = [row[:-1] for row in rows]
+    return rows, next_cursor
@@ -0,0 +1,230 @@
+# This file contains the SQL diagnostics hooked into the engines created
+# by BindDBToApp. Statements slower than SLOW_QUERY_MS are always written
+# to the slow-query log as JSON lines. On request, the profiler records
+# every statement of a request with its parameters, duration and query
+# plan and returns them in a `_debug` block of the JSON response.
+
+import json
+import logging
+import sys
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, \
+    request
+from sqlalchemy import event
+
+# Request header asking for a SQL profile of the request
+PROFILE_HEADER = 'X-SQL-Profile'
+
+# Permission a caller needs for the header to take effect
+PROFILE_PERMISSION = 'debug:sql'
+
+# EXPLAIN prefix per dialect; SQLite's plain EXPLAIN lists VM opcodes
+EXPLAIN_PREFIXES = {'sqlite': 'EXPLAIN QUERY PLAN '}
+
+slow_query_log = logging.getLogger('casting.slow_queries')
+
+
+class SqlProfile:
+    """
+    Statements executed by one profiled request.
+
+    Attributes:
+        statements (list): (engine, statement, parameters, seconds, many)
+                           tuples in execution order.
+        explaining (bool): Set while plans are fetched, so that the EXPLAIN
+                           statements are not recorded themselves.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.explaining = False
+
+    def add(self, engine, statement, parameters, seconds, many):
+        """
+        Record one statement.
+
+        Args:
+            engine (Engine): Engine the statement ran on.
+            statement (str): SQL sent to the driver.
+            parameters: Driver parameters of the statement.
+            seconds (float): Execution time.
+            many (bool): Whether it was an executemany() call.
+        """
+        if not self.explaining:
+            self.statements.append(
+                (engine, statement, parameters, seconds, many))
+
+    @staticmethod
+    def explain(engine, statement, parameters):
+        """
+        Fetch the query plan of a SELECT statement.
+
+        Args:
+            engine (Engine): Engine the statement ran on.
+            statement (str): SQL sent to the driver.
+            parameters: Driver parameters of the statement.
+
+        Returns:
+            list: The lines of the plan, or None for other statements.
+        """
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        prefix = EXPLAIN_PREFIXES.get(engine.dialect.name, 'EXPLAIN ')
+        with engine.connect() as connection:
+            rows = connection.exec_driver_sql(prefix + statement,
+                                              parameters).all()
+        return [str(row[-1]) for row in rows]
+
+    def report(self):
+        """
+        Returns:
+            dict: `count`, `total_ms` and one entry per statement with
+                  its `statement`, `parameters`, `duration_ms` and `plan`.
+        """
+        entries = []
+        self.explaining = True
+        try:
+            for engine, statement, parameters, seconds, many in \
+                    self.statements:
+                entry = {'statement': statement,
+                         'parameters': _plain(parameters),
+                         'duration_ms': round(seconds * 1000, 3)}
+                if not many:
+                    try:
+                        entry['plan'] = self.explain(
+                            engine, statement, parameters)
+                    except Exception as e:
+                        entry['plan'] = None
+                        entry['plan_error'] = str(e)
+                entries.append(entry)
+        finally:
+            self.explaining = False
+        return {'count': len(entries),
+                'total_ms': round(sum(entry['duration_ms']
+                                      for entry in entries), 3),
+                'statements': entries}
+
+
+def _plain(parameters):
+    if isinstance(parameters, dict):
+        return {key: _plain(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_plain(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (str, int, float, bool)):
+        return parameters
+    return str(parameters)
+
+
+def authorize_sql_profile(payload):
+    """
+    Profile the current request if the caller asked for it and may.
+
+    Called by requires_auth once the token has been verified. The header
+    is ignored for callers without the debug:sql permission.
+
+    Args:
+        payload (dict): The decoded JWT payload.
+    """
+    if not request.headers.get(PROFILE_HEADER) or \
+            g.get('sql_profile') is not None:
+        return
+    granted = getattr(payload, 'permission_set', None) or \
+        payload.get('permissions', ())
+    if PROFILE_PERMISSION in granted:
+        g.sql_profile = SqlProfile()
+
+
+def _log_slow_query(engine, statement, parameters, seconds, threshold_ms,
+                    with_parameters):
+    record = {'event': 'slow_query',
+              'time': round(time.time(), 3),
+              'duration_ms': round(seconds * 1000, 3),
+              'threshold_ms': threshold_ms,
+              'database': engine.url.database,
+              'statement': statement}
+    if with_parameters:
+        record['parameters'] = _plain(parameters)
+    if has_request_context():
+        record['method'] = request.method
+        record['path'] = request.path
+    slow_query_log.warning(json.dumps(record, default=str))
+
+
+def _configure_log(path):
+    if slow_query_log.handlers:
+        return
+    handler = logging.FileHandler(path) if path else \
+        logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    slow_query_log.addHandler(handler)
+    slow_query_log.setLevel(logging.INFO)
+    slow_query_log.propagate = False
+
+
+def install_sql_diagnostics(app, db):
+    """
+    Hook the slow-query log and the profiler into an app's engines.
+
+    Args:
+        app (Flask): The Flask application instance.
+        db (SQLAlchemy): The database object bound to the application.
+
+    Returns:
+        Flask: The application.
+    """
+    threshold_ms = app.config.get('SLOW_QUERY_MS', 200)
+    with_parameters = app.config.get('SLOW_QUERY_LOG_PARAMETERS', False)
+    if threshold_ms is not None and threshold_ms >= 0:
+        _configure_log(app.config.get('SLOW_QUERY_LOG_FILE'))
+    else:
+        threshold_ms = None
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+        if context is not None:
+            context.profile_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context,
+                             executemany):
+        started = getattr(context, 'profile_started', None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        if threshold_ms is not None and seconds * 1000 >= threshold_ms:
+            _log_slow_query(conn.engine, statement, parameters, seconds,
+                            threshold_ms, with_parameters)
+        profile = g.get('sql_profile') if has_app_context() else None
+        if profile is not None:
+            profile.add(conn.engine, statement, parameters, seconds,
+                        executemany)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute',
+                         before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute',
+                         after_cursor_execute)
+
+    @app.before_request
+    def profile_every_request():
+        if current_app.config.get('SQL_PROFILER_ENABLED'):
+            g.sql_profile = SqlProfile()
+
+    @app.after_request
+    def attach_sql_profile(response):
+        profile = g.pop('sql_profile', None)
+        if profile is None or response.is_streamed or \
+                response.mimetype != 'application/json':
+            return response
+        body = response.get_json(silent=True)
+        if not isinstance(body, dict):
+            return response
+        body['_debug'] = {'sql': profile.report()}
+        response.set_data(current_app.json.dumps(body) + '\n')
+        # The body no longer matches the ETag of the plain response
+        response.headers.pop('ETag', None)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    return app
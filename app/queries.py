@@ -0,0 +1,197 @@
+# This file contains the column-level queries used by the list endpoints.
+# Selecting columns instead of entities skips ORM hydration and the
+# identity map, and casts are only loaded when they are asked for.
+
+from sqlalchemy import Date, Integer, String, select
+
+from app.json_provider import RowEncoder
+from app.metrics import phase
+from app.models import Actor, Movie, movie_actors, db
+
+# Selectable columns of each resource, in their default output order
+ACTOR_COLUMNS = {
+    'id': Actor.id,
+    'name': Actor.name,
+    'age': Actor.age,
+    'gender': Actor.gender,
+}
+MOVIE_COLUMNS = {
+    'id': Movie.id,
+    'title': Movie.title,
+    'release_date': Movie.release_date,
+}
+
+# Fields a client may request with `fields=`
+ACTOR_FIELDS = tuple(ACTOR_COLUMNS)
+MOVIE_FIELDS = tuple(MOVIE_COLUMNS) + ('actors',)
+
+
+class FieldsError(ValueError):
+    """
+    Exception raised for an invalid `fields` query parameter.
+    """
+
+
+def parse_fields(value, allowed):
+    """
+    Parse a comma-separated `fields` parameter against a whitelist.
+
+    Args:
+        value (str): The raw parameter, or None for every field.
+        allowed (tuple): Field names the resource exposes.
+
+    Raises:
+        FieldsError: If a field is unknown or the list is empty.
+
+    Returns:
+        list: Requested field names, without duplicates, in request order.
+    """
+    if value is None:
+        return list(allowed)
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if name not in allowed:
+            raise FieldsError(
+                f'Unknown field "{name}", expected any of ' +
+                ', '.join(allowed))
+        if name not in fields:
+            fields.append(name)
+    return fields
+
+
+def _selected_names(columns, fields):
+    return ['id'] + [name for name in fields
+                     if name != 'id' and name in columns]
+
+
+def select_columns(columns, fields):
+    """
+    Build a column-only query for the requested fields.
+
+    The id column is always selected first because pagination cursors and
+    cast lookups depend on it.
+
+    Args:
+        columns (dict): ACTOR_COLUMNS or MOVIE_COLUMNS.
+        fields (list): Parsed field names.
+
+    Returns:
+        Query: Query returning Row tuples.
+    """
+    return db.session.query(
+        *[columns[name] for name in _selected_names(columns, fields)])
+
+
+def filmography_query(actor_id, fields):
+    """
+    Build a column-only query for the movies of one actor.
+
+    Paginate it on `movie_actors.c.movie_id`: the (actor_id, movie_id)
+    index then serves both the filter and the ordering, and each movie is
+    fetched by primary key.
+
+    Args:
+        actor_id (int): Id of the actor.
+        fields (list): Parsed movie field names.
+
+    Returns:
+        Query: Query returning movie Row tuples.
+    """
+    return select_columns(MOVIE_COLUMNS, fields) \
+        .join(movie_actors, movie_actors.c.movie_id == Movie.id) \
+        .filter(movie_actors.c.actor_id == actor_id)
+
+
+def cast_names(movie_ids):
+    """
+    Load the cast names of several movies with a single query.
+
+    Args:
+        movie_ids (list): Ids of the movies.
+
+    Returns:
+        dict: Movie id mapped to the list of its actors' names.
+    """
+    casts = {movie_id: [] for movie_id in movie_ids}
+    if not casts:
+        return casts
+    rows = db.session.execute(
+        select(movie_actors.c.movie_id, Actor.name)
+        .join(Actor, Actor.id == movie_actors.c.actor_id)
+        .where(movie_actors.c.movie_id.in_(list(casts))))
+    for movie_id, name in rows:
+        casts[movie_id].append(name)
+    return casts
+
+
+def _column_kind(column):
+    if isinstance(column.type, Integer):
+        return 'int'
+    if isinstance(column.type, String):
+        return 'str'
+    if isinstance(column.type, Date):
+        return 'date'
+    return 'json'
+
+
+def _cast_of(row, casts):
+    return casts[row[0]]
+
+
+_row_encoders = {}
+
+
+def row_encoder(columns, fields):
+    """
+    Return the RowEncoder for rows produced by select_columns().
+
+    Encoders are built once per resource and field list and reused.
+    The `actors` field reads the cast from the `casts` dict passed as the
+    encode context.
+
+    Args:
+        columns (dict): ACTOR_COLUMNS or MOVIE_COLUMNS.
+        fields (list): Parsed field names.
+
+    Returns:
+        RowEncoder: The encoder for that row shape.
+    """
+    key = (id(columns), tuple(fields))
+    encoder = _row_encoders.get(key)
+    if encoder is None:
+        names = _selected_names(columns, fields)
+        sources, kinds = [], []
+        for name in fields:
+            if name == 'actors':
+                sources.append(_cast_of)
+                kinds.append('json')
+            else:
+                sources.append(names.index(name))
+                kinds.append(_column_kind(columns[name]))
+        encoder = _row_encoders.setdefault(
+            key, RowEncoder(fields, sources, kinds))
+    return encoder
+
+
+def encode_rows(columns, rows, fields):
+    """
+    Encode column rows as JSON objects holding only the requested fields.
+
+    Rows go straight through a cached RowEncoder, without intermediate
+    dicts. Dates are rendered like the models' format() methods, and
+    `actors` is filled with one cast query for the whole batch.
+
+    Args:
+        columns (dict): ACTOR_COLUMNS or MOVIE_COLUMNS.
+        rows (list): Rows returned by a select_columns query.
+        fields (list): Parsed field names.
+
+    Returns:
+        list: One encoded JSON object (str) per row.
+    """
+    encoder = row_encoder(columns, fields)
+    casts = cast_names([row[0] for row in rows]) if 'actors' in fields \
+        else None
+    with phase('serialization'):
+        return encoder.encode_many(rows, casts)
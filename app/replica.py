@@ -0,0 +1,169 @@
+# This file routes reads to an optional read replica. GET and HEAD
+# requests run their queries on the 'replica' bind while POST, PATCH, PUT
+# and DELETE requests stay on the primary. A client that has just written
+# is kept on the primary for REPLICA_STICKY_SECONDS, so it reads its own
+# writes even while the replica lags behind.
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+# Bind key of the replica engine in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+# Cookie carrying the end of the client's primary window, for clients that
+# reach another worker than the one that handled their write
+STICKY_COOKIE = 'primary_until'
+
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+def reads_from_replica():
+    """
+    Returns:
+        bool: Whether queries of the current request may use the replica.
+    """
+    return has_app_context() and g.get('read_replica', False) and \
+        not g.get('on_primary', 0)
+
+
+@contextmanager
+def on_primary():
+    """
+    Run the queries of a block on the primary, even in a GET request.
+
+    Used by in-process indexes that patch themselves incrementally: a
+    change read from a lagging replica would otherwise be kept until the
+    next rebuild.
+    """
+    if not has_app_context():
+        yield
+        return
+    g.on_primary = g.get('on_primary', 0) + 1
+    try:
+        yield
+    finally:
+        g.on_primary -= 1
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of replica-routed requests to the replica.
+
+    Flushes always go to the primary, as do sessions of applications
+    without a 'replica' bind.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and reads_from_replica():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind,
+                                **kwargs)
+
+
+class StickyClients:
+    """
+    Clients that wrote recently, with the time their window ends.
+
+    Attributes:
+        window (float): Seconds a client is kept on the primary.
+        maxsize (int): Number of clients above which expired ones are
+                       dropped.
+    """
+
+    def __init__(self, window=5, maxsize=10000):
+        self.window = window
+        self.maxsize = maxsize
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def stick(self, client):
+        """
+        Keep a client on the primary for the next `window` seconds.
+
+        Args:
+            client (str): Key of the client.
+
+        Returns:
+            float: The time.time() at which the window ends.
+        """
+        until = time.time() + self.window
+        with self._lock:
+            if len(self._until) >= self.maxsize:
+                now = time.time()
+                self._until = {key: end for key, end
+                               in self._until.items() if end > now}
+            self._until[client] = until
+        return until
+
+    def is_sticky(self, client):
+        """
+        Args:
+            client (str): Key of the client.
+
+        Returns:
+            bool: Whether the client wrote in the last `window` seconds.
+        """
+        return self._until.get(client, 0) > time.time()
+
+
+def client_key():
+    """
+    Returns:
+        str: A digest of the bearer token, or the remote address of
+             anonymous clients.
+    """
+    credentials = request.headers.get('Authorization') or \
+        request.remote_addr or ''
+    return hashlib.sha1(credentials.encode('utf-8')).hexdigest()
+
+
+def _cookie_sticky():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def setup_read_replica(app):
+    """
+    Route the reads of an application to its replica bind, if any.
+
+    Args:
+        app (Flask): The Flask application instance.
+
+    Returns:
+        Flask: The application.
+    """
+    sticky = StickyClients(app.config.get('REPLICA_STICKY_SECONDS', 5))
+    app.extensions['sticky_clients'] = sticky
+
+    def has_replica():
+        return REPLICA_BIND in (current_app.config.get('SQLALCHEMY_BINDS')
+                                or {})
+
+    @app.before_request
+    def route_reads():
+        # Assigned on every request: `g` outlives the request when an app
+        # context was already pushed, as in tests and CLI commands
+        g.read_replica = request.method in READ_METHODS and \
+            has_replica() and not _cookie_sticky() and \
+            not sticky.is_sticky(client_key())
+
+    @app.after_request
+    def stick_writers(response):
+        if request.method not in READ_METHODS and has_replica() and \
+                response.status_code < 400:
+            until = sticky.stick(client_key())
+            response.set_cookie(STICKY_COOKIE, f'{until:.3f}',
+                                max_age=int(sticky.window) + 1,
+                                httponly=True, samesite='Lax')
+        return response
+
+    return app
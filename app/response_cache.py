@@ -0,0 +1,330 @@
+# This file contains the server-side cache for read endpoints. Responses
+# are keyed by route, query arguments, the caller's permissions and the
+# versions of the tables they were built from, so a write makes every
+# dependent entry unreachable at once. The in-process backend also drops
+# those entries as soon as the version is bumped.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from os import environ as env
+
+from flask import current_app, g
+
+from app.replica import reads_from_replica
+from app.versioning import on_bump, request_key, response_is_stale, \
+    version_tag
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# A cached response body and the seconds it took to build it
+CacheEntry = namedtuple('CacheEntry', ['body', 'mimetype', 'cost'])
+
+
+class LocalCacheBackend:
+    """
+    Size-bounded in-process backend with a TTL.
+
+    The least recently used entry is evicted when more than `maxsize` are
+    held, and entries older than `ttl` seconds are treated as misses.
+
+    Attributes:
+        maxsize (int): Maximum number of entries; 0 disables caching.
+        ttl (float): Seconds an entry is served.
+    """
+
+    def __init__(self, maxsize=256, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        _, _, tables = self._entries.pop(key)
+        for table in tables:
+            keys = self._tables.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def get(self, key):
+        """
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            CacheEntry: The entry, or None if missing or expired.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at, _ = item
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, tables):
+        """
+        Args:
+            key (str): The cache key.
+            entry (CacheEntry): The response to cache.
+            tables (tuple): Tables the response was built from.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (entry, time.monotonic() + self.ttl, tables)
+            for table in tables:
+                self._tables.setdefault(table, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, table):
+        """
+        Drop every entry built from a table.
+
+        Args:
+            table (str): The changed table.
+        """
+        with self._lock:
+            for key in list(self._tables.pop(table, ())):
+                if key in self._entries:
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tables.clear()
+
+
+class SharedCacheBackend:
+    """
+    Backend storing entries in Redis, shared by every worker.
+
+    Keys embed the table versions, so entries made stale by a write are
+    never read again and simply expire after `ttl` seconds. Share the table
+    versions too (VERSION_STORE_URL) when several workers use this backend.
+
+    Attributes:
+        client: A Redis client, or any object with `get` and `set`.
+        ttl (int): Seconds an entry is kept.
+        prefix (str): Prefix of the entry keys.
+    """
+
+    def __init__(self, client, ttl=30, prefix='casting:response:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        cost, mimetype, body = value.split(b'\n', 2)
+        return CacheEntry(body, mimetype.decode('utf-8'), float(cost))
+
+    def set(self, key, entry, tables):
+        value = b'%f\n%s\n%s' % (
+            entry.cost, entry.mimetype.encode('utf-8'), entry.body)
+        self.client.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+
+    def invalidate(self, table):
+        pass
+
+    def clear(self):
+        pass
+
+
+class ResponseCache:
+    """
+    Response cache with hit ratio and latency-saved counters.
+
+    Attributes:
+        backend: LocalCacheBackend or SharedCacheBackend.
+        max_item_size (int): Largest body in bytes that is cached.
+        hits (int): Requests answered from the cache.
+        misses (int): Requests that ran the view.
+        saved (float): Seconds saved by hits, i.e. the time the cached
+                       responses took to build minus the time to serve them.
+    """
+
+    def __init__(self, backend, max_item_size=1 << 20):
+        self.backend = backend
+        self.max_item_size = max_item_size
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tables, scope):
+        """
+        Args:
+            tables (tuple): Tables the response is built from.
+            scope (str): The caller's permissions.
+
+        Returns:
+            str: The cache key of the current request.
+        """
+        text = '|'.join((request_key(), scope, version_tag(tables)))
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def record_hit(self, saved):
+        with self._lock:
+            self.hits += 1
+            self.saved += max(saved, 0.0)
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def stats(self):
+        """
+        Snapshot of the cache counters.
+
+        Returns:
+            dict: Hits, misses, hit_ratio, latency_saved_ms and, for the
+                  in-process backend, size and maxsize.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': type(self.backend).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'latency_saved_ms': round(self.saved * 1000, 3),
+            }
+        if isinstance(self.backend, LocalCacheBackend):
+            stats['size'] = len(self.backend)
+            stats['maxsize'] = self.backend.maxsize
+        return stats
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the process-wide response cache, creating it on first use.
+
+    The cache is configured from the environment:
+        RESPONSE_CACHE_SIZE: Maximum in-process entries, 0 disables
+                             (default 256).
+        RESPONSE_CACHE_TTL: Seconds an entry is served (default 30).
+        RESPONSE_CACHE_URL: Redis URL of a shared backend, used instead of
+                            the in-process one when the redis package is
+                            installed.
+
+    Returns:
+        ResponseCache: The shared response cache.
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                ttl = float(env.get('RESPONSE_CACHE_TTL', 30))
+                url = env.get('RESPONSE_CACHE_URL')
+                if url and redis is not None:
+                    backend = SharedCacheBackend(
+                        redis.Redis.from_url(url), ttl=ttl)
+                else:
+                    backend = LocalCacheBackend(
+                        maxsize=int(env.get('RESPONSE_CACHE_SIZE', 256)),
+                        ttl=ttl)
+                _response_cache = ResponseCache(backend)
+    return _response_cache
+
+
+def set_response_cache(cache):
+    """
+    Replace the process-wide response cache.
+
+    Args:
+        cache (ResponseCache): The cache to use, or None to rebuild it from
+                               the environment on next use.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = cache
+
+
+@on_bump
+def _invalidate(table, ids):
+    cache = _response_cache
+    if cache is not None:
+        cache.backend.invalidate(table)
+
+
+def _scope(payload):
+    permissions = getattr(payload, 'permission_set', None)
+    if permissions is None:
+        permissions = payload.get('permissions', ())
+    return ','.join(sorted(permissions))
+
+
+def cached(*tables):
+    """
+    Decorator serving successful responses from the response cache.
+
+    Apply it below requires_auth, whose payload provides the caller's
+    permission scope. Responses carry an X-Cache header of HIT or MISS.
+
+    Requests routed to the read replica bypass the cache (X-Cache: BYPASS):
+    the key holds the primary's table versions, so a body read from a
+    lagging replica would be stored as current and later served to the
+    client that made the write. Responses marked stale are not stored
+    either.
+
+    Args:
+        *tables (str): Tables the response is built from.
+
+    Returns:
+        function: The decorator.
+    """
+    def cached_decorator(f):
+        @wraps(f)
+        def wrapper(payload, *args, **kwargs):
+            if reads_from_replica():
+                response = current_app.make_response(
+                    f(payload, *args, **kwargs))
+                response.headers['X-Cache'] = 'BYPASS'
+                return response
+            cache = get_response_cache()
+            started = time.perf_counter()
+            key = cache.key(tables, _scope(payload))
+            entry = cache.backend.get(key)
+            if entry is not None:
+                response = current_app.response_class(
+                    entry.body, mimetype=entry.mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                cache.record_hit(entry.cost - (time.perf_counter() - started))
+                return response
+            g.stale_response = False
+            response = current_app.make_response(f(payload, *args, **kwargs))
+            cache.record_miss()
+            if response.status_code == 200 and not response.is_streamed \
+                    and not response_is_stale():
+                body = response.get_data()
+                if len(body) <= cache.max_item_size:
+                    cache.backend.set(key, CacheEntry(
+                        body, response.mimetype,
+                        time.perf_counter() - started), tables)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return cached_decorator
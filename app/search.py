@@ -0,0 +1,431 @@
+# This file contains the type-ahead search behind /actors/search and
+# /movies/search. On PostgreSQL names are matched by prefix on a
+# lower(name) COLLATE "C" index and then fuzzily with pg_trgm's GiST
+# index. Other databases use an in-process prefix index, kept up to date
+# from the table versions bumped on every commit, with a small trigram
+# index of its own standing in for pg_trgm: the rows sharing the most
+# uncommon trigrams with the query are ranked by edit distance.
+
+import bisect
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.models import Actor, Movie, db
+from app.replica import on_primary
+from app.versioning import VersionWatch, on_bump
+
+# Longest accepted search string
+QUERY_MAX_LENGTH = 128
+
+# Shortest query matched with typos by the prefix index
+FUZZY_MIN_LENGTH = 4
+
+# Leading characters of each word indexed by trigram
+FUZZY_WORD_PREFIX = 12
+
+# Trigrams held by more rows than this are too common to select candidates
+FUZZY_MAX_POSTINGS = 20000
+
+# Postings read per query, rarest trigrams first, and the number of rows
+# among them whose edit distance is computed
+FUZZY_POSTINGS_BUDGET = 50000
+FUZZY_CANDIDATES = 32
+
+
+class SearchError(ValueError):
+    """
+    Exception raised for invalid search query parameters.
+    """
+
+
+def parse_search_args(args):
+    """
+    Read `q` and `limit` from the request query string.
+
+    Args:
+        args (MultiDict): The request query parameters.
+
+    Raises:
+        SearchError: If `q` is missing or too long, or `limit` is invalid.
+
+    Returns:
+        tuple: The stripped search string and the number of results.
+    """
+    query = ' '.join(args.get('q', '').split())
+    if not query:
+        raise SearchError('q is required')
+    if len(query) > QUERY_MAX_LENGTH:
+        raise SearchError(
+            f'q must be at most {QUERY_MAX_LENGTH} characters long')
+    max_limit = current_app.config.get('SEARCH_LIMIT_MAX', 50)
+    limit = args.get('limit', current_app.config.get('SEARCH_LIMIT_DEFAULT',
+                                                     10))
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise SearchError('limit must be an integer')
+    if limit < 1 or limit > max_limit:
+        raise SearchError(f'limit must be between 1 and {max_limit}')
+    return query, limit
+
+
+class PrefixIndex:
+    """
+    In-process prefix index over one text column.
+
+    Lower-cased texts are kept in a sorted list searched with bisect, and
+    every word after the first is indexed too so that 'hath' finds
+    'Anne Hathaway'. The trigrams of the beginning of every word map to
+    the ids holding them, for typos. Rows changed by a commit are only
+    marked; they are reloaded with one query before the next search.
+    Changes made by other processes are noticed from the table's version
+    and reload the whole index.
+
+    The trigram lists are only appended to: the ids of changed rows stay
+    in the lists of their old trigrams, and are dropped when their edit
+    distance is checked against the current text. Once a tenth of the rows
+    have changed since the last build, the index is rebuilt.
+
+    Attributes:
+        id_column (Column): The primary key column.
+        text_column (Column): The column searched.
+    """
+
+    def __init__(self, id_column, text_column):
+        self.id_column = id_column
+        self.text_column = text_column
+        self._texts = {}
+        self._names = []
+        self._words = []
+        self._grams = {}
+        self._changed = 0
+        self._stale = True
+        self._dirty = set()
+        self._watch = VersionWatch(id_column.table.name)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def mark(self, ids):
+        """
+        Record that rows changed.
+
+        Args:
+            ids (list): Primary keys of the changed rows, or None when
+                        unknown, in which case the index is rebuilt.
+        """
+        self._watch.seen()
+        with self._lock:
+            if ids is None:
+                self._stale = True
+            else:
+                self._dirty.update(ids)
+
+    @staticmethod
+    def _keys(text):
+        words = text.lower().split()
+        return ' '.join(words), words[1:]
+
+    def _index_grams(self, item_id, grams):
+        index = self._grams
+        for gram in grams:
+            postings = index.get(gram)
+            if postings is None:
+                postings = index[gram] = array('i')
+            postings.append(item_id)
+
+    def _add(self, item_id, text, old_text=None):
+        name, words = self._keys(text)
+        self._texts[item_id] = text
+        bisect.insort(self._names, (name, item_id))
+        for word in words:
+            bisect.insort(self._words, (word, item_id))
+        grams = _trigrams(name)
+        if old_text is not None:
+            grams -= _trigrams(self._keys(old_text)[0])
+        self._index_grams(item_id, grams)
+
+    def _remove(self, item_id):
+        text = self._texts.pop(item_id, None)
+        if text is None:
+            return None
+        self._changed += 1
+        name, words = self._keys(text)
+        for entries, key in [(self._names, name)] + \
+                [(self._words, word) for word in words]:
+            position = bisect.bisect_left(entries, (key, item_id))
+            if position < len(entries) and entries[position] == \
+                    (key, item_id):
+                del entries[position]
+        return text
+
+    def _rebuild(self):
+        self._texts, self._names, self._words = {}, [], []
+        self._grams, self._changed = {}, 0
+        self._stale = False
+        self._dirty.clear()
+        for item_id, text in db.session.execute(
+                select(self.id_column, self.text_column)):
+            name, words = self._keys(text)
+            self._texts[item_id] = text
+            self._names.append((name, item_id))
+            self._words.extend((word, item_id) for word in words)
+            for word in name.split():
+                self._index_grams(item_id, _word_trigrams(word))
+        self._names.sort()
+        self._words.sort()
+
+    def refresh(self):
+        """
+        Load the rows changed since the last search.
+        """
+        with self._lock, on_primary():
+            if self._watch.changed_elsewhere():
+                self._stale = True
+            if self._changed > max(1000, len(self._texts) // 10):
+                self._stale = True
+            if self._stale:
+                self._rebuild()
+                return
+            if self._dirty:
+                ids = sorted(self._dirty)
+                self._dirty.clear()
+                old_texts = {item_id: self._remove(item_id)
+                             for item_id in ids}
+                for item_id, text in db.session.execute(
+                        select(self.id_column, self.text_column)
+                        .where(self.id_column.in_(ids))):
+                    self._add(item_id, text, old_texts.get(item_id))
+
+    @staticmethod
+    def _scan(entries, prefix, limit, seen, results):
+        position = bisect.bisect_left(entries, (prefix,))
+        while len(results) < limit and position < len(entries):
+            key, item_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            if item_id not in seen:
+                seen.add(item_id)
+                results.append(item_id)
+            position += 1
+
+    def _candidates(self, query, seen):
+        """
+        Ids sharing the most uncommon trigrams with the query, with their
+        texts. Called with the lock held.
+        """
+        postings = sorted(
+            (len(ids), gram, ids) for gram, ids in
+            ((gram, self._grams.get(gram)) for gram in _trigrams(query))
+            if ids is not None and len(ids) <= FUZZY_MAX_POSTINGS)
+        counts, budget = Counter(), FUZZY_POSTINGS_BUDGET
+        for size, _, ids in postings:
+            if size > budget:
+                break
+            counts.update(ids)
+            budget -= size
+        texts = self._texts
+        candidates = []
+        for item_id, _ in counts.most_common(
+                FUZZY_CANDIDATES + len(seen)):
+            if item_id not in seen and item_id in texts:
+                candidates.append((item_id, texts[item_id]))
+                if len(candidates) == FUZZY_CANDIDATES:
+                    break
+        return candidates
+
+    def _fuzzy(self, candidates, query):
+        # Candidates ranked by the edit distance between the query and the
+        # closest beginning of their text or of one of its words, so that
+        # 'intersteller' still finds 'interstellar'
+        bound = min(2, len(query) // FUZZY_MIN_LENGTH)
+        # A single word is too short to match a query of several words
+        several = ' ' in query
+        matches = []
+        for item_id, text in candidates:
+            name, words = self._keys(text)
+            distance = min(_prefix_distance(query, key, bound)
+                           for key in [name] + ([] if several else words))
+            if distance <= bound:
+                matches.append((distance, name, item_id, text))
+        matches.sort()
+        return [(item_id, text) for _, _, item_id, text in matches]
+
+    def search(self, query, limit):
+        """
+        Find the rows whose text, or one of its later words, starts with
+        the query, or nearly does.
+
+        Whole-text matches come first, in alphabetical order, followed by
+        word matches and then by texts and words whose beginning is at
+        most two edits away from the query. Only a few rows sharing
+        uncommon trigrams with the query are scored, outside the lock.
+
+        Args:
+            query (str): The search string.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: (id, text) tuples in rank order.
+        """
+        self.refresh()
+        prefix = ' '.join(query.lower().split())
+        seen, results = set(), []
+        candidates = []
+        with self._lock:
+            self._scan(self._names, prefix, limit, seen, results)
+            if ' ' not in prefix:
+                self._scan(self._words, prefix, limit, seen, results)
+            results = [(item_id, self._texts[item_id])
+                       for item_id in results]
+            if len(results) < limit and len(prefix) >= FUZZY_MIN_LENGTH:
+                candidates = self._candidates(prefix, seen)
+        if candidates:
+            results += self._fuzzy(candidates, prefix)[:limit - len(results)]
+        return results
+
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word):
+    """
+    Trigrams of the beginning of a word, padded like pg_trgm's.
+
+    Args:
+        word (str): A lower-cased word.
+
+    Returns:
+        tuple: The distinct trigrams.
+    """
+    padded = '  ' + word[:FUZZY_WORD_PREFIX]
+    if len(word) <= FUZZY_WORD_PREFIX:
+        padded += ' '
+    return tuple({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def _trigrams(text):
+    """
+    Args:
+        text (str): A lower-cased text.
+
+    Returns:
+        set: The trigrams of all its words.
+    """
+    grams = set()
+    for word in text.split():
+        grams.update(_word_trigrams(word))
+    return grams
+
+
+def _prefix_distance(query, text, bound):
+    """
+    Edit distance between a query and the closest beginning of a text.
+
+    Args:
+        query (str): The search string.
+        text (str): The indexed text.
+        bound (int): Largest distance of interest.
+
+    Returns:
+        int: The distance, or bound + 1 when it is larger than bound.
+    """
+    text = text[:len(query) + bound]
+    beyond = bound + 1
+    # Only the cells at most `bound` off the diagonal can stay within bound
+    previous = [min(column, beyond) for column in range(len(text) + 1)]
+    for row, char in enumerate(query, 1):
+        current = [row if row <= bound else beyond] + \
+            [beyond] * len(text)
+        best = current[0]
+        for column in range(max(1, row - bound),
+                            min(len(text), row + bound) + 1):
+            value = min(previous[column] + 1, current[column - 1] + 1,
+                        previous[column - 1] + (char != text[column - 1]))
+            current[column] = value
+            if value < best:
+                best = value
+        if best > bound:
+            return beyond
+        previous = current
+    return min(min(previous), beyond)
+
+
+# Fallback indexes of the searchable tables
+_prefix_indexes = {
+    'actor': PrefixIndex(Actor.id, Actor.name),
+    'movie': PrefixIndex(Movie.id, Movie.title),
+}
+
+
+@on_bump
+def _mark_changed(table, ids):
+    index = _prefix_indexes.get(table)
+    if index is not None:
+        index.mark(ids)
+
+
+def _like_prefix(query):
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%') \
+        .replace('_', '\\_')
+    return escaped + '%'
+
+
+def _postgresql_search(id_column, text_column, query, limit):
+    """
+    Rank prefix matches first, then fuzzy matches by word similarity.
+
+    Both steps are LIMITed index scans: the prefix step walks the
+    lower(text) COLLATE "C" btree in order, and the fuzzy step is a
+    nearest-neighbour search on the gist_trgm_ops index, so a word in the
+    middle of the text or a misspelling still matches.
+    """
+    lowered = func.lower(text_column)
+    query = query.lower()
+    prefix = lowered.collate('C').like(_like_prefix(query), escape='\\')
+    results = db.session.execute(
+        select(id_column, text_column).where(prefix)
+        .order_by(lowered.collate('C'), id_column).limit(limit)).all()
+    if len(results) < limit:
+        results += db.session.execute(
+            select(id_column, text_column)
+            .where(lowered.op('%>')(query), ~prefix)
+            .order_by(lowered.op('<->>')(query), id_column)
+            .limit(limit - len(results))).all()
+    return [tuple(row) for row in results]
+
+
+def _search(table, id_column, text_column, query, limit):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return _postgresql_search(id_column, text_column, query, limit)
+    return _prefix_indexes[table].search(query, limit)
+
+
+def search_actors(query, limit):
+    """
+    Args:
+        query (str): Beginning, or a misspelling, of an actor's name.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list: {'id', 'name'} dicts, best matches first.
+    """
+    return [{'id': actor_id, 'name': name} for actor_id, name
+            in _search('actor', Actor.id, Actor.name, query, limit)]
+
+
+def search_movies(query, limit):
+    """
+    Args:
+        query (str): Beginning, or a misspelling, of a movie title.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list: {'id', 'title'} dicts, best matches first.
+    """
+    return [{'id': movie_id, 'title': title} for movie_id, title
+            in _search('movie', Movie.id, Movie.title, query, limit)]
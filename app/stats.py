@@ -0,0 +1,186 @@
+# This file contains the aggregate statistics behind /stats/actors and
+# /stats/movies. Every figure is a GROUP BY or COUNT computed by the
+# database, and results are kept per process until a write bumps the
+# version of a table they were computed from.
+
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import Integer, cast, extract, func, literal_column, select
+
+from app.models import Actor, Movie, movie_actors, db
+from app.versioning import version_tag
+
+# Tables each statistic is computed from
+ACTOR_STATS_TABLES = ('actor',)
+MOVIE_STATS_TABLES = ('movie', 'movie_actors')
+
+
+class StatsError(ValueError):
+    """
+    Exception raised for invalid statistics query parameters.
+    """
+
+
+def parse_age_bucket(args):
+    """
+    Read the width of the age histogram buckets from `age_bucket`.
+
+    Args:
+        args (MultiDict): The request query parameters.
+
+    Raises:
+        StatsError: If `age_bucket` is not an integer from 1 to 100.
+
+    Returns:
+        int: The bucket width in years.
+    """
+    value = args.get('age_bucket', 10)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise StatsError('age_bucket must be an integer')
+    if value < 1 or value > 100:
+        raise StatsError('age_bucket must be between 1 and 100')
+    return value
+
+
+class StatsCache:
+    """
+    Computed statistics, valid while their tables keep the same version.
+
+    Attributes:
+        ttl (float): Seconds a result is served at most, which bounds
+                     staleness after changes made outside the API; 0
+                     disables the cache.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, tables, compute):
+        """
+        Return a cached result, computing it if missing or outdated.
+
+        Args:
+            key (tuple): Name and parameters of the statistic.
+            tables (tuple): Tables the statistic is computed from.
+            compute (function): Called without arguments to compute it.
+
+        Returns:
+            The result of `compute`.
+        """
+        if self.ttl <= 0:
+            return compute()
+        tag = version_tag(tables)
+        cached = self._results.get(key)
+        if cached is not None and cached[0] == tag and \
+                cached[1] > time.monotonic():
+            return cached[2]
+        result = compute()
+        with self._lock:
+            self._results[key] = (tag, time.monotonic() + self.ttl, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+_stats_cache = None
+_stats_cache_lock = threading.Lock()
+
+
+def get_stats_cache():
+    """
+    Return the process-wide statistics cache, creating it on first use
+    with the STATS_CACHE_TTL setting.
+
+    Returns:
+        StatsCache: The shared cache.
+    """
+    global _stats_cache
+    if _stats_cache is None:
+        with _stats_cache_lock:
+            if _stats_cache is None:
+                _stats_cache = StatsCache(
+                    current_app.config.get('STATS_CACHE_TTL', 300))
+    return _stats_cache
+
+
+def set_stats_cache(cache):
+    """
+    Replace the process-wide statistics cache.
+
+    Args:
+        cache (StatsCache): The cache to use, or None to create one from
+                            the configuration on next use.
+    """
+    global _stats_cache
+    with _stats_cache_lock:
+        _stats_cache = cache
+
+
+def _actor_stats(age_bucket):
+    by_gender = dict(db.session.execute(
+        select(Actor.gender, func.count())
+        .group_by(Actor.gender).order_by(Actor.gender)).all())
+    # A literal keeps the bucket expression identical in SELECT and
+    # GROUP BY; age_bucket has been validated as a small integer
+    width = literal_column(str(int(age_bucket)), Integer)
+    bucket = (Actor.age // width) * width
+    histogram = db.session.execute(
+        select(bucket, func.count()).group_by(bucket).order_by(bucket))
+    return {
+        'total': sum(by_gender.values()),
+        'by_gender': by_gender,
+        'age_histogram': [
+            {'from': start, 'to': start + age_bucket - 1, 'count': count}
+            for start, count in histogram],
+    }
+
+
+def _movie_stats():
+    year = cast(extract('year', Movie.release_date), Integer)
+    by_year = db.session.execute(
+        select(year, func.count()).group_by(year).order_by(year)).all()
+    total = sum(count for _, count in by_year)
+    links = db.session.scalar(select(func.count()).select_from(movie_actors))
+    return {
+        'total': total,
+        'by_year': [{'year': movie_year, 'count': count}
+                    for movie_year, count in by_year],
+        'cast_links': links,
+        'average_cast_size': round(links / total, 2) if total else 0.0,
+    }
+
+
+def actor_stats(age_bucket=10):
+    """
+    Count actors by gender and by age bucket.
+
+    Args:
+        age_bucket (int): Width of the age buckets in years.
+
+    Returns:
+        dict: `total`, `by_gender` and `age_histogram`, whose entries give
+              the first and last age of each non-empty bucket and its count.
+    """
+    return get_stats_cache().get_or_compute(
+        ('actors', age_bucket), ACTOR_STATS_TABLES,
+        lambda: _actor_stats(age_bucket))
+
+
+def movie_stats():
+    """
+    Count movies per release year and measure the average cast size.
+
+    Returns:
+        dict: `total`, `by_year`, `cast_links` (the number of actor-movie
+              links) and `average_cast_size` over every movie.
+    """
+    return get_stats_cache().get_or_compute(
+        ('movies',), MOVIE_STATS_TABLES, _movie_stats)
@@ -0,0 +1,430 @@
+# This file keeps a change version per table. Every commit that modifies
+# a table bumps its version, and GET endpoints derive strong ETags from
+# them so that unchanged data can be revalidated with 304 Not Modified
+# without running a query.
+
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+from itertools import chain
+from os import environ as env
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event, inspect
+
+from app.replica import reads_from_replica
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class LocalVersionStore:
+    """
+    Version counters held in process memory.
+
+    Counters start at zero in every process, so each store carries a random
+    epoch that is part of every tag. Tags issued before a restart, or by
+    another worker, therefore never match.
+
+    Writes handled by other workers do not move these counters, so a tag
+    issued here would stay valid after them. The epoch therefore also
+    changes every `ttl` seconds, which bounds how long such stale tags,
+    and the cache entries keyed by them, are honoured.
+
+    Attributes:
+        ttl (float): Seconds a tag stays valid without a local change, 0
+                     for no limit (a single process).
+    """
+
+    def __init__(self, ttl=0):
+        self.ttl = ttl
+        self._id = uuid.uuid4().hex[:8]
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def epoch(self):
+        """
+        Returns:
+            str: Random identifier of this store and, with a ttl, of the
+                 current period.
+        """
+        if not self.ttl:
+            return self._id
+        return f'{self._id}-{int(time.time() // self.ttl)}'
+
+    def get(self, tables):
+        """
+        Args:
+            tables (tuple): Table names.
+
+        Returns:
+            list: The current version of each table.
+        """
+        versions = self._versions
+        return [versions.get(table, 0) for table in tables]
+
+    def incr(self, table):
+        """
+        Args:
+            table (str): Table name.
+
+        Returns:
+            int: The new version of the table.
+        """
+        with self._lock:
+            version = self._versions.get(table, 0) + 1
+            self._versions[table] = version
+            return version
+
+
+class SharedVersionStore:
+    """
+    Version counters kept in Redis, shared by every worker and host.
+
+    Attributes:
+        epoch (str): Constant, counters survive restarts.
+        client: A Redis client, or any object with `incr` and `mget`.
+        prefix (str): Prefix of the counter keys.
+    """
+
+    epoch = 'shared'
+
+    def __init__(self, client, prefix='casting:version:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, tables):
+        values = self.client.mget([self.prefix + table for table in tables])
+        return [int(value or 0) for value in values]
+
+    def incr(self, table):
+        return int(self.client.incr(self.prefix + table))
+
+
+_version_store = None
+_version_store_lock = threading.Lock()
+_listeners = []
+
+
+def get_version_store():
+    """
+    Return the process-wide version store, creating it on first use.
+
+    When VERSION_STORE_URL is set and the redis package is installed the
+    counters are shared through Redis; otherwise they are kept in process
+    and their tags expire after LOCAL_VERSION_TTL seconds (default 30,
+    0 for never), since writes handled by other workers go unnoticed.
+
+    Returns:
+        LocalVersionStore or SharedVersionStore: The version store.
+    """
+    global _version_store
+    if _version_store is None:
+        with _version_store_lock:
+            if _version_store is None:
+                url = env.get('VERSION_STORE_URL')
+                if url and redis is not None:
+                    _version_store = SharedVersionStore(
+                        redis.Redis.from_url(url))
+                else:
+                    _version_store = LocalVersionStore(
+                        ttl=float(env.get('LOCAL_VERSION_TTL', 30)))
+    return _version_store
+
+
+def set_version_store(store):
+    """
+    Replace the process-wide version store.
+
+    Args:
+        store: The store to use, or None to rebuild it from the environment
+               on next use.
+    """
+    global _version_store
+    with _version_store_lock:
+        _version_store = store
+
+
+class VersionWatch:
+    """
+    Notices changes of a table that this process was not told about.
+
+    In-process caches learn about changes from their on_bump listener,
+    which calls `seen()`. Writes made by other workers or hosts only show
+    in the version store, so `changed_elsewhere()` compares the table's
+    version with the one it read last plus the bumps seen since. They are
+    only seen with a shared store (VERSION_STORE_URL).
+
+    Attributes:
+        table (str): Name of the watched table.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._version = None
+        self._bumps = 0
+        self._lock = threading.Lock()
+
+    def seen(self):
+        """
+        Count a bump of the table made by this process.
+        """
+        with self._lock:
+            self._bumps += 1
+
+    def changed_elsewhere(self):
+        """
+        The epoch is ignored: a local store renews it on a timer, which
+        says nothing about the data.
+
+        Returns:
+            bool: Whether the table changed other than through the bumps
+                  seen since the last call. False on the first call.
+        """
+        current = get_version_store().get((self.table,))[0]
+        with self._lock:
+            last, bumps = self._version, self._bumps
+            self._version, self._bumps = current, 0
+        return last is not None and last + bumps != current
+
+
+def on_bump(listener):
+    """
+    Register a function called after a table version is bumped.
+
+    Can be used as a decorator.
+
+    Args:
+        listener (function): Called as `listener(table, ids)`.
+
+    Returns:
+        function: The listener.
+    """
+    _listeners.append(listener)
+    return listener
+
+
+def bump(table, ids=None):
+    """
+    Record that a table changed. Commits through the tracked session call
+    this automatically; call it directly after changing data otherwise.
+
+    Args:
+        table (str): Name of the changed table.
+        ids (list): Primary keys of the changed rows, or None if unknown.
+
+    Returns:
+        int: The new version of the table.
+    """
+    version = get_version_store().incr(table)
+    for listener in list(_listeners):
+        listener(table, ids)
+    return version
+
+
+def _changes(session):
+    return session.info.setdefault('changed_tables', {})
+
+
+def _record(changes, table, key):
+    ids = changes.get(table, set())
+    if ids is not None:
+        if key is None:
+            ids = None
+        else:
+            ids.add(key)
+    changes[table] = ids
+
+
+def _link_keys(relationship, mapper, identity, history, deleted):
+    # Association rows are keyed by their first key column (the movie id of
+    # movie_actors): the object's own key when that column references it,
+    # else the keys of the linked and unlinked objects
+    column = relationship.secondary.primary_key.columns[0]
+    if any(key.column.table is mapper.local_table
+           for key in column.foreign_keys):
+        return identity if len(identity) == 1 else [None]
+    others = chain(history.added, history.deleted,
+                   history.unchanged if deleted else ())
+    keys = []
+    for other in others:
+        other_identity = inspect(other).identity
+        keys.append(other_identity[0] if other_identity and
+                    len(other_identity) == 1 else None)
+    return keys
+
+
+def _after_flush(session, flush_context):
+    changes = _changes(session)
+    deleted = session.deleted
+    for obj in chain(session.new, session.dirty, deleted):
+        if obj not in deleted and not session.is_modified(obj):
+            continue
+        mapper = inspect(obj).mapper
+        identity = mapper.primary_key_from_instance(obj)
+        _record(changes, mapper.local_table.name,
+                identity[0] if len(identity) == 1 else None)
+        state = inspect(obj)
+        for relationship in mapper.relationships:
+            if relationship.secondary is None:
+                continue
+            history = state.attrs[relationship.key].history
+            if obj in deleted or history.added or history.deleted:
+                for key in _link_keys(relationship, mapper, identity,
+                                      history, obj in deleted):
+                    _record(changes, relationship.secondary.name, key)
+
+
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or
+            orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is None:
+        return
+    changes = _changes(orm_execute_state.session)
+    ids = orm_execute_state.execution_options.get('changed_ids')
+    if ids is None:
+        _record(changes, table.name, None)
+    else:
+        for key in ids:
+            _record(changes, table.name, key)
+
+
+def record_changes(session, table, ids):
+    """
+    Record rows changed by a statement whose keys were only known after it
+    ran, such as an INSERT ... RETURNING executed with `changed_ids=()`.
+
+    Args:
+        session (Session): The session running the transaction.
+        table (str): Name of the changed table.
+        ids (list): Primary keys of the changed rows.
+    """
+    changes = _changes(session)
+    for key in ids:
+        _record(changes, table, key)
+
+
+def _after_commit(session):
+    changes = session.info.pop('changed_tables', None)
+    for table, ids in (changes or {}).items():
+        bump(table, ids=sorted(ids) if ids is not None else None)
+
+
+def _after_rollback(session):
+    session.info.pop('changed_tables', None)
+
+
+def track_changes(db):
+    """
+    Bump table versions whenever a commit of `db.session` changes them.
+
+    Flushed objects are recorded with their primary keys, many-to-many
+    collection changes as a change of the association table, and bulk
+    INSERT, UPDATE and DELETE statements as a change of their whole table,
+    unless they are executed with a `changed_ids` execution option listing
+    the keys they change (see record_changes for keys generated by the
+    statement itself). Changes of movie_actors are keyed by movie id.
+    Versions are bumped once the transaction commits; rolled back changes
+    are forgotten.
+
+    Args:
+        db (SQLAlchemy): The SQLAlchemy database object.
+    """
+    event.listen(db.session, 'after_flush', _after_flush)
+    event.listen(db.session, 'do_orm_execute', _do_orm_execute)
+    event.listen(db.session, 'after_commit', _after_commit)
+    event.listen(db.session, 'after_rollback', _after_rollback)
+
+
+def version_tag(tables):
+    """
+    Args:
+        tables (tuple): Table names.
+
+    Returns:
+        str: A tag that changes whenever any of the tables changes.
+    """
+    store = get_version_store()
+    return store.epoch + '.' + '.'.join(map(str, store.get(tables)))
+
+
+def request_key():
+    """
+    Returns:
+        str: The request path and its query arguments in sorted order, so
+             that equivalent URLs give the same key.
+    """
+    args = '&'.join(f'{key}={value}' for key, value
+                    in sorted(request.args.items(multi=True)))
+    return f'{request.path}?{args}'
+
+
+def mark_response_stale():
+    """
+    Keep the current response out of the response cache and without ETag.
+
+    Called by in-process indexes that answer from data older than the
+    current table versions while they are rebuilt: tagged with those
+    versions, the response would be served until the next write.
+    """
+    if has_app_context():
+        g.stale_response = True
+
+
+def response_is_stale():
+    """
+    Returns:
+        bool: Whether mark_response_stale() was called for the response.
+    """
+    return has_app_context() and g.get('stale_response', False)
+
+
+def _request_etag(tables):
+    digest = hashlib.sha1(request_key().encode('utf-8')).hexdigest()[:16]
+    return f'{version_tag(tables)}-{digest}'
+
+
+def conditional(*tables):
+    """
+    Decorator adding a strong ETag to successful GET responses.
+
+    The ETag combines the versions of `tables` with the request path and
+    query arguments. A request whose If-None-Match matches gets an empty
+    304 response without the view being called. Apply it below
+    requires_auth so permissions are still checked.
+
+    Responses read from the replica get no ETag, since the replica may not
+    hold the data of the versions yet, nor do those marked stale.
+
+    Args:
+        *tables (str): Tables the response is built from.
+
+    Returns:
+        function: The decorator.
+    """
+    def conditional_decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if reads_from_replica():
+                return f(*args, **kwargs)
+            etag = _request_etag(tables)
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                g.stale_response = False
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response_is_stale():
+                    return response
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return conditional_decorator
@@ -0,0 +1,49 @@
+# Entry point of the asynchronous serving mode. gevent replaces blocking
+# sockets, locks and threads with cooperative versions, and psycopg2 waits
+# for the database through the gevent hub, so one worker serves many
+# concurrent requests while each waits on Postgres or on the JWKS
+# download. The routes are unchanged: every request still runs the same
+# synchronous view, in its own greenlet.
+#
+# Usage (requires the gevent package):
+#     gunicorn -k gevent --worker-connections 1000 async_app:app
+#
+# Everything must be patched before the application is imported, so this
+# module stays outside the `app` package.
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import psycopg2  # noqa: E402
+from gevent.socket import wait_read, wait_write  # noqa: E402
+from psycopg2 import extensions  # noqa: E402
+
+
+def gevent_wait_callback(connection, timeout=None):
+    """
+    Wait for a psycopg2 connection by yielding to other greenlets.
+
+    Args:
+        connection: The psycopg2 connection being polled.
+        timeout (float): Seconds to wait for the socket, None for no limit.
+
+    Raises:
+        psycopg2.OperationalError: If polling returns an unknown state.
+    """
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(
+                f'Bad result from poll: {state!r}')
+
+
+extensions.set_wait_callback(gevent_wait_callback)
+
+from app import app  # noqa: E402,F401
@@ -0,0 +1,508 @@
+"""Load-test every route of the REST API and save the results as JSON.
+
+The database is seeded with --actors actors and --movies movies. Casts have
+a long-tailed size around --cast-size, and a few actors appear in many more
+movies than the rest (--skew). Tokens are signed with a locally generated
+RSA key and verified against a JWKS file, so no Auth0 access is needed.
+
+Each route is then driven in turn by --concurrency clients, first the
+reads, then the writes and last the deletes, which take their ids from a
+range the other scenarios never touch. A scenario sends --requests requests
+after --warmup unmeasured ones; the exports send a fiftieth of that, since
+each one streams a whole table, and the bulk deletes a tenth, so that
+they do not use up the tables. Requests per second, p50, p95 and p99
+latency and the number of failed requests (status 400 or above) are
+printed per scenario and saved to --output, together with the commit and
+the options, so that runs can be compared across commits with --compare.
+
+By default the clients are threads calling the WSGI app of this process,
+which measures one worker. --gunicorn serves the app from gunicorn.conf.py
+instead (GUNICORN_* variables apply) and sends real HTTP requests. The
+response cache is disabled unless --response-cache is given. Pass
+--database-uri to measure PostgreSQL instead of SQLite (its tables are
+dropped and re-seeded).
+
+Usage:
+    python -m benchmarks.bench_api [--actors 10000] [--concurrency 16]
+    python -m benchmarks.bench_api --actors 1000000 --gunicorn --workers 4
+    python -m benchmarks.bench_api --compare benchmarks/results/<file>.json
+"""
+import argparse
+import functools
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+
+from benchmarks import common
+
+# How much of --requests a scenario sends, when not all of it
+EXPORT_SHARE = 0.02
+BULK_DELETE_SHARE = 0.1
+
+Scenario = namedtuple('Scenario', 'name method rule make share deletes')
+
+
+def scenario(name, method, rule, make, share=1.0, deletes=None):
+    """
+    Build a Scenario.
+
+    Args:
+        name (str): Name in the results.
+        method (str): HTTP method.
+        rule (str): URL rule of the route it drives.
+        make (function): make(workload, rng) returns the path and JSON body
+                         of a request.
+        share (float): Fraction of --requests and --warmup it sends.
+        deletes (str): 'actor' or 'movie' when each request deletes ids of
+                       that table, one or --bulk-size of them.
+    """
+    return Scenario(name, method, rule, make, share, deletes)
+
+
+def request_counts(item, args):
+    """Return the warm-up and measured request counts of a scenario."""
+    warmup = max(1, round(args.warmup * item.share)) if args.warmup else 0
+    return warmup, max(1, round(args.requests * item.share))
+
+
+def reserved_ids(selected, args):
+    """Return how many ids of each table the delete scenarios use up."""
+    reserved = {'actor': 0, 'movie': 0}
+    for item in selected:
+        if item.deletes:
+            per_request = args.bulk_size if item.rule.endswith('/bulk') \
+                else 1
+            reserved[item.deletes] += sum(request_counts(item, args)) * \
+                per_request
+    return reserved
+
+
+class Workload:
+    """
+    The ids the scenarios may use.
+
+    Reads and updates use the ids 1..readable of each table. The ids above
+    are handed out once each, highest first, to the delete scenarios.
+    """
+
+    def __init__(self, actors, movies, reserved, cast_size, bulk_size):
+        self.actors = actors - reserved['actor']
+        self.movies = movies - reserved['movie']
+        self.cast_size = cast_size
+        self.bulk_size = bulk_size
+        self._deletable = {'actor': itertools.count(actors, -1),
+                           'movie': itertools.count(movies, -1)}
+        self._lock = threading.Lock()
+
+    def actor(self, rng):
+        return rng.randint(1, self.actors)
+
+    def movie(self, rng):
+        return rng.randint(1, self.movies)
+
+    def actor_sample(self, rng, count):
+        return sorted(rng.sample(range(1, self.actors + 1), count))
+
+    def movie_sample(self, rng, count):
+        return sorted(rng.sample(range(1, self.movies + 1), count))
+
+    def take(self, table, count):
+        """Return `count` ids of `table` that no request has used yet."""
+        with self._lock:
+            return [next(self._deletable[table]) for _ in range(count)]
+
+
+def actor_body(rng):
+    """Return the JSON body of a new actor."""
+    return {'name': f'{rng.choice(common.FIRST_NAMES)} '
+                    f'{rng.choice(common.LAST_NAMES)} bench',
+            'age': rng.randint(18, 90),
+            'gender': rng.choice(('Female', 'Male'))}
+
+
+def movie_body(rng):
+    """Return the JSON body of a new movie."""
+    released = date(1950, 1, 1) + timedelta(days=rng.randint(0, 27000))
+    return {'title': f'Bench Movie {rng.randint(0, 10 ** 6)}',
+            'release_date': released.isoformat()}
+
+
+def scenarios():
+    """Return every scenario in the order they are run."""
+    return [
+        scenario('home', 'GET', '/', lambda w, rng: ('/', None)),
+        scenario('login results', 'GET', '/login-results',
+                 lambda w, rng: ('/login-results', None)),
+        scenario('cache metrics', 'GET', '/metrics/cache',
+                 lambda w, rng: ('/metrics/cache', None)),
+        scenario('metrics', 'GET', '/metrics',
+                 lambda w, rng: ('/metrics', None)),
+        scenario('database health', 'GET', '/health/db',
+                 lambda w, rng: ('/health/db', None)),
+        scenario('list actors', 'GET', '/actors',
+                 lambda w, rng: ('/actors?limit=50', None)),
+        scenario('filter actors', 'GET', '/actors', lambda w, rng: (
+            f'/actors?gender=Female&age_min={rng.randint(18, 60)}'
+            f'&sort=-age&limit=50', None)),
+        scenario('list movies', 'GET', '/movies',
+                 lambda w, rng: ('/movies?limit=50', None)),
+        scenario('search actors', 'GET', '/actors/search', lambda w, rng: (
+            f'/actors/search?q={rng.choice(common.FIRST_NAMES)[:3]}', None)),
+        scenario('search movies', 'GET', '/movies/search', lambda w, rng: (
+            f'/movies/search?q=Movie+{rng.randint(1, 999)}', None)),
+        scenario('actor movies', 'GET', '/actors/<int:actor_id>/movies',
+                 lambda w, rng: (f'/actors/{w.actor(rng)}/movies', None)),
+        scenario('actor costars', 'GET', '/actors/<int:actor_id>/costars',
+                 lambda w, rng: (f'/actors/{w.actor(rng)}/costars', None)),
+        scenario('actor path', 'GET',
+                 '/actors/<int:actor_id>/path/<int:other_id>',
+                 lambda w, rng: (f'/actors/{w.actor(rng)}/path/'
+                                 f'{w.actor(rng)}', None)),
+        scenario('actor stats', 'GET', '/stats/actors',
+                 lambda w, rng: ('/stats/actors', None)),
+        scenario('movie stats', 'GET', '/stats/movies',
+                 lambda w, rng: ('/stats/movies', None)),
+        scenario('export actors', 'GET', '/actors/export',
+                 lambda w, rng: ('/actors/export', None), EXPORT_SHARE),
+        scenario('export movies', 'GET', '/movies/export',
+                 lambda w, rng: ('/movies/export', None), EXPORT_SHARE),
+        scenario('create actor', 'POST', '/actors',
+                 lambda w, rng: ('/actors', actor_body(rng))),
+        scenario('create movie', 'POST', '/movies',
+                 lambda w, rng: ('/movies', movie_body(rng))),
+        scenario('update actor', 'PATCH', '/actors/<int:actor_id>',
+                 lambda w, rng: (f'/actors/{w.actor(rng)}',
+                                 {'age': rng.randint(18, 90)})),
+        scenario('update movie', 'PATCH', '/movies/<int:movie_id>',
+                 lambda w, rng: (f'/movies/{w.movie(rng)}',
+                                 {'title': movie_body(rng)['title']})),
+        scenario('bulk create actors', 'POST', '/actors/bulk',
+                 lambda w, rng: ('/actors/bulk', {'actors': [
+                     actor_body(rng) for _ in range(w.bulk_size)]})),
+        scenario('bulk update actors', 'PATCH', '/actors/bulk',
+                 lambda w, rng: ('/actors/bulk', {'actors': [
+                     {'id': actor_id, 'age': rng.randint(18, 90)}
+                     for actor_id in w.actor_sample(rng, w.bulk_size)]})),
+        scenario('bulk create movies', 'POST', '/movies/bulk',
+                 lambda w, rng: ('/movies/bulk', {'movies': [
+                     movie_body(rng) for _ in range(w.bulk_size)]})),
+        scenario('bulk update movies', 'PATCH', '/movies/bulk',
+                 lambda w, rng: ('/movies/bulk', {'movies': [
+                     dict(movie_body(rng), id=movie_id)
+                     for movie_id in w.movie_sample(rng, w.bulk_size)]})),
+        scenario('replace cast', 'PUT', '/movies/<int:movie_id>/actors',
+                 lambda w, rng: (f'/movies/{w.movie(rng)}/actors', {
+                     'actors': w.actor_sample(rng, w.cast_size)})),
+        scenario('add to cast', 'POST', '/movies/<int:movie_id>/actors',
+                 lambda w, rng: (f'/movies/{w.movie(rng)}/actors', {
+                     'actors': [w.actor(rng)]})),
+        scenario('remove from cast', 'DELETE',
+                 '/movies/<int:movie_id>/actors',
+                 lambda w, rng: (f'/movies/{w.movie(rng)}/actors', {
+                     'actors': [w.actor(rng)]})),
+        scenario('bulk delete actors', 'DELETE', '/actors/bulk',
+                 lambda w, rng: ('/actors/bulk', {
+                     'ids': w.take('actor', w.bulk_size)}),
+                 BULK_DELETE_SHARE, deletes='actor'),
+        scenario('bulk delete movies', 'DELETE', '/movies/bulk',
+                 lambda w, rng: ('/movies/bulk', {
+                     'ids': w.take('movie', w.bulk_size)}),
+                 BULK_DELETE_SHARE, deletes='movie'),
+        scenario('delete actor', 'DELETE', '/actors/<int:actor_id>',
+                 lambda w, rng: (f'/actors/{w.take("actor", 1)[0]}', None),
+                 deletes='actor'),
+        scenario('delete movie', 'DELETE', '/movies/<int:movie_id>',
+                 lambda w, rng: (f'/movies/{w.take("movie", 1)[0]}', None),
+                 deletes='movie'),
+    ]
+
+
+def unbenchmarked_routes(app, selected):
+    """Return the (method, rule) pairs of the app no scenario covers."""
+    covered = {(item.method, item.rule) for item in selected}
+    routes = {(method, rule.rule) for rule in app.url_map.iter_rules()
+              if rule.endpoint != 'static'
+              for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    return sorted(routes - covered)
+
+
+class WSGIClient:
+    """Sends requests through the WSGI app of this process."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, headers, body):
+        response = self.client.open(path, method=method, headers=headers,
+                                    json=body)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class HTTPClient:
+    """Sends requests over one keep-alive connection to the server."""
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port,
+                                                     timeout=120)
+
+    def send(self, method, path, headers, body):
+        headers = dict(headers)
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, path, data, headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return None
+
+    def close(self):
+        self.connection.close()
+
+
+def run_scenario(item, workload, make_client, headers, args):
+    """Drive one scenario at the set concurrency and summarize it."""
+    warmup, requests = request_counts(item, args)
+    client = make_client()
+    rng = random.Random(args.seed)
+    for _ in range(warmup):
+        path, body = item.make(workload, rng)
+        client.send(item.method, path, headers, body)
+    client.close()
+
+    remaining = itertools.count(requests, -1)
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+
+    def worker(seed_value):
+        client = make_client()
+        rng = random.Random(seed_value)
+        own, own_statuses = [], Counter()
+        while next(remaining) > 0:
+            path, body = item.make(workload, rng)
+            started = time.perf_counter()
+            status = client.send(item.method, path, headers, body)
+            own.append((time.perf_counter() - started) * 1000)
+            own_statuses[status] += 1
+        client.close()
+        with lock:
+            latencies.extend(own)
+            statuses.update(own_statuses)
+
+    threads = [threading.Thread(target=worker, args=(args.seed + i + 1,))
+               for i in range(min(args.concurrency, requests))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'name': item.name, 'method': item.method, 'rule': item.rule,
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items()
+                      if status is None or status >= 400),
+        'statuses': {str(status): count
+                     for status, count in sorted(
+                         statuses.items(), key=lambda pair: str(pair[0]))},
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(common.percentile(latencies, 0.5), 3),
+        'p95_ms': round(common.percentile(latencies, 0.95), 3),
+        'p99_ms': round(common.percentile(latencies, 0.99), 3),
+        'max_ms': round(latencies[-1], 3),
+    }
+
+
+def git_commit():
+    """Return the checked-out commit, marked '-dirty' with local changes."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+        changes = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + '-dirty' if changes else commit
+
+
+def print_header():
+    """Print the column titles of the results."""
+    print(f'{"scenario":<22}{"req/s":>9}{"p50":>9}{"p95":>9}{"p99":>9}'
+          f'{"errors":>8}')
+
+
+def print_result(result):
+    """Print the line of one scenario."""
+    print(f'{result["name"]:<22}{result["rps"]:>9.0f}'
+          f'{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+          f'{result["p99_ms"]:>9.2f}{result["errors"]:>8}')
+
+
+def print_comparison(baseline, results):
+    """Print the change of each scenario against a saved run."""
+    previous = {result['name']: result for result in baseline['results']}
+    print(f'compared with {baseline.get("commit")} '
+          f'({baseline.get("timestamp")}), change in %')
+    print(f'{"scenario":<22}{"req/s":>9}{"p50":>9}{"p95":>9}{"p99":>9}')
+    for result in results:
+        before = previous.get(result['name'])
+        if before is None:
+            continue
+        changes = [
+            (result[key] - before[key]) * 100 / before[key]
+            if before[key] else 0.0
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms')]
+        print(f'{result["name"]:<22}' +
+              ''.join(f'{change:>+9.1f}' for change in changes))
+
+
+def start_gunicorn(args, headers_env):
+    """Serve the app from gunicorn.conf.py and return (process, port)."""
+    port = common.free_port()
+    environ = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}',
+                   **headers_env)
+    if args.workers:
+        environ['GUNICORN_WORKERS'] = str(args.workers)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         '--log-level', 'warning'], env=environ)
+    try:
+        common.wait_until_listening(port, process)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process, port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--actors', type=int, default=10000)
+    parser.add_argument('--movies', type=int)
+    parser.add_argument('--cast-size', type=int, default=8)
+    parser.add_argument('--skew', type=float, default=0.5)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--bulk-size', type=int, default=50)
+    parser.add_argument('--only', action='append', default=[],
+                        help='run the scenarios whose name contains this '
+                             'text; may be repeated')
+    parser.add_argument('--response-cache', action='store_true')
+    parser.add_argument('--gunicorn', action='store_true')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--database-uri')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    args = parser.parse_args()
+    if args.movies is None:
+        args.movies = args.actors
+
+    selected = [item for item in scenarios()
+                if not args.only or any(text in item.name
+                                        for text in args.only)]
+    # The deletes may use up at most half of each table
+    reserved = reserved_ids(selected, args)
+    if reserved['actor'] * 2 > args.actors or \
+            reserved['movie'] * 2 > args.movies:
+        parser.error(f'the delete scenarios need at least '
+                     f'{reserved["actor"] * 2} actors and '
+                     f'{reserved["movie"] * 2} movies; lower --requests '
+                     f'or --bulk-size')
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    if not args.response_cache:
+        os.environ['RESPONSE_CACHE_SIZE'] = '0'
+    if args.database_uri:
+        path = None
+        os.environ['DATABASE_URI'] = args.database_uri
+    else:
+        path = common.use_database()
+    started = time.perf_counter()
+    common.seed(actors=args.actors, movies=args.movies,
+                cast_size=args.cast_size, skew=args.skew,
+                seed_value=args.seed)
+    print(f'seeded {args.actors} actors and {args.movies} movies in '
+          f'{time.perf_counter() - started:.1f} s')
+    from app import app
+    from tests.local_auth import TEST_AUDIENCE, TEST_DOMAIN, LocalAuth
+
+    for method, rule in unbenchmarked_routes(app, scenarios()):
+        print(f'warning: no scenario for {method} {rule}')
+    workload = Workload(args.actors, args.movies, reserved, args.cast_size,
+                        args.bulk_size)
+    local_auth = LocalAuth()
+    headers = local_auth.headers()
+    process = None
+    try:
+        if args.gunicorn:
+            process, port = start_gunicorn(args, {
+                'AUTH0_DOMAIN': TEST_DOMAIN, 'AUTH0_AUDIENCE': TEST_AUDIENCE,
+                'AUTH0_JWKS_URL': local_auth.jwks_url})
+            make_client = functools.partial(HTTPClient, port)
+        else:
+            local_auth.install()
+            make_client = functools.partial(WSGIClient, app)
+        print(f'concurrency: {args.concurrency}, requests per scenario: '
+              f'{args.requests}, latency in ms')
+        print_header()
+        results = []
+        for item in selected:
+            results.append(run_scenario(item, workload, make_client,
+                                        headers, args))
+            print_result(results[-1])
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        else:
+            local_auth.uninstall()
+        if path is not None:
+            os.remove(path)
+
+    commit = git_commit()
+    run = {'commit': commit,
+           'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+           'python': platform.python_version(),
+           'platform': platform.platform(),
+           'options': vars(args),
+           'results': results}
+    output = args.output or os.path.join(
+        'benchmarks', 'results',
+        f'api-{commit or "unknown"}-{time.strftime("%Y%m%d-%H%M%S")}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f'saved {output}')
+    if baseline is not None:
+        print_comparison(baseline, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Compare sync and gevent gunicorn workers at 500 concurrent connections.
+
+The database is seeded with --rows actors, then gunicorn is started once
+with sync workers (app:app) and once with gevent workers (async_app:app).
+Each run keeps --connections connections busy with authenticated
+GET /actors/<id>/movies requests for --seconds seconds and prints requests
+per second, p50 and p99 latency and the number of failed requests. The
+response cache is disabled so that every request reaches the database.
+
+The gevent mode only helps while requests wait on I/O, so pass
+--database-uri to measure PostgreSQL; with the default SQLite file the
+database calls block the whole worker. Requires gunicorn and gevent.
+
+Usage:
+    python -m benchmarks.bench_async [--connections 500] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks import common
+
+
+async def fetch(port, request):
+    """Send one request on a new connection and return its status."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def load(port, token, rows, connections, seconds):
+    """Keep `connections` requests in flight and return the results."""
+    latencies, failures = [], [0]
+    deadline = time.monotonic() + seconds
+
+    async def client(seed_value):
+        rng = random.Random(seed_value)
+        while time.monotonic() < deadline:
+            request = (f'GET /actors/{rng.randint(1, rows)}/movies HTTP/1.1'
+                       f'\r\nHost: localhost\r\nAuthorization: Bearer '
+                       f'{token}\r\nConnection: close\r\n\r\n').encode()
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, request)
+            except OSError:
+                status = None
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                failures[0] += 1
+
+    await asyncio.gather(*(client(i) for i in range(connections)))
+    return sorted(latencies), failures[0]
+
+
+def run_mode(name, target, worker_options, args, environ, token):
+    """Serve the application with one worker model and load it."""
+    port = common.free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(args.workers), '--backlog', '2048',
+         '--log-level', 'warning'] + worker_options + [target],
+        env=environ)
+    try:
+        common.wait_until_listening(port, process)
+        latencies, failures = asyncio.run(load(
+            port, token, args.rows, args.connections, args.seconds))
+    finally:
+        process.terminate()
+        process.wait()
+    print(f'{name:<8}{len(latencies) / args.seconds:>10.0f}'
+          f'{common.percentile(latencies, 0.5):>10.1f}'
+          f'{common.percentile(latencies, 0.99):>10.1f}{failures:>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    if args.database_uri:
+        path = None
+        os.environ['DATABASE_URI'] = args.database_uri
+    else:
+        path = common.use_database()
+    common.seed(actors=args.rows, movies=args.rows, cast_size=3)
+    from tests.local_auth import TEST_AUDIENCE, TEST_DOMAIN, LocalAuth
+
+    local_auth = LocalAuth()
+    environ = dict(os.environ, RESPONSE_CACHE_SIZE='0',
+                   AUTH0_DOMAIN=TEST_DOMAIN, AUTH0_AUDIENCE=TEST_AUDIENCE,
+                   AUTH0_JWKS_URL=local_auth.jwks_url)
+    token = local_auth.token()
+    modes = [
+        ('sync', 'app:app', ['--worker-class', 'sync']),
+        ('gevent', 'async_app:app',
+         ['--worker-class', 'gevent', '--worker-connections', '1000']),
+    ]
+    print(f'connections: {args.connections}, workers: {args.workers}, '
+          f'latency in ms')
+    print(f'{"mode":<8}{"req/s":>10}{"p50":>10}{"p99":>10}{"failed":>10}')
+    try:
+        for name, target, worker_options in modes:
+            run_mode(name, target, worker_options, args, environ, token)
+    finally:
+        if path is not None:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark records per second of the bulk endpoints against the
+single-record endpoints.
+
+Each phase creates, updates and then deletes --records actors, once with
+one request per actor and once with requests of --batch actors. The
+database is a temporary SQLite file.
+
+Usage:
+    python -m benchmarks.bench_bulk [--records 5000] [--batch 1000]
+"""
+import argparse
+import os
+import time
+
+from benchmarks import common
+
+
+def timed(function):
+    """Run a function and return (result, seconds)."""
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def single(client, headers, records):
+    """Create, update and delete actors one request at a time."""
+    def create():
+        return [client.post('/actors', headers=headers, json={
+            'name': f'Actor {i}', 'age': 30, 'gender': 'Female'}
+        ).get_json()['actor_id'] for i in range(records)]
+
+    ids, create_seconds = timed(create)
+    _, update_seconds = timed(lambda: [
+        client.patch(f'/actors/{actor_id}', headers=headers,
+                     json={'age': 31}) for actor_id in ids])
+    _, delete_seconds = timed(lambda: [
+        client.delete(f'/actors/{actor_id}', headers=headers)
+        for actor_id in ids])
+    return create_seconds, update_seconds, delete_seconds
+
+
+def bulk(client, headers, records, batch):
+    """Create, update and delete actors in batches."""
+    def send(method, body):
+        response = client.open('/actors/bulk', method=method, json=body,
+                               headers=headers)
+        assert response.status_code == 200, response.get_json()
+        return [result['id'] for result in response.get_json()['results']]
+
+    def create():
+        ids = []
+        for start in range(0, records, batch):
+            ids += send('POST', {'actors': [
+                {'name': f'Actor {i}', 'age': 30, 'gender': 'Female'}
+                for i in range(start, min(start + batch, records))]})
+        return ids
+
+    ids, create_seconds = timed(create)
+    chunks = [ids[start:start + batch] for start in range(0, records, batch)]
+    _, update_seconds = timed(lambda: [
+        send('PATCH', {'actors': [{'id': actor_id, 'age': 31}
+                                  for actor_id in chunk]})
+        for chunk in chunks])
+    _, delete_seconds = timed(lambda: [
+        send('DELETE', {'ids': chunk}) for chunk in chunks])
+    return create_seconds, update_seconds, delete_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    path = common.use_database()
+    common.seed(actors=0, movies=0)
+    from app import app
+    from tests.local_auth import LocalAuth
+
+    local_auth = LocalAuth().install()
+    try:
+        client = app.test_client()
+        headers = local_auth.headers()
+        results = {
+            'single': single(client, headers, args.records),
+            f'bulk x{args.batch}': bulk(client, headers, args.records,
+                                        args.batch),
+        }
+    finally:
+        local_auth.uninstall()
+        os.remove(path)
+
+    print(f'records: {args.records}, records/sec')
+    print(f'{"mode":<14}{"create":>12}{"update":>12}{"delete":>12}')
+    for mode, seconds in results.items():
+        print(f'{mode:<14}' + ''.join(
+            f'{args.records / value:>12,.0f}' for value in seconds))
+
+
+if __name__ == '__main__':
+    main()
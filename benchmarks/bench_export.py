@@ -0,0 +1,77 @@
+"""Benchmark peak worker memory of the streaming export against the
+unpaginated list endpoint.
+
+Each mode runs in its own interpreter so that peak RSS is measured in
+isolation. The database is a SQLite file seeded with --rows actors.
+
+Usage:
+    python -m benchmarks.bench_export [--rows 1000000] [--db path]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import common
+
+MODES = {
+    'stream-ndjson': '/actors/export',
+    'stream-json': '/actors/export?format=json',
+    'list-all': '/actors?paginate=false',
+}
+
+
+def run_mode(path):
+    """Fetch one endpoint and print 'seconds bytes rss_before rss_after'."""
+    from app import app
+    from tests.local_auth import LocalAuth
+
+    local_auth = LocalAuth().install()
+    client = app.test_client()
+    headers = local_auth.headers(['view:actors'])
+    rss_before = common.peak_rss_mb()
+    started = time.perf_counter()
+    response = client.get(path, headers=headers, buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    elapsed = time.perf_counter() - started
+    print(elapsed, size, rss_before, common.peak_rss_mb())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--db', help='Reuse an already seeded database.')
+    parser.add_argument('--run-mode', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        common.use_database(args.db)
+        run_mode(MODES[args.run_mode])
+        return
+
+    path = common.use_database(args.db)
+    if not args.db:
+        print(f'seeding {args.rows} actors into {path} ...')
+        common.seed(actors=args.rows, movies=0)
+
+    print(f'{"mode":<15}{"seconds":>10}{"MiB out":>10}'
+          f'{"RSS base":>10}{"RSS peak":>10}{"growth":>10}')
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_export',
+             '--run-mode', mode, '--db', path],
+            check=True, capture_output=True, text=True).stdout
+        elapsed, size, before, after = map(float, output.split()[-4:])
+        print(f'{mode:<15}{elapsed:>10.2f}{size / 2**20:>10.1f}'
+              f'{before:>10.1f}{after:>10.1f}{after - before:>10.1f}')
+
+    if not args.db:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
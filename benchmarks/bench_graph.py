@@ -0,0 +1,133 @@
+"""Benchmark the in-memory co-star graph on large synthetic casts.
+
+Random links between --actors actors and --edges / --cast-size movies are
+loaded straight into a CostarGraph, without a database. The build time
+and memory are printed, followed by p50 and p99 latencies of co-star
+lookups, shortest-path searches and single cast patches.
+
+The rebuild from the database is then measured on a temporary SQLite file
+seeded with --rebuild-edges links: the time of the blocking first load, and
+the latency of co-star lookups served from the previous graph while a
+background rebuild runs (0 skips this part).
+
+Usage:
+    python -m benchmarks.bench_graph [--edges 10000000] [--actors 1000000]
+        [--rebuild-edges 1000000]
+"""
+import argparse
+import os
+import random
+import time
+from array import array
+
+from benchmarks import common
+
+
+def timed_ms(function, calls):
+    """Call function(i) for every i and return the sorted latencies in ms."""
+    latencies = []
+    for i in range(calls):
+        started = time.perf_counter()
+        function(i)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return sorted(latencies)
+
+
+def measure_rebuild(edges, cast_size, rng):
+    """
+    Seed the database with `edges` links and time the graph rebuilds.
+
+    Returns:
+        tuple: Seconds of the blocking load, seconds of the background
+               rebuild, and the sorted co-star latencies in ms during it.
+    """
+    from app import app
+    from app.graph import CostarGraph
+
+    actors = movies = max(1, edges // cast_size)
+    common.seed(actors=actors, movies=movies, cast_size=cast_size)
+    graph = CostarGraph()
+    with app.app_context():
+        started = time.perf_counter()
+        graph.refresh()
+        load_seconds = time.perf_counter() - started
+        graph.mark(None)
+        latencies = []
+        started = time.perf_counter()
+        graph.refresh()
+        while not graph.wait(0):
+            lookup_started = time.perf_counter()
+            graph.costars(rng.randint(1, actors), 50)
+            latencies.append((time.perf_counter() - lookup_started) * 1000)
+        rebuild_seconds = time.perf_counter() - started
+    return load_seconds, rebuild_seconds, sorted(latencies) or [0.0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--edges', type=int, default=10000000)
+    parser.add_argument('--actors', type=int, default=1000000)
+    parser.add_argument('--cast-size', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--rebuild-edges', type=int, default=1000000)
+    args = parser.parse_args()
+
+    # DATABASE_URI is read when the application is first imported
+    path = common.use_database() if args.rebuild_edges else None
+    from app.graph import CostarGraph
+
+    rng = random.Random(0)
+    movies = args.edges // args.cast_size
+    movie_ids, actor_ids = array('i'), array('i')
+    for movie_id in range(1, movies + 1):
+        for actor_id in rng.sample(range(1, args.actors + 1), args.cast_size):
+            movie_ids.append(movie_id)
+            actor_ids.append(actor_id)
+    rss_before = common.peak_rss_mb()
+
+    graph = CostarGraph()
+    started = time.perf_counter()
+    graph.load(movie_ids, actor_ids)
+    build_seconds = time.perf_counter() - started
+    graph.refresh = lambda: None
+    del movie_ids, actor_ids
+
+    pairs = [(rng.randint(1, args.actors), rng.randint(1, args.actors))
+             for _ in range(args.queries)]
+    results = {
+        'costars': timed_ms(
+            lambda i: graph.costars(pairs[i][0], 50), args.queries),
+        'path': timed_ms(
+            lambda i: graph.path(pairs[i][0], pairs[i][1], 6), args.queries),
+        'set_cast': timed_ms(
+            lambda i: graph.set_cast(rng.randint(1, movies), rng.sample(
+                range(1, args.actors + 1), args.cast_size)), args.queries),
+    }
+
+    print(f'links: {graph.links:,}, actors: {args.actors:,}, '
+          f'movies: {movies:,}')
+    print(f'build: {build_seconds:.1f} s, peak RSS growth: '
+          f'{common.peak_rss_mb() - rss_before:.0f} MiB')
+    print(f'{"operation":<12}{"p50 ms":>10}{"p99 ms":>10}')
+    for operation, latencies in results.items():
+        print(f'{operation:<12}{common.percentile(latencies, 0.5):>10.2f}'
+              f'{common.percentile(latencies, 0.99):>10.2f}')
+    del graph
+
+    if path is None:
+        return
+    try:
+        load_seconds, rebuild_seconds, latencies = measure_rebuild(
+            args.rebuild_edges, args.cast_size, rng)
+    finally:
+        os.remove(path)
+    print(f'rebuild from the database, {args.rebuild_edges:,} links:')
+    print(f'first load (blocking): {load_seconds:.2f} s, background '
+          f'rebuild: {rebuild_seconds:.2f} s')
+    print(f'costars during the rebuild: {len(latencies)} lookups, p50 '
+          f'{common.percentile(latencies, 0.5):.2f} ms, p99 '
+          f'{common.percentile(latencies, 0.99):.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Track the import-time cost of the application with -X importtime.
+
+Each statement is run in a fresh interpreter with `python -X importtime`,
+--repeat times. The median wall time and the cumulative import time
+reported by Python are printed, followed by the slowest top-level imports
+of the last statement. With --max-ms the command exits with status 1 when
+any median wall time exceeds the budget, so cold-start regressions fail a
+CI job.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat 5] [--max-ms 1500]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = (
+    ('models', 'import app.models'),
+    ('app', 'from app import app'),
+    ('cli', 'from app import create_app; create_app(migrations=True)'),
+)
+
+
+def import_times(statement):
+    """
+    Run a statement under -X importtime.
+
+    Returns:
+        tuple: The wall time in ms and a {module: cumulative µs} mapping
+               of the top-level imports.
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented below the module importing them
+        if not name[1:].startswith(' '):
+            modules[name.strip()] = int(cumulative)
+    return wall_ms, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float)
+    args = parser.parse_args()
+
+    print(f'{"statement":<10}{"wall ms":>10}{"imports ms":>12}')
+    over_budget = False
+    for name, statement in STATEMENTS:
+        runs = [import_times(statement) for _ in range(args.repeat)]
+        wall = statistics.median(wall_ms for wall_ms, _ in runs)
+        imports = statistics.median(
+            sum(modules.values()) for _, modules in runs) / 1000
+        print(f'{name:<10}{wall:>10.0f}{imports:>12.0f}')
+        if args.max_ms is not None and wall > args.max_ms:
+            over_budget = True
+
+    print(f'\nslowest top-level imports of "{statement}":')
+    modules = runs[-1][1]
+    for module in sorted(modules, key=modules.get, reverse=True)[:args.top]:
+        print(f'{modules[module] / 1000:>8.1f} ms  {module}')
+    if over_budget:
+        print(f'median wall time above the {args.max_ms:.0f} ms budget')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
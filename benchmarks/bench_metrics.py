@@ -0,0 +1,70 @@
+"""Benchmark the per-request overhead of the /metrics instrumentation.
+
+The database is seeded with --rows actors, then the same GET
+/actors?limit=20 request is served --requests times by an application
+created with METRICS_ENABLED and by one without, alternating in rounds.
+The mean time per request of each and the difference are printed. The
+response cache is disabled so that every request runs its queries.
+
+Usage:
+    python -m benchmarks.bench_metrics [--requests 5000]
+"""
+import argparse
+import os
+import time
+
+from benchmarks import common
+
+
+def mean_ms(client, headers, requests):
+    """Serve the request repeatedly and return the mean time in ms."""
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/actors?limit=20', headers=headers)
+        assert response.status_code == 200, response.get_json()
+    return (time.perf_counter() - started) * 1000 / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_SIZE'] = '0'
+    path = common.use_database()
+    common.seed(actors=args.rows, movies=0, cast_size=0)
+    from app import create_app
+    from config import Config
+    from tests.local_auth import LocalAuth
+
+    class NoMetricsConfig(Config):
+        METRICS_ENABLED = False
+
+    clients = {'enabled': create_app(Config).test_client(),
+               'disabled': create_app(NoMetricsConfig).test_client()}
+    local_auth = LocalAuth().install()
+    try:
+        headers = local_auth.headers()
+        results = {name: [] for name in clients}
+        per_round = max(1, args.requests // args.rounds)
+        for name, client in clients.items():
+            mean_ms(client, headers, 10)
+        for _ in range(args.rounds):
+            for name, client in clients.items():
+                results[name].append(mean_ms(client, headers, per_round))
+    finally:
+        local_auth.uninstall()
+        os.remove(path)
+
+    enabled = min(results['enabled'])
+    disabled = min(results['disabled'])
+    print(f'metrics enabled:  {enabled:.3f} ms/request')
+    print(f'metrics disabled: {disabled:.3f} ms/request')
+    print(f'overhead: {(enabled - disabled) * 1000:.0f} µs '
+          f'({(enabled / disabled - 1) * 100:.1f}%)')
+
+
+if __name__ == '__main__':
+    main()
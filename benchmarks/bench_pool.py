@@ -0,0 +1,103 @@
+"""Benchmark request throughput at a fixed concurrency for a pool setting.
+
+--concurrency threads each send --requests GET /actors/<id>/movies requests
+through the WSGI app, so they compete for one worker's connection pool the
+way gunicorn threads do. The pool is sized from --pool-size and
+--max-overflow (DB_POOL_SIZE and DB_MAX_OVERFLOW); requests per second, p50
+and p99 latency and the largest number of checked-out connections are
+printed. The response cache is disabled so that every request reaches the
+database. Pass --database-uri to measure PostgreSQL instead of SQLite
+(its tables are dropped and re-seeded).
+
+Usage:
+    python -m benchmarks.bench_pool [--concurrency 32] [--pool-size 5]
+"""
+import argparse
+import os
+import random
+import threading
+import time
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--pool-size', type=int, default=5)
+    parser.add_argument('--max-overflow', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_SIZE'] = '0'
+    os.environ['DB_POOL_SIZE'] = str(args.pool_size)
+    os.environ['DB_MAX_OVERFLOW'] = str(args.max_overflow)
+    if args.database_uri:
+        path = None
+        os.environ['DATABASE_URI'] = args.database_uri
+    else:
+        path = common.use_database()
+    common.seed(actors=args.rows, movies=0, cast_size=0)
+    from app import app, db
+    from app.database_helper import pool_status
+    from tests.local_auth import LocalAuth
+
+    local_auth = LocalAuth().install()
+    headers = local_auth.headers()
+    latencies, errors, peak = [], [], [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def client_thread(seed_value):
+        client = app.test_client()
+        rng = random.Random(seed_value)
+        own = []
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            actor_id = rng.randint(1, args.rows)
+            response = client.get(f'/actors/{actor_id}/movies',
+                                  headers=headers)
+            own.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        with lock:
+            latencies.extend(own)
+
+    def sample_pool():
+        with app.app_context():
+            while not done.wait(0.01):
+                status = pool_status(db.engine)
+                peak[0] = max(peak[0], status.get('checked_out', 0))
+
+    try:
+        sampler = threading.Thread(target=sample_pool)
+        sampler.start()
+        threads = [threading.Thread(target=client_thread, args=(i,))
+                   for i in range(args.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+    finally:
+        local_auth.uninstall()
+        if path is not None:
+            os.remove(path)
+
+    latencies.sort()
+    print(f'concurrency: {args.concurrency}, pool_size: {args.pool_size}, '
+          f'max_overflow: {args.max_overflow}')
+    print(f'requests: {len(latencies)}, errors: {len(errors)}, '
+          f'throughput: {len(latencies) / elapsed:.0f} req/s')
+    print(f'latency p50: {common.percentile(latencies, 0.5):.2f} ms, '
+          f'p99: {common.percentile(latencies, 0.99):.2f} ms, '
+          f'peak checked out: {peak[0]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark the latency of GET /actors/search and GET /movies/search.
+
+The database is seeded with --rows actors and movies, then --queries
+random prefixes of existing names are searched and the p50 and p99 request
+latencies are printed. With the default temporary SQLite file the
+in-process prefix index is measured; pass --database-uri to measure the
+PostgreSQL indexes instead (its tables are dropped and re-seeded). The
+response cache is disabled so that every request runs the search.
+
+Usage:
+    python -m benchmarks.bench_search [--rows 1000000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks import common
+
+
+def measure(client, headers, path, prefixes):
+    """Search every prefix and return the sorted latencies in ms."""
+    latencies = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        response = client.get(path, query_string={'q': prefix},
+                              headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_json()
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_SIZE'] = '0'
+    if args.database_uri:
+        path = None
+        os.environ['DATABASE_URI'] = args.database_uri
+    else:
+        path = common.use_database()
+    common.seed(actors=args.rows, movies=args.rows, cast_size=0)
+    from app import app
+    from tests.local_auth import LocalAuth
+
+    rng = random.Random(0)
+    names = {
+        '/actors/search': [f'{first} {last}' for first in common.FIRST_NAMES
+                           for last in common.LAST_NAMES],
+        '/movies/search': [f'Movie {i}' for i in range(args.rows)],
+    }
+    local_auth = LocalAuth().install()
+    try:
+        client = app.test_client()
+        headers = local_auth.headers()
+        results = {}
+        for endpoint, candidates in names.items():
+            prefixes = []
+            for _ in range(args.queries):
+                name = rng.choice(candidates)
+                prefixes.append(name[:rng.randint(1, len(name))])
+            # The first search builds the in-process index
+            measure(client, headers, endpoint, prefixes[:1])
+            results[endpoint] = measure(client, headers, endpoint, prefixes)
+    finally:
+        local_auth.uninstall()
+        if path is not None:
+            os.remove(path)
+
+    print(f'rows: {args.rows}, queries: {args.queries}, latency in ms')
+    print(f'{"endpoint":<18}{"p50":>10}{"p99":>10}')
+    for endpoint, latencies in results.items():
+        print(f'{endpoint:<18}{common.percentile(latencies, 0.5):>10.2f}'
+              f'{common.percentile(latencies, 0.99):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Micro-benchmark JSON encode throughput for actors and movies.
+
+Rows are fetched once up front, so only serialisation is timed. Three
+paths are compared for each resource:
+
+    orm+format+stdlib   ORM entity -> format() dict -> json.dumps
+    rows+dict+provider  column Row -> dict -> FastJSONProvider.dumps
+    rows+RowEncoder     column Row -> RowEncoder (no intermediate dict)
+
+Usage:
+    python -m benchmarks.bench_serialization [--rows 50000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks import common
+
+
+def throughput(encode, rows, repeat):
+    """Best rows/sec over `repeat` runs of encode(rows)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(rows) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    path = common.use_database()
+    common.seed(actors=args.rows, movies=args.rows, cast_size=3)
+
+    from sqlalchemy.orm import selectinload
+    from app import app, db
+    from app.json_provider import orjson
+    from app.models import Actor, Movie
+    from app.queries import (
+        ACTOR_COLUMNS, ACTOR_FIELDS, MOVIE_COLUMNS, MOVIE_FIELDS,
+        cast_names, row_encoder, select_columns)
+
+    results = {}
+    with app.app_context():
+        provider = app.json
+
+        actors = db.session.query(Actor).all()
+        actor_rows = select_columns(ACTOR_COLUMNS, ACTOR_FIELDS).all()
+        actor_encoder = row_encoder(ACTOR_COLUMNS, ACTOR_FIELDS)
+        results['Actor'] = {
+            'orm+format+stdlib': throughput(
+                lambda rows: json.dumps([row.format() for row in rows]),
+                actors, args.repeat),
+            'rows+dict+provider': throughput(
+                lambda rows: provider.dumps([row._asdict() for row in rows]),
+                actor_rows, args.repeat),
+            'rows+RowEncoder': throughput(
+                actor_encoder.encode_many,
+                actor_rows, args.repeat),
+        }
+
+        movies = db.session.query(Movie).options(
+            selectinload(Movie.actors)).all()
+        movie_rows = select_columns(MOVIE_COLUMNS, MOVIE_FIELDS).all()
+        casts = cast_names([row.id for row in movie_rows])
+        movie_encoder = row_encoder(MOVIE_COLUMNS, MOVIE_FIELDS)
+        results['Movie'] = {
+            'orm+format+stdlib': throughput(
+                lambda rows: json.dumps([row.format() for row in rows]),
+                movies, args.repeat),
+            'rows+dict+provider': throughput(
+                lambda rows: provider.dumps([
+                    {'id': row.id, 'title': row.title,
+                     'release_date': str(row.release_date),
+                     'actors': casts[row.id]} for row in rows]),
+                movie_rows, args.repeat),
+            'rows+RowEncoder': throughput(
+                lambda rows: movie_encoder.encode_many(rows, casts),
+                movie_rows, args.repeat),
+        }
+    os.remove(path)
+
+    print(f'rows: {args.rows}, orjson: '
+          f'{"installed" if orjson is not None else "not installed"}')
+    for model, paths in results.items():
+        for name, rate in paths.items():
+            print(f'{model:<6} {name:<20} {rate:>12,.0f} rows/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Measure gunicorn startup time and per-worker memory, with and without
+preloading.
+
+gunicorn is started from gunicorn.conf.py with --workers sync workers,
+once with GUNICORN_PRELOAD=true and once with false. For each run the
+time until GET /health/db first succeeds is printed, followed by the RSS
+of each worker and its PSS. PSS charges shared pages proportionally, so
+it shows how much of the preloaded application is shared copy-on-write.
+Linux only; requires gunicorn.
+
+Usage:
+    python -m benchmarks.bench_startup [--workers 4]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from benchmarks import common
+
+
+def memory_mb(pid):
+    """Return the RSS and PSS of a process in MiB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            fields = line.split()
+            if fields[0] in ('Rss:', 'Pss:'):
+                values[fields[0]] = int(fields[1]) / 1024
+    return values['Rss:'], values['Pss:']
+
+
+def worker_pids(pid):
+    """Return the ids of the child processes of a process."""
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def first_response_seconds(port, process, started, timeout=60):
+    """Poll /health/db until it answers 200 and return the elapsed time."""
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited with '
+                               f'status {process.returncode}')
+        try:
+            with urlopen(f'http://127.0.0.1:{port}/health/db',
+                         timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except (URLError, OSError):
+            time.sleep(0.01)
+    raise RuntimeError('gunicorn did not answer')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    path = common.use_database()
+    common.seed(actors=1000, movies=1000, cast_size=3)
+    print(f'{"preload":<9}{"first ms":>10}{"worker RSS":>12}'
+          f'{"worker PSS":>12}  (MiB, mean over workers)')
+    try:
+        for preload in ('false', 'true'):
+            port = common.free_port()
+            environ = dict(os.environ, GUNICORN_PRELOAD=preload,
+                           GUNICORN_WORKERS=str(args.workers),
+                           GUNICORN_WORKER_CLASS='sync',
+                           GUNICORN_BIND=f'127.0.0.1:{port}')
+            started = time.perf_counter()
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '--config',
+                 'gunicorn.conf.py'], env=environ)
+            try:
+                first = first_response_seconds(port, process, started)
+                # Let every worker finish booting before measuring
+                time.sleep(2)
+                usage = [memory_mb(pid) for pid in worker_pids(process.pid)]
+            finally:
+                process.terminate()
+                process.wait()
+            rss = sum(value for value, _ in usage) / len(usage)
+            pss = sum(value for _, value in usage) / len(usage)
+            print(f'{preload:<9}{first * 1000:>10.0f}{rss:>12.1f}'
+                  f'{pss:>12.1f}')
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark the per-request cost of requires_auth with and without the
+verified-token cache.
+
+Tokens are signed with a locally generated RSA key and the JWKS document is
+read from a temporary file, so no network access is needed.
+
+Usage:
+    python -m benchmarks.bench_token_cache [--requests 2000]
+"""
+import argparse
+import time
+
+from app import app, auth
+from tests.local_auth import LocalAuth
+
+
+def time_requests(view, headers, requests):
+    """Call an authenticated view repeatedly with the same bearer token.
+
+    Returns:
+        float: Mean seconds per call.
+    """
+    with app.test_request_context('/', headers=headers):
+        view()
+        started = time.perf_counter()
+        for _ in range(requests):
+            view()
+        return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    local_auth = LocalAuth().install()
+    try:
+        headers = local_auth.headers(['view:actors'])
+
+        @auth.requires_auth('view:actors')
+        def view(payload):
+            return payload
+
+        auth.set_token_cache(auth.VerifiedTokenCache(maxsize=0))
+        uncached = time_requests(view, headers, args.requests)
+
+        cache = auth.VerifiedTokenCache()
+        auth.set_token_cache(cache)
+        cached = time_requests(view, headers, args.requests)
+    finally:
+        local_auth.uninstall()
+
+    print(f'requests per mode : {args.requests}')
+    print(f'without cache     : {uncached * 1e6:10.1f} us/request')
+    print(f'with cache        : {cached * 1e6:10.1f} us/request')
+    print(f'speedup           : {uncached / cached:10.1f}x')
+    print(f'cache stats       : {cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Shared helpers for the benchmarks.
+
+The benchmarks run against a SQLite file so they need no database server.
+DATABASE_URI is read when `app` is first imported, so call use_database()
+before importing anything from the application.
+"""
+import itertools
+import math
+import os
+import random
+import resource
+import socket
+import tempfile
+import time
+from datetime import date, timedelta
+
+FIRST_NAMES = ('Anne', 'Brad', 'Cate', 'Denzel', 'Emma', 'Forest', 'Greta',
+               'Hugh', 'Iris', 'Jude', 'Keanu', 'Laura', 'Meryl', 'Nia')
+LAST_NAMES = ('Adams', 'Bale', 'Chan', 'Dern', 'Elba', 'Foy', 'Gosling',
+              'Hanks', 'Irons', 'Jones', 'Keaton', 'Lopez', 'Moss', 'Nyong')
+
+
+def use_database(path=None):
+    """
+    Point the application at a SQLite file.
+
+    Args:
+        path (str): Database file, a temporary one is created when omitted.
+
+    Returns:
+        str: The database file path.
+    """
+    if path is None:
+        handle, path = tempfile.mkstemp(prefix='casting-bench-',
+                                        suffix='.db')
+        os.close(handle)
+    os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.abspath(path)
+    return path
+
+
+def seed(actors=1000, movies=1000, cast_size=5, batch=10000, seed_value=0,
+         skew=0):
+    """
+    Create the schema and fill it with synthetic actors, movies and casts.
+
+    Must be called after use_database(). Casts are drawn at random, so each
+    movie has `cast_size` distinct actors. With a positive `skew` the casts
+    look more like real ones: their sizes are log-normal around
+    `cast_size`, and actor i is picked with a weight of 1 / i ** skew, so
+    the first actors appear in many more movies than the others.
+
+    Args:
+        actors (int): Number of actors to insert.
+        movies (int): Number of movies to insert.
+        cast_size (int): Actors per movie.
+        batch (int): Rows per multi-row INSERT.
+        seed_value (int): Random seed, for reproducible data sets.
+        skew (float): Zipf exponent of actor popularity, 0 for uniform
+                      casts of exactly `cast_size` actors.
+    """
+    from sqlalchemy import insert
+    from app import app, db
+    from app.models import Actor, Movie, movie_actors
+
+    rng = random.Random(seed_value)
+    population = range(1, actors + 1)
+    if skew > 0 and cast_size > 0:
+        weights = list(itertools.accumulate(
+            1 / i ** skew for i in population))
+
+    def draw_cast():
+        if skew <= 0 or cast_size <= 0:
+            return rng.sample(population, min(cast_size, actors))
+        size = min(actors, max(1, round(
+            rng.lognormvariate(math.log(cast_size), 0.5))))
+        chosen = set()
+        while len(chosen) < size:
+            chosen.update(rng.choices(population, cum_weights=weights,
+                                      k=size - len(chosen)))
+        return chosen
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for start in range(0, actors, batch):
+            db.session.execute(insert(Actor), [
+                {'id': i + 1,
+                 'name': f'{rng.choice(FIRST_NAMES)} '
+                         f'{rng.choice(LAST_NAMES)} {i}',
+                 'age': rng.randint(18, 90),
+                 'gender': rng.choice(('Female', 'Male'))}
+                for i in range(start, min(start + batch, actors))])
+        first_release = date(1950, 1, 1)
+        for start in range(0, movies, batch):
+            db.session.execute(insert(Movie), [
+                {'id': i + 1,
+                 'title': f'Movie {i}',
+                 'release_date': first_release +
+                 timedelta(days=rng.randint(0, 27000))}
+                for i in range(start, min(start + batch, movies))])
+        cast = []
+        for movie_id in range(1, movies + 1):
+            for actor_id in draw_cast():
+                cast.append({'movie_id': movie_id, 'actor_id': actor_id})
+            if len(cast) >= batch:
+                db.session.execute(insert(movie_actors), cast)
+                cast = []
+        if cast:
+            db.session.execute(insert(movie_actors), cast)
+        db.session.commit()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB (Linux units)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, fraction):
+    """Return the value below which `fraction` of sorted values fall."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def free_port():
+    """Return a TCP port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_listening(port, process, timeout=30):
+    """Wait until the server accepts connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited with '
+                               f'status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start')
@@ -0,0 +1,83 @@
+# Production gunicorn settings, loaded automatically when `gunicorn` is run
+# from the repository root. Every setting can be changed through the
+# environment, e.g. GUNICORN_WORKER_CLASS=gthread GUNICORN_THREADS=8.
+#
+# The application is imported once in the master (preload_app) and the
+# workers are forked from it, so the imported modules are shared
+# copy-on-write instead of being loaded again by every worker. Database
+# connections must not be shared across a fork, which post_fork takes care
+# of.
+#
+# gevent workers do not preload by default: async_app must monkey-patch
+# before anything else is imported, but the master has already imported
+# gunicorn, threading and ssl by the time it would preload it, and its
+# patched modules would be forked into every worker. Each gevent worker
+# imports async_app itself, right after gunicorn patched it.
+
+import gc
+import multiprocessing
+import os
+import sys
+
+# sync, gthread or gevent; gevent serves async_app, the others app
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+wsgi_app = 'async_app:app' if worker_class == 'gevent' else 'app:app'
+
+bind = os.environ.get('GUNICORN_BIND',
+                      f'0.0.0.0:{os.environ.get("PORT", 8000)}')
+workers = int(os.environ.get('GUNICORN_WORKERS',
+                             multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get(
+    'GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+preload_app = os.environ.get(
+    'GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true'
+).lower() not in ('0', 'false', 'no', 'off')
+
+# Restart each worker after a few thousand requests, at staggered times,
+# so that slow memory growth never accumulates
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+
+def when_ready(server):
+    """
+    Move the preloaded objects out of the garbage collector's reach.
+
+    Collections in a worker would otherwise write to the reference headers
+    of every shared object and copy the pages holding them.
+
+    Also warn when several workers run without a shared version store.
+    """
+    if preload_app:
+        gc.freeze()
+    if workers > 1 and not os.environ.get('VERSION_STORE_URL'):
+        server.log.warning(
+            'VERSION_STORE_URL is not set: each worker only notices its own '
+            'writes, so ETags and cached responses may be stale for up to '
+            'LOCAL_VERSION_TTL seconds and in-memory indexes indefinitely')
+
+
+def post_fork(server, worker):
+    """
+    Drop the database connections inherited from the master.
+
+    dispose(close=False) gives the worker fresh, empty pools without
+    closing the sockets, which belong to the master.
+    """
+    app_module = sys.modules.get('app')
+    # Only a preloaded application has engines to dispose; looking up
+    # `app` on the package would create one
+    application = vars(app_module).get('app') if app_module else None
+    if application is None:
+        return
+    with application.app_context():
+        for engine in app_module.db.engines.values():
+            engine.dispose(close=False)
@@ -1,5 +1,4 @@
-from flask_migrate import Migrate
-from app import app, db
+from app import create_app
 
-# Initialize Flask app and database migration
-migrate = Migrate(app, db)
+# Create the application with the Flask-Migrate commands registered
+app = create_app(migrations=True)
@@ -0,0 +1,24 @@
+"""Add an actor (age) index for sorting actors by age
+
+Revision ID: 3f8d1a6c5b27
+Revises: 9e4a6b3c2d18
+Create Date: 2026-10-18 15:21:43.518207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8d1a6c5b27'
+down_revision = '9e4a6b3c2d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_actor_age', 'actor', ['age'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_actor_age', table_name='actor')
@@ -0,0 +1,26 @@
+"""Add movie_actors (actor_id, movie_id) index
+
+Revision ID: 4b1f0c2a9e73
+Revises: d17471714d6f
+Create Date: 2026-10-18 10:12:40.518233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b1f0c2a9e73'
+down_revision = 'd17471714d6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_movie_actors_actor_id_movie_id', 'movie_actors',
+                    ['actor_id', 'movie_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_movie_actors_actor_id_movie_id',
+                  table_name='movie_actors')
@@ -0,0 +1,28 @@
+"""Add actor (gender, age) and movie (release_date) indexes
+
+Revision ID: 7c2e5d8a1f46
+Revises: 4b1f0c2a9e73
+Create Date: 2026-10-18 11:02:17.304861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e5d8a1f46'
+down_revision = '4b1f0c2a9e73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_actor_gender_age', 'actor', ['gender', 'age'],
+                    unique=False)
+    op.create_index('ix_movie_release_date', 'movie', ['release_date'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_movie_release_date', table_name='movie')
+    op.drop_index('ix_actor_gender_age', table_name='actor')
@@ -0,0 +1,43 @@
+"""Add prefix and trigram search indexes on actor names and movie titles
+
+Revision ID: 9e4a6b3c2d18
+Revises: 7c2e5d8a1f46
+Create Date: 2026-10-18 11:48:53.190447
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4a6b3c2d18'
+down_revision = '7c2e5d8a1f46'
+branch_labels = None
+depends_on = None
+
+# (index prefix, table, column) of every searchable text column
+SEARCH_COLUMNS = (
+    ('ix_actor_name', 'actor', 'name'),
+    ('ix_movie_title', 'movie', 'title'),
+)
+
+
+def upgrade():
+    # Other databases search with the application's in-process index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in SEARCH_COLUMNS:
+        op.create_index(f'{name}_prefix', table,
+                        [sa.text(f'lower({column}) COLLATE "C"')])
+        op.create_index(f'{name}_trgm', table,
+                        [sa.text(f'lower({column}) gist_trgm_ops')],
+                        postgresql_using='gist')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, column in SEARCH_COLUMNS:
+        op.drop_index(f'{name}_trgm', table_name=table)
+        op.drop_index(f'{name}_prefix', table_name=table)
@@ -0,0 +1,120 @@
+# Helpers for testing against a locally generated RSA key instead of Auth0
+import json
+import os
+import tempfile
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app import auth
+
+TEST_DOMAIN = 'casting-test.local'
+TEST_AUDIENCE = 'casting-capstone'
+
+ALL_PERMISSIONS = [
+    'view:actors', 'view:movies',
+    'post:actors', 'post:movies',
+    'update:actors', 'update:movies',
+    'delete:actors', 'delete:movies',
+]
+
+
+class LocalSigningKey:
+    """An RSA key pair that signs RS256 tokens the way Auth0 would."""
+
+    def __init__(self, kid='local-test-key'):
+        private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048)
+        self.kid = kid
+        self.private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption())
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo)
+        self.public_jwk = jwk.construct(public_pem, 'RS256').to_dict()
+        self.public_jwk.update({'kid': kid, 'use': 'sig'})
+
+    def sign(self, permissions=None, expires_in=3600, **claims):
+        """
+        Sign a token accepted by verify_decode_jwt.
+
+        Args:
+            permissions (list): Permission strings to embed.
+            expires_in (int): Seconds until the token expires.
+            **claims: Extra or overriding claims.
+
+        Returns:
+            str: The encoded JWT.
+        """
+        now = int(time.time())
+        payload = {
+            'iss': f'https://{TEST_DOMAIN}/',
+            'sub': 'auth0|local-test-user',
+            'aud': TEST_AUDIENCE,
+            'iat': now,
+            'exp': now + expires_in,
+            'permissions': list(
+                ALL_PERMISSIONS if permissions is None else permissions),
+        }
+        payload.update(claims)
+        return jwt.encode(payload, self.private_pem, algorithm='RS256',
+                          headers={'kid': self.kid})
+
+
+def write_jwks(path, *keys):
+    """Write the public halves of the given keys as a JWKS document."""
+    with open(path, 'w') as f:
+        json.dump({'keys': [key.public_jwk for key in keys]}, f)
+
+
+class LocalAuth:
+    """
+    Points the application's auth at a JWKS file on disk.
+
+    Usage:
+        local_auth = LocalAuth()
+        local_auth.install()
+        headers = local_auth.headers(['view:actors'])
+        ...
+        local_auth.uninstall()
+    """
+
+    def __init__(self, key=None):
+        self.key = key or LocalSigningKey()
+        self.directory = tempfile.mkdtemp(prefix='casting-jwks-')
+        self.jwks_path = os.path.join(self.directory, 'jwks.json')
+        write_jwks(self.jwks_path, self.key)
+        self._saved_env = {}
+
+    @property
+    def jwks_url(self):
+        return 'file://' + self.jwks_path
+
+    def install(self, **store_options):
+        for name, value in (('AUTH0_DOMAIN', TEST_DOMAIN),
+                            ('AUTH0_AUDIENCE', TEST_AUDIENCE)):
+            self._saved_env[name] = os.environ.get(name)
+            os.environ[name] = value
+        self.store = auth.JWKSKeyStore(self.jwks_url, **store_options)
+        auth.set_jwks_store(self.store)
+        auth.set_token_cache(None)
+        return self
+
+    def uninstall(self):
+        for name, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        auth.set_jwks_store(None)
+        auth.set_token_cache(None)
+
+    def token(self, permissions=None, **claims):
+        return self.key.sign(permissions, **claims)
+
+    def headers(self, permissions=None, **claims):
+        return {'Authorization': f'Bearer {self.token(permissions, **claims)}'}
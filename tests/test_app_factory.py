@@ -0,0 +1,44 @@
+# Import necessary modules for testing
+import subprocess
+import sys
+import unittest
+from app import app, create_app
+from config import Config
+
+
+class AppFactoryTestCase(unittest.TestCase):
+    """Test case for create_app and the lazily created default app."""
+
+    def test_independent_apps(self):
+        """Test that each call builds a separate, fully routed app."""
+        class OtherConfig(Config):
+            PAGE_SIZE_DEFAULT = 7
+
+        other = create_app(OtherConfig)
+        self.assertIsNot(other, app)
+        self.assertEqual(other.config['PAGE_SIZE_DEFAULT'], 7)
+        self.assertEqual(
+            sorted(rule.rule for rule in other.url_map.iter_rules()),
+            sorted(rule.rule for rule in app.url_map.iter_rules()))
+
+    def test_migrations_on_demand(self):
+        """Test that Flask-Migrate is only registered when asked for."""
+        self.assertNotIn('migrate', create_app(Config).extensions)
+        self.assertIn('migrate',
+                      create_app(Config, migrations=True).extensions)
+
+    def test_lazy_imports(self):
+        """Test that the app is built on first use and skips Alembic."""
+        for statement, created in (('import app.models', 'False'),
+                                   ('from app import app', 'True')):
+            code = (f'{statement}; import sys; '
+                    f'print("app" in vars(sys.modules["app"]), '
+                    f'"alembic" in sys.modules)')
+            output = subprocess.run(
+                [sys.executable, '-c', code], capture_output=True,
+                text=True, check=True).stdout.split()
+            self.assertEqual(output, [created, 'False'], statement)
+
+
+if __name__ == '__main__':
+    unittest.main()
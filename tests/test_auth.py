@@ -0,0 +1,278 @@
+# Import necessary modules for testing
+import http.server
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+from app import app, db, auth
+from app.models import Actor
+from tests.local_auth import LocalAuth, LocalSigningKey, write_jwks
+
+
+class CountingKeyStore(auth.JWKSKeyStore):
+    """JWKS key store that records how often it hits the endpoint."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return super().fetch()
+
+
+class JWKSKeyStoreTestCase(unittest.TestCase):
+    """Test case for the cached JWKS key store."""
+
+    def setUp(self):
+        """Set up a JWKS document on disk."""
+        self.local_auth = LocalAuth()
+        self.key = self.local_auth.key
+        self.url = self.local_auth.jwks_url
+
+    def test_keys_loaded_once(self):
+        """Test that repeated lookups reuse the cached key set."""
+        store = CountingKeyStore(self.url)
+        for _ in range(10):
+            self.assertEqual(store.get_key(self.key.kid)['kid'], self.key.kid)
+        self.assertEqual(store.fetches, 1)
+
+    def test_unknown_kid_forces_rate_limited_refresh(self):
+        """Test that unknown kids refresh at most once per interval."""
+        store = CountingKeyStore(self.url, min_refresh_interval=60)
+        store.get_key(self.key.kid)
+        self.assertIsNone(store.get_key('unknown'))
+        self.assertIsNone(store.get_key('unknown'))
+        self.assertEqual(store.fetches, 1)
+
+        store = CountingKeyStore(self.url, min_refresh_interval=0)
+        store.get_key(self.key.kid)
+        store.get_key('unknown')
+        self.assertEqual(store.fetches, 2)
+
+    def test_rotated_key_found_after_refresh(self):
+        """Test that a newly published kid is picked up on a miss."""
+        store = CountingKeyStore(self.url, min_refresh_interval=0)
+        store.get_key(self.key.kid)
+        rotated = LocalSigningKey(kid='rotated-key')
+        write_jwks(self.local_auth.jwks_path, self.key, rotated)
+        self.assertEqual(store.get_key('rotated-key')['kid'], 'rotated-key')
+
+    def test_stale_keys_served_when_refresh_fails(self):
+        """Test that expired keys keep working while the endpoint is down."""
+        store = CountingKeyStore(self.url, ttl=0, min_refresh_interval=0)
+        store.get_key(self.key.kid)
+        os.remove(self.local_auth.jwks_path)
+        self.assertEqual(store.get_key(self.key.kid)['kid'], self.key.kid)
+        self.assertEqual(store.fetches, 2)
+
+    def test_background_refresh_before_expiry(self):
+        """Test that keys near expiry are refreshed without blocking."""
+        store = CountingKeyStore(
+            self.url, ttl=3600, refresh_ahead=3600, min_refresh_interval=0)
+        store.get_key(self.key.kid)
+        store.get_key(self.key.kid)
+        store._background_refresh.join(timeout=5)
+        self.assertEqual(store.fetches, 2)
+
+    def test_local_http_endpoint(self):
+        """Test loading keys from a local HTTP stand-in for Auth0."""
+        directory = os.path.dirname(self.local_auth.jwks_path)
+
+        class Handler(http.server.SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=directory, **kwargs)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            store = CountingKeyStore(
+                f'http://127.0.0.1:{server.server_port}/jwks.json')
+            self.assertEqual(store.get_key(self.key.kid)['kid'], self.key.kid)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class VerifiedTokenCacheTestCase(unittest.TestCase):
+    """Test case for the verified-token cache."""
+
+    def payload(self, expires_in=3600):
+        return {'sub': 'user', 'exp': time.time() + expires_in,
+                'permissions': ['view:actors']}
+
+    def test_hit_after_put(self):
+        """Test that a cached token is returned without verification."""
+        cache = auth.VerifiedTokenCache(maxsize=10)
+        payload = self.payload()
+        self.assertIsNone(cache.get('token'))
+        cache.put('token', payload)
+        self.assertIs(cache.get('token'), payload)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_expired_entry_dropped(self):
+        """Test that entries past their exp claim are evicted."""
+        cache = auth.VerifiedTokenCache(maxsize=10)
+        cache.put('token', self.payload(expires_in=-1))
+        self.assertIsNone(cache.get('token'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_max_age_bounds_lifetime(self):
+        """Test that entries never outlive max_age."""
+        cache = auth.VerifiedTokenCache(maxsize=10, max_age=0)
+        cache.put('token', self.payload())
+        self.assertIsNone(cache.get('token'))
+
+    def test_least_recently_used_evicted(self):
+        """Test that the cache stays within maxsize using LRU order."""
+        cache = auth.VerifiedTokenCache(maxsize=2)
+        cache.put('first', self.payload())
+        cache.put('second', self.payload())
+        cache.get('first')
+        cache.put('third', self.payload())
+        self.assertIsNone(cache.get('second'))
+        self.assertIsNotNone(cache.get('first'))
+        self.assertIsNotNone(cache.get('third'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_tokens_without_exp_not_cached(self):
+        """Test that payloads without an exp claim are never cached."""
+        cache = auth.VerifiedTokenCache(maxsize=10)
+        cache.put('token', {'sub': 'user'})
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_disabled_cache(self):
+        """Test that maxsize 0 disables caching."""
+        cache = auth.VerifiedTokenCache(maxsize=0)
+        cache.put('token', self.payload())
+        self.assertIsNone(cache.get('token'))
+
+
+class PermissionSetTestCase(unittest.TestCase):
+    """Test case for precompiled permissions and the route registry."""
+
+    def test_verified_payload_precompiles_permissions(self):
+        """Test that the payload carries a frozenset of its permissions."""
+        payload = auth.VerifiedPayload(
+            {'permissions': ['view:actors', 'post:movies']})
+        self.assertEqual(payload.permission_set,
+                         frozenset({'view:actors', 'post:movies'}))
+        self.assertEqual(payload['permissions'],
+                         ['view:actors', 'post:movies'])
+
+    def test_check_permissions(self):
+        """Test permission checks on precompiled and plain payloads."""
+        for payload in ({'permissions': ['view:actors']},
+                        auth.VerifiedPayload({'permissions': ['view:actors']})):
+            self.assertTrue(auth.check_permissions('view:actors', payload))
+            with self.assertRaises(auth.AuthError) as context:
+                auth.check_permissions('delete:actors', payload)
+            self.assertEqual(context.exception.status_code, 403)
+
+    def test_missing_permissions_claim(self):
+        """Test that a payload without permissions is rejected."""
+        with self.assertRaises(auth.AuthError) as context:
+            auth.check_permissions('view:actors', auth.VerifiedPayload({}))
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_route_permissions(self):
+        """Test that every route is listed with its required permission."""
+        routes = {(route['method'], route['rule']): route['permission']
+                  for route in auth.route_permissions(app)}
+        self.assertEqual(routes[('GET', '/actors')], 'view:actors')
+        self.assertEqual(routes[('POST', '/movies')], 'post:movies')
+        self.assertEqual(routes[('DELETE', '/actors/<int:actor_id>')],
+                         'delete:actors')
+        self.assertIsNone(routes[('GET', '/')])
+
+    def test_route_permissions_command(self):
+        """Test the route-permissions CLI command."""
+        result = app.test_cli_runner().invoke(
+            args=['route-permissions', '--as-json'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('"permission": "update:movies"', result.output)
+
+
+class RequiresAuthTestCase(unittest.TestCase):
+    """Test case for endpoint authentication with locally signed tokens."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(Actor(name='Actor 1', age=30, gender='Male'))
+        db.session.commit()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def test_verify_decode_jwt(self):
+        """Test decoding a token signed by the local key."""
+        payload = auth.verify_decode_jwt(
+            self.local_auth.token(['view:actors']))
+        self.assertEqual(payload['permissions'], ['view:actors'])
+
+    def test_expired_token_rejected(self):
+        """Test that expired tokens are rejected."""
+        token = self.local_auth.key.sign(expires_in=-60)
+        with self.assertRaises(auth.AuthError) as context:
+            auth.verify_decode_jwt(token)
+        self.assertEqual(context.exception.status_code, 401)
+
+    def test_endpoint_with_local_token(self):
+        """Test that an endpoint accepts a locally signed token."""
+        response = self.app.get(
+            '/actors', headers=self.local_auth.headers(['view:actors']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Actor 1', response.data)
+
+    def test_endpoint_missing_permission(self):
+        """Test that a token without the permission is forbidden."""
+        response = self.app.get(
+            '/actors', headers=self.local_auth.headers(['view:movies']))
+        self.assertEqual(response.status_code, 403)
+
+    def test_jwks_fetched_once_across_requests(self):
+        """Test that repeated requests do not refetch the key set."""
+        store = CountingKeyStore(self.local_auth.jwks_url)
+        auth.set_jwks_store(store)
+        headers = self.local_auth.headers(['view:actors'])
+        for _ in range(5):
+            self.app.get('/actors', headers=headers)
+        self.assertEqual(store.fetches, 1)
+
+    def test_repeated_token_verified_once(self):
+        """Test that a reused bearer token skips RSA verification."""
+        headers = self.local_auth.headers(['view:actors'])
+        with mock.patch('app.auth.verify_decode_jwt',
+                        wraps=auth.verify_decode_jwt) as verify:
+            for _ in range(3):
+                response = self.app.get('/actors', headers=headers)
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(auth.get_token_cache().stats()['hits'], 2)
+
+    def test_cached_token_still_checks_permissions(self):
+        """Test that a cache hit is still subject to permission checks."""
+        headers = self.local_auth.headers(['view:actors'])
+        self.app.get('/actors', headers=headers)
+        response = self.app.get('/movies', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
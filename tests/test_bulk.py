@@ -0,0 +1,169 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from app import app, db, versioning
+from app.models import Actor, Movie, movie_actors
+from app.versioning import on_bump
+from tests.local_auth import LocalAuth
+
+
+class BulkTestCase(unittest.TestCase):
+    """Test case for the bulk create, update and delete endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        actors = [Actor(name=f'Actor {i}', age=30 + i, gender='Female')
+                  for i in range(3)]
+        movie = Movie(title='Movie 1', release_date=date(2023, 1, 1))
+        movie.actors = actors[:2]
+        db.session.add_all(actors + [movie])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def send(self, method, path, body, permissions=None):
+        """Issue a request with a JSON body and return the response."""
+        headers = self.local_auth.headers(permissions) if permissions \
+            else self.headers
+        response = self.app.open(path, method=method, json=body,
+                                 headers=headers)
+        db.session.remove()
+        return response
+
+    def test_create_actors(self):
+        """Test that a batch is inserted and ids come back in order."""
+        items = [{'name': f'New {i}', 'age': 20 + i, 'gender': 'Male'}
+                 for i in range(50)]
+        response = self.send('POST', '/actors/bulk', {'actors': items})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['count'], 50)
+        ids = [result['id'] for result in body['results']]
+        self.assertEqual(body['results'][0],
+                         {'index': 0, 'id': ids[0], 'status': 'created'})
+        names = dict(db.session.query(Actor.id, Actor.name))
+        self.assertEqual([names[i] for i in ids],
+                         [f'New {i}' for i in range(50)])
+
+    def test_create_movies(self):
+        """Test that movies keep the release date they were sent with."""
+        response = self.send('POST', '/movies/bulk', {'movies': [
+            {'title': 'Movie 2', 'release_date': '2020-05-17'}]})
+        movie_id = response.get_json()['results'][0]['id']
+        self.assertEqual(db.session.get(Movie, movie_id).release_date,
+                         date(2020, 5, 17))
+
+    def test_invalid_batch_writes_nothing(self):
+        """Test that one invalid item rejects the whole batch."""
+        items = [{'name': 'Valid', 'age': 40, 'gender': 'Male'},
+                 {'name': '', 'age': 'old', 'gender': 'Male', 'x': 1},
+                 'not an object']
+        response = self.send('POST', '/actors/bulk', {'actors': items})
+        self.assertEqual(response.status_code, 400)
+        errors = response.get_json()['errors']
+        self.assertEqual({(error['index'], error.get('field'))
+                          for error in errors},
+                         {(1, 'name'), (1, 'age'), (1, 'x'), (2, None)})
+        self.assertEqual(db.session.query(Actor).count(), 3)
+
+    def test_batch_limits(self):
+        """Test that empty, missing and oversized batches are rejected."""
+        limit = app.config['BULK_MAX_ITEMS']
+        item = {'title': 'T', 'release_date': '2020-01-01'}
+        for body in ({'movies': []}, {}, None,
+                     {'movies': [item] * (limit + 1)}):
+            response = self.send('POST', '/movies/bulk', body)
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_update_actors(self):
+        """Test that partial updates apply per item."""
+        response = self.send('PATCH', '/actors/bulk', {'actors': [
+            {'id': 1, 'age': 60}, {'id': 2, 'name': 'Renamed'}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in response.get_json()['results']],
+            ['updated', 'updated'])
+        self.assertEqual(db.session.get(Actor, 1).age, 60)
+        self.assertEqual(db.session.get(Actor, 1).name, 'Actor 0')
+        self.assertEqual(db.session.get(Actor, 2).name, 'Renamed')
+
+    def test_update_missing_id_rolls_back(self):
+        """Test that an unknown id rejects the batch without changes."""
+        response = self.send('PATCH', '/actors/bulk', {'actors': [
+            {'id': 1, 'age': 60}, {'id': 99, 'age': 1}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['errors'],
+                         [{'index': 1, 'field': 'id', 'message': 'not found'}])
+        self.assertEqual(db.session.get(Actor, 1).age, 30)
+
+    def test_update_repeated_id(self):
+        """Test that an id may only appear once per batch."""
+        response = self.send('PATCH', '/movies/bulk', {'movies': [
+            {'id': 1, 'title': 'A'}, {'id': 1, 'title': 'B'}]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_delete_actors_with_casts(self):
+        """Test that deleting actors also removes their cast entries."""
+        response = self.send('DELETE', '/actors/bulk', {'ids': [1, 3]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(db.session.query(Actor.id).all(), [(2,)])
+        self.assertEqual(
+            db.session.query(movie_actors.c.actor_id).all(), [(2,)])
+
+    def test_delete_movies(self):
+        """Test that deleting movies removes the movie and its cast."""
+        response = self.send('DELETE', '/movies/bulk', {'ids': [1]})
+        self.assertEqual(response.get_json()['results'],
+                         [{'index': 0, 'id': 1, 'status': 'deleted'}])
+        self.assertEqual(db.session.query(movie_actors).count(), 0)
+
+    def test_delete_missing_id_rolls_back(self):
+        """Test that an unknown id keeps every row."""
+        response = self.send('DELETE', '/actors/bulk', {'ids': [1, 42]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(db.session.query(Actor).count(), 3)
+
+    def test_bulk_permissions(self):
+        """Test that bulk endpoints enforce the single-record permissions."""
+        response = self.send('DELETE', '/actors/bulk', {'ids': [1]},
+                             ['post:actors'])
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_write_invalidates_listing(self):
+        """Test that bulk writes change the list ETag."""
+        etag = self.app.get('/actors', headers=self.headers).get_etag()[0]
+        self.send('POST', '/actors/bulk', {'actors': [
+            {'name': 'New', 'age': 20, 'gender': 'Male'}]})
+        headers = dict(self.headers, **{'If-None-Match': f'"{etag}"'})
+        response = self.app.get('/actors', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['actors']), 4)
+
+    def test_bulk_writes_report_changed_ids(self):
+        """Test that bulk writes bump the table with the ids they wrote."""
+        calls = []
+        listener = on_bump(lambda table, ids: calls.append((table, ids)))
+        try:
+            self.send('POST', '/actors/bulk', {'actors': [
+                {'name': 'New', 'age': 20, 'gender': 'Male'}]})
+            self.send('PATCH', '/actors/bulk', {'actors': [
+                {'id': 1, 'age': 50}, {'id': 3, 'age': 51}]})
+        finally:
+            versioning._listeners.remove(listener)
+        self.assertEqual(calls, [('actor', [4]), ('actor', [1, 3])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from app import app, db
+from app.models import Actor, Movie, movie_actors
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+
+class CastTestCase(unittest.TestCase):
+    """Test case for the /movies/<id>/actors cast endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        actors = [Actor(name=f'Actor {i}', age=30, gender='Female')
+                  for i in range(5)]
+        movie = Movie(title='Movie 1', release_date=date(2023, 1, 1))
+        movie.actors = actors[:2]
+        db.session.add_all(actors + [movie])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def send(self, method, actors, movie_id=1, headers=None):
+        """Issue a cast request and return (response, statements)."""
+        with QueryCounter(db.engine) as counter:
+            response = self.app.open(
+                f'/movies/{movie_id}/actors', method=method,
+                json={'actors': actors}, headers=headers or self.headers)
+        db.session.remove()
+        return response, [statement.lower()
+                          for statement in counter.statements]
+
+    def cast(self):
+        """Return the actor ids cast in movie 1."""
+        return sorted(db.session.scalars(
+            db.select(movie_actors.c.actor_id)
+            .where(movie_actors.c.movie_id == 1)))
+
+    def test_put_replaces_cast(self):
+        """Test that PUT applies the set difference with two writes."""
+        response, statements = self.send('PUT', [2, 3, 4])
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['actors'], [2, 3, 4])
+        self.assertEqual((body['added'], body['removed']), (2, 1))
+        self.assertEqual(self.cast(), [2, 3, 4])
+        inserts = [s for s in statements if s.startswith('insert')]
+        deletes = [s for s in statements if s.startswith('delete')]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn('on conflict do nothing', inserts[0])
+        self.assertEqual(len(deletes), 1)
+
+    def test_never_loads_actor_entities(self):
+        """Test that only id columns of the actor table are read."""
+        _, statements = self.send('PUT', [3, 4])
+        for statement in statements:
+            if 'from actor' in statement:
+                self.assertNotIn('actor.name', statement)
+
+    def test_put_empty_clears_cast(self):
+        """Test that an empty list removes every actor."""
+        response, _ = self.send('PUT', [])
+        self.assertEqual(response.get_json()['actors'], [])
+        self.assertEqual(self.cast(), [])
+
+    def test_post_adds_actors(self):
+        """Test that POST keeps existing actors and ignores repeats."""
+        response, _ = self.send('POST', [2, 5])
+        body = response.get_json()
+        self.assertEqual(body['actors'], [1, 2, 5])
+        self.assertEqual((body['added'], body['removed']), (1, 0))
+
+    def test_delete_removes_actors(self):
+        """Test that DELETE removes only the listed actors."""
+        response, _ = self.send('DELETE', [1, 4])
+        body = response.get_json()
+        self.assertEqual(body['actors'], [2])
+        self.assertEqual((body['added'], body['removed']), (0, 1))
+
+    def test_unknown_actor_rejected(self):
+        """Test that an unknown actor rejects the change."""
+        response, _ = self.send('POST', [3, 99])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['errors'][0]['index'], 1)
+        self.assertEqual(self.cast(), [1, 2])
+
+    def test_invalid_ids(self):
+        """Test that malformed or repeated ids are rejected."""
+        for actors in (['a'], [3, 3], None):
+            response, _ = self.send('PUT', actors)
+            self.assertEqual(response.status_code, 400, actors)
+
+    def test_unknown_movie(self):
+        """Test that an unknown movie returns 404."""
+        response, _ = self.send('PUT', [1], movie_id=42)
+        self.assertEqual(response.status_code, 404)
+
+    def test_requires_update_permission(self):
+        """Test that cast changes require update:movies."""
+        headers = self.local_auth.headers(['update:actors'])
+        response, _ = self.send('PUT', [1], headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_cast_change_refreshes_movies(self):
+        """Test that the movie listing reflects cast changes."""
+        self.app.get('/movies', headers=self.headers)
+        self.send('PUT', [5])
+        response = self.app.get('/movies', headers=self.headers)
+        self.assertEqual(response.get_json()['movies'][0]['actors'],
+                         ['Actor 4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
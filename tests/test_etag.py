@@ -0,0 +1,235 @@
+# Import necessary modules for testing
+import unittest
+from unittest import mock
+from datetime import date
+from app import app, db, versioning
+from app.models import Actor, Movie
+from app.versioning import (
+    LocalVersionStore, SharedVersionStore, bump, on_bump, set_version_store,
+    version_tag)
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+
+class FakeRedis:
+    """Minimal stand-in for the Redis commands the shared stores use."""
+
+    def __init__(self):
+        self.values = {}
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+class VersionStoreTestCase(unittest.TestCase):
+    """Test case for the table version stores."""
+
+    def tearDown(self):
+        set_version_store(None)
+
+    def test_local_store(self):
+        """Test that counters start at zero and only bump their table."""
+        store = LocalVersionStore()
+        self.assertEqual(store.get(('actor', 'movie')), [0, 0])
+        self.assertEqual(store.incr('actor'), 1)
+        self.assertEqual(store.get(('actor', 'movie')), [1, 0])
+
+    def test_epoch_differs_per_store(self):
+        """Test that tags from another process never match."""
+        set_version_store(LocalVersionStore())
+        first = version_tag(('actor',))
+        set_version_store(LocalVersionStore())
+        self.assertNotEqual(version_tag(('actor',)), first)
+
+    def test_local_epoch_expires(self):
+        """Test that local tags are renewed after the ttl."""
+        store = LocalVersionStore(ttl=30)
+        with mock.patch('app.versioning.time.time', return_value=60.0):
+            first = store.epoch
+            self.assertEqual(store.epoch, first)
+        with mock.patch('app.versioning.time.time', return_value=90.0):
+            self.assertNotEqual(store.epoch, first)
+        store = LocalVersionStore(ttl=0)
+        first = store.epoch
+        with mock.patch('app.versioning.time.time', return_value=90.0):
+            self.assertEqual(store.epoch, first)
+
+    def test_shared_store(self):
+        """Test that stores on one client see each other's bumps."""
+        client = FakeRedis()
+        set_version_store(SharedVersionStore(client))
+        before = version_tag(('actor',))
+        SharedVersionStore(client).incr('actor')
+        self.assertNotEqual(version_tag(('actor',)), before)
+
+    def test_listeners(self):
+        """Test that listeners receive the bumped table and ids."""
+        calls = []
+        listener = on_bump(lambda table, ids: calls.append((table, ids)))
+        try:
+            bump('actor', ids=[3])
+        finally:
+            versioning._listeners.remove(listener)
+        self.assertEqual(calls, [('actor', [3])])
+
+
+class ETagTestCase(unittest.TestCase):
+    """Test case for conditional GET on list and export endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        set_version_store(LocalVersionStore())
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        actor = Actor(name='Actor 1', age=30, gender='Female')
+        movie = Movie(title='Movie 1', release_date=date(2023, 1, 1))
+        movie.actors = [actor]
+        db.session.add_all([actor, movie])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+        set_version_store(None)
+
+    def get(self, path, etag=None, headers=None):
+        """Issue a GET request and return (response, statement count)."""
+        headers = dict(headers or self.headers)
+        if etag:
+            headers['If-None-Match'] = f'"{etag}"'
+        with QueryCounter(db.engine) as counter:
+            response = self.app.get(path, headers=headers)
+        db.session.remove()
+        return response, counter.count
+
+    def test_not_modified_skips_database(self):
+        """Test that a matching If-None-Match is answered without SQL."""
+        for path in ('/actors', '/movies', '/actors/export'):
+            response, _ = self.get(path)
+            etag = response.get_etag()[0]
+            self.assertTrue(etag, path)
+            response, count = self.get(path, etag)
+            self.assertEqual(response.status_code, 304, path)
+            self.assertEqual(response.get_data(), b'')
+            self.assertEqual(response.get_etag()[0], etag)
+            self.assertEqual(count, 0, path)
+
+    def test_etag_depends_on_query(self):
+        """Test that different pages and fieldsets get different ETags."""
+        etags = {self.get(path)[0].get_etag()[0]
+                 for path in ('/actors', '/actors?fields=name',
+                              '/actors?limit=1')}
+        self.assertEqual(len(etags), 3)
+
+    def test_write_changes_etag(self):
+        """Test that creating an actor invalidates the actor ETag."""
+        etag = self.get('/actors')[0].get_etag()[0]
+        response = self.app.post('/actors', headers=self.headers, json={
+            'name': 'Actor 2', 'age': 40, 'gender': 'Male'})
+        self.assertEqual(response.status_code, 200)
+        response, _ = self.get('/actors', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['actors']), 2)
+
+    def test_actor_update_changes_movie_etag(self):
+        """Test that renaming an actor invalidates movies listing them."""
+        etag = self.get('/movies')[0].get_etag()[0]
+        self.app.patch('/actors/1', headers=self.headers,
+                       json={'name': 'Renamed'})
+        response, _ = self.get('/movies', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['movies'][0]['actors'],
+                         ['Renamed'])
+
+    def test_movie_write_keeps_actor_etag(self):
+        """Test that movie writes do not invalidate the actor listing."""
+        etag = self.get('/actors')[0].get_etag()[0]
+        self.app.delete('/movies/1', headers=self.headers)
+        response, _ = self.get('/actors', etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_bulk_delete_changes_etag(self):
+        """Test that writes outside the endpoints are tracked too."""
+        etag = self.get('/actors')[0].get_etag()[0]
+        Actor.query.filter(Actor.id == 1).delete()
+        db.session.commit()
+        response, _ = self.get('/actors', etag)
+        self.assertEqual(response.status_code, 404)
+
+    def test_changed_ids_and_rollback(self):
+        """Test that listeners get committed ids and rollbacks are ignored."""
+        calls = []
+        listener = on_bump(lambda table, ids: calls.append((table, ids)))
+        try:
+            db.session.add(Actor(name='Actor 2', age=40, gender='Male'))
+            db.session.rollback()
+            db.session.get(Actor, 1).age = 31
+            actor = Actor(name='Actor 3', age=50, gender='Male')
+            db.session.add(actor)
+            db.session.commit()
+        finally:
+            versioning._listeners.remove(listener)
+        self.assertEqual(calls, [('actor', [1, actor.id])])
+
+    def test_link_changes_keyed_by_movie(self):
+        """Test that cast changes through the ORM name their movies."""
+        calls = []
+        listener = on_bump(lambda table, ids: calls.append((table, ids)))
+        try:
+            movie = Movie(title='Movie 2', release_date=date(2023, 1, 1))
+            movie.actors = [db.session.get(Actor, 1)]
+            db.session.add(movie)
+            db.session.commit()
+            db.session.delete(db.session.get(Actor, 1))
+            db.session.commit()
+        finally:
+            versioning._listeners.remove(listener)
+        links = [ids for table, ids in calls if table == 'movie_actors']
+        self.assertEqual(links, [[movie.id], [1, movie.id]])
+
+    def test_statement_changed_ids(self):
+        """Test that bulk statements can name the rows they change."""
+        calls = []
+        listener = on_bump(lambda table, ids: calls.append((table, ids)))
+        try:
+            db.session.execute(
+                db.update(Actor).where(Actor.id == 1).values(age=32)
+                .execution_options(changed_ids=[1]))
+            db.session.execute(db.update(Actor).values(age=33))
+            db.session.commit()
+            db.session.execute(
+                db.update(Actor).where(Actor.id == 1).values(age=34)
+                .execution_options(changed_ids=[1]))
+            db.session.commit()
+        finally:
+            versioning._listeners.remove(listener)
+        self.assertEqual(calls, [('actor', None), ('actor', [1])])
+
+    def test_permissions_checked_first(self):
+        """Test that a valid ETag does not bypass authorization."""
+        etag = self.get('/movies')[0].get_etag()[0]
+        headers = self.local_auth.headers(['view:actors'])
+        response, _ = self.get('/movies', etag, headers)
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# Import necessary modules for testing
+import json
+import unittest
+from datetime import date
+from app import app, db
+from app.models import Actor, Movie
+from tests.local_auth import LocalAuth
+
+
+class ExportTestCase(unittest.TestCase):
+    """Test case for the streaming export endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        self.batch_size = app.config['EXPORT_BATCH_SIZE']
+        app.config['EXPORT_BATCH_SIZE'] = 2
+        db.create_all()
+        actors = [Actor(name=f'Actor {i}', age=20 + i, gender='Male')
+                  for i in range(5)]
+        movie = Movie(title='Movie 1', release_date=date(2023, 1, 1))
+        movie.actors = actors[:2]
+        db.session.add_all(actors + [
+            movie, Movie(title='Movie 2', release_date=date(2024, 1, 1))])
+        db.session.commit()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        app.config['EXPORT_BATCH_SIZE'] = self.batch_size
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def test_export_actors_ndjson(self):
+        """Test that every actor is streamed as one NDJSON line."""
+        response = self.app.get('/actors/export', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        actors = [json.loads(line) for line in lines]
+        self.assertEqual([actor['name'] for actor in actors],
+                         [f'Actor {i}' for i in range(5)])
+        self.assertEqual(set(actors[0]), {'id', 'name', 'age', 'gender'})
+
+    def test_export_actors_json(self):
+        """Test that the JSON format is a single valid document."""
+        response = self.app.get('/actors/export?format=json',
+                                headers=self.headers)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(len(response.get_json()['actors']), 5)
+
+    def test_export_movies_with_casts(self):
+        """Test that movies are streamed with their cast names."""
+        response = self.app.get('/movies/export?format=json',
+                                headers=self.headers)
+        movies = {movie['title']: movie
+                  for movie in response.get_json()['movies']}
+        self.assertEqual(sorted(movies['Movie 1']['actors']),
+                         ['Actor 0', 'Actor 1'])
+        self.assertEqual(movies['Movie 2']['actors'], [])
+        self.assertEqual(movies['Movie 2']['release_date'], '2024-01-01')
+
+    def test_export_empty_table(self):
+        """Test that an empty table exports as an empty document."""
+        db.session.query(Actor).delete()
+        db.session.commit()
+        response = self.app.get('/actors/export?format=json',
+                                headers=self.headers)
+        self.assertEqual(response.get_json(), {'actors': []})
+
+    def test_export_invalid_format(self):
+        """Test that unknown formats are rejected."""
+        response = self.app.get('/actors/export?format=xml',
+                                headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_requires_permission(self):
+        """Test that exports enforce the view permission."""
+        headers = self.local_auth.headers(['view:actors'])
+        response = self.app.get('/movies/export', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from app import app, db
+from app.models import Actor, Movie
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+
+class FieldsTestCase(unittest.TestCase):
+    """Test case for sparse fieldsets on list endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        actors = [Actor(name=f'Actor {i}', age=30 + i, gender='Female')
+                  for i in range(3)]
+        movie = Movie(title='Movie 1', release_date=date(2023, 1, 1))
+        movie.actors = actors[:2]
+        db.session.add_all(actors + [
+            movie, Movie(title='Movie 2', release_date=date(2024, 1, 1))])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def get(self, path):
+        """Issue a GET request and return (response, statements)."""
+        with QueryCounter(db.engine) as counter:
+            response = self.app.get(path, headers=self.headers)
+        db.session.remove()
+        return response, [statement.lower()
+                          for statement in counter.statements]
+
+    def test_actor_fields(self):
+        """Test that only the requested actor fields are returned."""
+        response, statements = self.get('/actors?fields=id,name')
+        self.assertEqual(response.status_code, 200)
+        actors = response.get_json()['actors']
+        self.assertEqual(actors[0], {'id': 1, 'name': 'Actor 0'})
+        self.assertNotIn('actor.age', statements[0])
+
+    def test_default_fields_unchanged(self):
+        """Test that omitting fields returns the full representation."""
+        response, _ = self.get('/movies')
+        movie = response.get_json()['movies'][0]
+        self.assertEqual(movie, {'id': 1, 'title': 'Movie 1',
+                                 'release_date': '2023-01-01',
+                                 'actors': ['Actor 0', 'Actor 1']})
+
+    def test_movie_fields_skip_cast_query(self):
+        """Test that movie_actors is not queried unless actors is requested."""
+        response, statements = self.get('/movies?fields=id,title')
+        self.assertEqual(response.get_json()['movies'][1],
+                         {'id': 2, 'title': 'Movie 2'})
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn('movie_actors', statements[0])
+
+    def test_movie_actors_field(self):
+        """Test that requesting actors loads casts with one extra query."""
+        response, statements = self.get('/movies?fields=title,actors')
+        movies = response.get_json()['movies']
+        self.assertEqual(movies[0], {'title': 'Movie 1',
+                                     'actors': ['Actor 0', 'Actor 1']})
+        self.assertEqual(movies[1]['actors'], [])
+        self.assertEqual(len(statements), 2)
+
+    def test_fields_with_pagination(self):
+        """Test that cursors work when id is not among the fields."""
+        response, _ = self.get('/actors?fields=name&limit=2')
+        body = response.get_json()
+        self.assertEqual(body['actors'], [{'name': 'Actor 0'},
+                                          {'name': 'Actor 1'}])
+        response, _ = self.get(
+            f'/actors?fields=name&limit=2&after={body["next_cursor"]}')
+        self.assertEqual(response.get_json()['actors'], [{'name': 'Actor 2'}])
+
+    def test_unknown_field(self):
+        """Test that unknown or empty fields are rejected."""
+        for fields in ('id,salary', '', 'actors'):
+            response, _ = self.get(f'/actors?fields={fields}')
+            self.assertEqual(response.status_code, 400, fields)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from sqlalchemy import event
+from app import app, db
+from app.models import Actor, Movie
+from tests.local_auth import LocalAuth
+
+
+class FilmographyTestCase(unittest.TestCase):
+    """Test case for the GET /actors/<id>/movies endpoint."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        actor = Actor(name='Lead', age=40, gender='Female')
+        extra = Actor(name='Extra', age=30, gender='Male')
+        movies = [Movie(title=f'Movie {i}', release_date=date(2020, 1, i + 1))
+                  for i in range(7)]
+        for i, movie in enumerate(movies):
+            movie.actors = [actor, extra] if i % 2 else [extra]
+        db.session.add_all([actor, extra] + movies)
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def get(self, actor_id, **query):
+        """Request the movies of an actor and return the response."""
+        return self.app.get(f'/actors/{actor_id}/movies', query_string=query,
+                            headers=self.headers)
+
+    def test_lists_movies_of_actor(self):
+        """Test that only the actor's movies are returned, ordered by id."""
+        response = self.get(1, paginate='false')
+        self.assertEqual(response.status_code, 200)
+        movies = response.get_json()['movies']
+        self.assertEqual([movie['title'] for movie in movies],
+                         ['Movie 1', 'Movie 3', 'Movie 5'])
+        self.assertEqual(sorted(movies[0]['actors']), ['Extra', 'Lead'])
+
+    def test_walk_pages(self):
+        """Test that following cursors visits every movie exactly once."""
+        ids, after = [], None
+        while True:
+            query = {'limit': 2}
+            if after:
+                query['after'] = after
+            body = self.get(2, **query).get_json()
+            ids.extend(movie['id'] for movie in body['movies'])
+            after = body['next_cursor']
+            if after is None:
+                break
+        self.assertEqual(ids, list(range(1, 8)))
+
+    def test_fields(self):
+        """Test that `fields` limits the returned columns."""
+        movies = self.get(1, fields='title').get_json()['movies']
+        self.assertEqual(movies[0], {'title': 'Movie 1'})
+
+    def test_actor_without_movies(self):
+        """Test that an actor with no movies gets an empty list."""
+        db.session.add(Actor(name='Newcomer', age=20, gender='Female'))
+        db.session.commit()
+        response = self.get(3)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['movies'], [])
+
+    def test_unknown_actor(self):
+        """Test that an unknown actor returns 404."""
+        self.assertEqual(self.get(42).status_code, 404)
+
+    def test_requires_view_movies(self):
+        """Test that the endpoint requires view:movies."""
+        headers = self.local_auth.headers(['view:actors'])
+        response = self.app.get('/actors/1/movies', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_uses_actor_index(self):
+        """Test that the movie_actors lookup is an index scan."""
+        executed = []
+
+        def record(conn, cursor, statement, parameters, context,
+                   executemany):
+            if 'movie_actors.actor_id' in statement:
+                executed.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self.get(1, limit=2, fields='id,title')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(executed), 1)
+        statement, parameters = executed[0]
+
+        connection = db.session.connection()
+        if connection.dialect.name == 'postgresql':
+            # The tables are tiny, so stop the planner from preferring a
+            # sequential scan whenever any index could be used instead
+            connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            explain, full_scan = 'EXPLAIN ', 'Seq Scan on movie_actors'
+        else:
+            explain, full_scan = 'EXPLAIN QUERY PLAN ', 'SCAN movie_actors\n'
+        plan = '\n'.join(str(row[-1]) for row in connection.exec_driver_sql(
+            explain + statement, parameters)) + '\n'
+        db.session.rollback()
+        self.assertIn('ix_movie_actors_actor_id_movie_id', plan)
+        self.assertNotIn(full_scan, plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
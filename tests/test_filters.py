@@ -0,0 +1,125 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from app import app, db
+from app.models import Actor, Movie
+from app.pagination import encode_cursor
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+
+class FiltersTestCase(unittest.TestCase):
+    """Test case for filtering and sorting on list endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        ages = [40, 25, 33, 25, 51, 33, 19]
+        db.session.add_all(
+            [Actor(name=f'Actor {i}', age=age,
+                   gender='Female' if i % 2 else 'Male')
+             for i, age in enumerate(ages)] +
+            [Movie(title=f'Movie {i}', release_date=date(2020, 7 - i, 1))
+             for i in range(6)])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def get(self, path, **query):
+        """Issue a GET request and return the response."""
+        return self.app.get(path, query_string=query, headers=self.headers)
+
+    def walk(self, path, key, **query):
+        """Follow next_cursor until the last page; return every item."""
+        items = []
+        while True:
+            body = self.get(path, **query).get_json()
+            items.extend(body[key])
+            if body['next_cursor'] is None:
+                return items
+            query['after'] = body['next_cursor']
+
+    def test_gender_and_age_filters(self):
+        """Test that actor filters combine and bounds are inclusive."""
+        actors = self.get('/actors', gender='Male', age_min=33,
+                          age_max=40).get_json()['actors']
+        self.assertEqual([actor['name'] for actor in actors],
+                         ['Actor 0', 'Actor 2'])
+
+    def test_release_date_filters(self):
+        """Test that the release window is inclusive on both ends."""
+        movies = self.get('/movies', released_after='2020-03-01',
+                          released_before='2020-05-01').get_json()['movies']
+        self.assertEqual([movie['release_date'] for movie in movies],
+                         ['2020-05-01', '2020-04-01', '2020-03-01'])
+
+    def test_sort_by_age_breaks_ties_by_id(self):
+        """Test that sorting orders by the column, then by id."""
+        actors = self.get('/actors', sort='age',
+                          paginate='false').get_json()['actors']
+        self.assertEqual([actor['id'] for actor in actors],
+                         [7, 2, 4, 3, 6, 1, 5])
+
+    def test_sorted_pages(self):
+        """Test that cursors walk sorted and filtered listings once."""
+        for sort in ('age', '-age', '-id'):
+            expected = self.get('/actors', sort=sort, age_min=20,
+                                paginate='false').get_json()['actors']
+            actors = self.walk('/actors', 'actors', sort=sort, age_min=20,
+                               limit=2)
+            self.assertEqual(actors, expected, sort)
+            self.assertEqual(len(actors), 6)
+        movies = self.walk('/movies', 'movies', sort='-release_date',
+                           fields='release_date', limit=4)
+        self.assertEqual([movie['release_date'] for movie in movies],
+                         [f'2020-0{month}-01' for month in range(7, 1, -1)])
+
+    def test_sorted_page_query_uses_keyset(self):
+        """Test that sorted pages seek by (column, id)."""
+        first = self.get('/movies', sort='release_date', limit=2).get_json()
+        self.assertEqual(list(first['movies'][0]),
+                         ['id', 'title', 'release_date', 'actors'])
+        with QueryCounter(db.engine) as counter:
+            self.get('/movies', sort='release_date', limit=2,
+                     after=first['next_cursor'])
+        statement = counter.statements[0].upper()
+        self.assertIn('(MOVIE.RELEASE_DATE, MOVIE.ID) >', statement)
+        self.assertIn('ORDER BY MOVIE.RELEASE_DATE, MOVIE.ID', statement)
+
+    def test_empty_filtered_result(self):
+        """Test that a filter matching nothing returns an empty list."""
+        response = self.get('/actors', gender='Other')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['actors'], [])
+
+    def test_invalid_arguments(self):
+        """Test that unknown sorts and malformed values are rejected."""
+        for query in ({'sort': 'name'}, {'sort': '-'}, {'age_min': 'old'},
+                      {'released_after': '2020-13-01'}):
+            path = '/movies' if 'released_after' in query else '/actors'
+            response = self.get(path, **query)
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_cursor_must_match_sort(self):
+        """Test that a cursor is rejected under a different sort."""
+        after = self.get('/actors', limit=2).get_json()['next_cursor']
+        response = self.get('/actors', sort='age', after=after)
+        self.assertEqual(response.status_code, 400)
+        after = encode_cursor({'id': 2, 'sort': 'age', 'key': 'x'})
+        response = self.get('/actors', sort='age', after=after)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+# Import necessary modules for testing
+import threading
+import time
+import unittest
+from array import array
+from unittest import mock
+from datetime import date
+from app import app, db
+from app.graph import CostarGraph, build_csr, get_graph, set_graph
+from app.versioning import LocalVersionStore, bump, get_version_store, \
+    set_version_store
+from app.models import Actor, Movie, movie_actors
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+# Casts of the test movies: 1-2-3 share movie 1, 3-4 movie 2, 4-5 movie 3
+CASTS = {1: [1, 2, 3], 2: [3, 4], 3: [4, 5], 4: [1, 2]}
+
+
+def load(graph, casts):
+    """Load a {movie id: [actor ids]} mapping into a graph."""
+    movie_ids, actor_ids = array('i'), array('i')
+    for movie_id, cast in casts.items():
+        for actor_id in cast:
+            movie_ids.append(movie_id)
+            actor_ids.append(actor_id)
+    graph.load(movie_ids, actor_ids)
+    graph.refresh = lambda: None
+    return graph
+
+
+class CostarGraphTestCase(unittest.TestCase):
+    """Test case for the CSR co-star graph."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.graph = load(CostarGraph(), CASTS)
+
+    def test_build_csr(self):
+        """Test that targets are grouped by source."""
+        offsets, targets = build_csr(array('i', [2, 0, 2]),
+                                     array('i', [7, 8, 9]), 3)
+        self.assertEqual(list(offsets), [0, 1, 1, 3])
+        self.assertEqual(list(targets), [8, 7, 9])
+
+    def test_costars_ranked_by_shared_movies(self):
+        """Test that co-stars sharing more movies come first."""
+        self.assertEqual(self.graph.costars(1, 10), [(2, 2), (3, 1)])
+        self.assertEqual(self.graph.costars(3, 1), [(1, 1)])
+        self.assertEqual(self.graph.costars(42, 10), [])
+
+    def test_shortest_path(self):
+        """Test that the path goes through the fewest movies."""
+        self.assertEqual(self.graph.path(1, 5, 6),
+                         ([1, 3, 4, 5], [1, 2, 3]))
+        self.assertEqual(self.graph.path(5, 1, 6),
+                         ([5, 4, 3, 1], [3, 2, 1]))
+        self.assertEqual(self.graph.path(2, 2, 6), ([2], []))
+
+    def test_path_depth_limit(self):
+        """Test that paths longer than max_depth are not returned."""
+        self.assertIsNone(self.graph.path(1, 5, 2))
+        self.assertIsNone(self.graph.path(1, 42, 6))
+
+    def test_set_cast_patches_both_directions(self):
+        """Test that a patched cast changes co-stars and paths."""
+        self.graph.set_cast(2, [1, 4])
+        self.assertEqual(list(self.graph.movies_of(3)), [1])
+        self.assertEqual(sorted(self.graph.movies_of(1)), [1, 2, 4])
+        self.assertEqual(self.graph.path(1, 5, 6), ([1, 4, 5], [2, 3]))
+        self.graph.set_cast(9, [5, 6])
+        self.assertEqual(self.graph.costars(6, 10), [(5, 1)])
+
+
+class GraphEndpointsTestCase(unittest.TestCase):
+    """Test case for the /actors/<id>/costars and path endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        actors = [Actor(name=f'Actor {i}', age=30, gender='Female')
+                  for i in range(1, 7)]
+        movies = []
+        for movie_id, cast in CASTS.items():
+            movie = Movie(title=f'Movie {movie_id}',
+                          release_date=date(2020, 1, 1))
+            movie.actors = [actors[actor_id - 1] for actor_id in cast]
+            movies.append(movie)
+        db.session.add_all(actors + movies)
+        db.session.commit()
+        db.session.remove()
+        set_graph(None)
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+        set_graph(None)
+
+    def get(self, path):
+        """Issue a GET request and return (response, statements)."""
+        with QueryCounter(db.engine) as counter:
+            response = self.app.get(path, headers=self.headers)
+        db.session.remove()
+        return response, counter.statements
+
+    def test_costars(self):
+        """Test that co-stars are listed with names and shared movies."""
+        response, _ = self.get('/actors/1/costars')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['costars'], [
+            {'id': 2, 'name': 'Actor 2', 'shared_movies': 2},
+            {'id': 3, 'name': 'Actor 3', 'shared_movies': 1}])
+
+    def test_path(self):
+        """Test that the path lists actors and the movies linking them."""
+        response, _ = self.get('/actors/2/path/5')
+        body = response.get_json()
+        self.assertEqual(body['degrees'], 3)
+        self.assertEqual([actor['id'] for actor in body['actors']],
+                         [2, 3, 4, 5])
+        self.assertEqual([movie['title'] for movie in body['movies']],
+                         ['Movie 1', 'Movie 2', 'Movie 3'])
+
+    def test_no_path(self):
+        """Test that unconnected actors and unknown actors return 404."""
+        for path in ('/actors/1/path/6', '/actors/1/path/5?max_depth=2',
+                     '/actors/1/path/42', '/actors/42/costars'):
+            response, _ = self.get(path)
+            self.assertEqual(response.status_code, 404, path)
+
+    def test_invalid_arguments(self):
+        """Test that bad limits and depths are rejected."""
+        for path in ('/actors/1/costars?limit=0',
+                     '/actors/1/path/5?max_depth=100'):
+            response, _ = self.get(path)
+            self.assertEqual(response.status_code, 400, path)
+
+    def test_cast_change_patches_graph(self):
+        """Test that a cast change reads only the changed cast."""
+        self.get('/actors/6/costars')
+        self.app.put('/movies/3/actors', headers=self.headers,
+                     json={'actors': [4, 5, 6]})
+        response, statements = self.get('/actors/6/costars')
+        self.assertEqual([costar['id'] for costar
+                          in response.get_json()['costars']], [4, 5])
+        graph_reads = [statement for statement in statements
+                       if 'FROM movie_actors' in statement]
+        self.assertEqual(len(graph_reads), 1)
+        self.assertIn('IN', graph_reads[0])
+
+    def test_changes_by_other_processes_reload_graph(self):
+        """Test that casts changed by another worker are picked up."""
+        self.get('/actors/6/costars')
+        # Another worker links actor 6 to movie 1 and bumps the shared
+        # version; this process is never told
+        with db.engine.begin() as connection:
+            connection.execute(movie_actors.insert(),
+                               [{'movie_id': 1, 'actor_id': 6}])
+        get_version_store().incr(movie_actors.name)
+        self.get('/actors/6/costars')
+        self.assertTrue(get_graph().wait(10))
+        response, _ = self.get('/actors/6/costars')
+        self.assertIn(1, [costar['id'] for costar
+                          in response.get_json()['costars']])
+
+    def test_rebuild_serves_previous_graph(self):
+        """Test that requests use the old graph while it is rebuilt."""
+        self.get('/actors/6/costars')
+        graph = get_graph()
+        release = threading.Event()
+        read_links = CostarGraph._read_links
+
+        def blocked_read():
+            release.wait(10)
+            return read_links()
+        graph._read_links = blocked_read
+        with db.engine.begin() as connection:
+            connection.execute(movie_actors.insert(),
+                               [{'movie_id': 1, 'actor_id': 6}])
+        bump(movie_actors.name)
+        response, _ = self.get('/actors/6/costars')
+        self.assertEqual(response.get_json()['costars'], [])
+        self.assertIsNone(response.get_etag()[0])
+        release.set()
+        self.assertTrue(graph.wait(10))
+        response, _ = self.get('/actors/6/costars')
+        self.assertEqual([costar['id'] for costar
+                          in response.get_json()['costars']], [1, 2, 3])
+
+    def test_epoch_change_does_not_rebuild(self):
+        """Test that renewing the local store's tags keeps the graph."""
+        set_version_store(LocalVersionStore(ttl=30))
+        try:
+            self.get('/actors/6/costars')
+            later = time.time() + 31
+            with mock.patch('app.versioning.time.time', return_value=later):
+                _, statements = self.get('/actors/6/costars')
+        finally:
+            set_version_store(None)
+        self.assertFalse([statement for statement in statements
+                          if 'FROM movie_actors' in statement])
+
+    def test_bulk_delete_patches_graph(self):
+        """Test that deleting actors in bulk updates their movies."""
+        self.get('/actors/3/path/1')
+        self.app.delete('/actors/bulk', headers=self.headers,
+                        json={'ids': [3]})
+        response, _ = self.get('/actors/4/path/1')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
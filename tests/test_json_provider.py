@@ -0,0 +1,115 @@
+# Import necessary modules for testing
+import json
+import unittest
+from collections import namedtuple
+from datetime import date
+from unittest import mock
+from flask.json.provider import DefaultJSONProvider
+from app import app, json_provider
+from app.json_provider import FastJSONProvider, RowEncoder, json_list_response
+
+Row = namedtuple('Row', ['id', 'name', 'age'])
+
+
+class FastJSONProviderTestCase(unittest.TestCase):
+    """Test case for the application's JSON provider."""
+
+    def setUp(self):
+        """Set up a sample document and the stdlib reference provider."""
+        self.document = {'b': [1, 2.5, None, True], 'a': 'Zoë "quoted"',
+                         'released': date(2024, 1, 2)}
+        self.reference = DefaultJSONProvider(app)
+
+    def test_application_uses_fast_provider(self):
+        """Test that the application is wired to the fast provider."""
+        self.assertIsInstance(app.json, FastJSONProvider)
+
+    def test_output_matches_default_provider(self):
+        """Test that encoding agrees with Flask's default provider."""
+        provider = FastJSONProvider(app)
+        self.assertEqual(json.loads(provider.dumps(self.document)),
+                         json.loads(self.reference.dumps(self.document)))
+
+    def test_keys_sorted(self):
+        """Test that keys are sorted like the default provider."""
+        text = FastJSONProvider(app).dumps({'b': 1, 'a': 2})
+        self.assertLess(text.index('"a"'), text.index('"b"'))
+
+    def test_response(self):
+        """Test that responses carry the encoded body and JSON mimetype."""
+        with app.app_context():
+            response = FastJSONProvider(app).response(self.document)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(json.loads(response.get_data()),
+                         json.loads(self.reference.dumps(self.document)))
+
+    def test_stdlib_fallback(self):
+        """Test that the provider works when orjson is not installed."""
+        with mock.patch.object(json_provider, 'orjson', None), \
+                app.app_context():
+            provider = FastJSONProvider(app)
+            self.assertEqual(json.loads(provider.dumps(self.document)),
+                             json.loads(self.reference.dumps(self.document)))
+            self.assertEqual(provider.loads('{"a": 1}'), {'a': 1})
+            response = provider.response({'a': 1})
+            self.assertEqual(response.get_json(), {'a': 1})
+
+
+class RowEncoderTestCase(unittest.TestCase):
+    """Test case for encoding rows without intermediate dicts."""
+
+    def setUp(self):
+        """Set up an encoder over a subset of the row's columns."""
+        self.encoder = RowEncoder(['name', 'age'], [1, 2], ['str', 'int'])
+
+    def test_encode(self):
+        """Test that a row encodes to the expected JSON object."""
+        for value in ('Anne', 'Zoë "quoted" \\ \n', None):
+            row = Row(1, value, 30)
+            self.assertEqual(json.loads(self.encoder.encode(row)),
+                             {'name': value, 'age': 30})
+        self.assertEqual(json.loads(self.encoder.encode(Row(1, 'A', None))),
+                         {'name': 'A', 'age': None})
+
+    def test_encode_many(self):
+        """Test that a batch matches encoding its rows one by one."""
+        rows = [Row(1, 'Anne', 30), Row(2, None, None), Row(3, 'Bob', 41)]
+        self.assertEqual(self.encoder.encode_many(rows),
+                         [self.encoder.encode(row) for row in rows])
+        self.assertEqual([json.loads(item)
+                          for item in self.encoder.encode_many(rows)], [
+            {'name': 'Anne', 'age': 30}, {'name': None, 'age': None},
+            {'name': 'Bob', 'age': 41}])
+        self.assertEqual(self.encoder.encode_many([]), [])
+
+    def test_field_kinds(self):
+        """Test date, generic and callable fields."""
+        encoder = RowEncoder(
+            ['released', 'tags', 'cast', '100%'],
+            [0, 1, lambda row, casts: casts[row[2]], 2],
+            ['date', 'json', 'json', 'int'])
+        row = (date(2024, 1, 2), ['a', 1], 7)
+        self.assertEqual(json.loads(encoder.encode(row, {7: ['Anne']})), {
+            'released': '2024-01-02', 'tags': ['a', 1], 'cast': ['Anne'],
+            '100%': 7})
+
+    def test_encode_fallback(self):
+        """Test that rows encode without orjson."""
+        encoder = RowEncoder(['name', 'tags'], [1, 2])
+        with mock.patch.object(json_provider, 'orjson', None):
+            self.assertEqual(json.loads(encoder.encode(Row(1, 'A', [2]))),
+                             {'name': 'A', 'tags': [2]})
+
+    def test_json_list_response(self):
+        """Test wrapping encoded items in a response document."""
+        items = [self.encoder.encode(Row(i, f'A{i}', i)) for i in range(3)]
+        with app.app_context():
+            response = json_list_response(app, 'actors', items,
+                                          next_cursor=None)
+        self.assertEqual(response.get_json(), {
+            'actors': [{'name': f'A{i}', 'age': i} for i in range(3)],
+            'next_cursor': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
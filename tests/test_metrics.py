@@ -0,0 +1,104 @@
+# Import necessary modules for testing
+import unittest
+from app import app, db
+from app.metrics import Histogram, Metrics, set_metrics
+from app.models import Actor
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+
+class HistogramTestCase(unittest.TestCase):
+    """Test case for the Prometheus histogram."""
+
+    def test_render(self):
+        """Test that buckets are cumulative and labels are escaped."""
+        histogram = Histogram('latency_seconds', 'Latency.', (0.1, 1.0))
+        labels = (('route', '/a"b'),)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(labels, value)
+        self.assertEqual(histogram.render(), [
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+            'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a\\"b"} 3.65',
+            'latency_seconds_count{route="/a\\"b"} 4'])
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+    """Test case for the request instrumentation and GET /metrics."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add_all([Actor(name=f'Actor {i}', age=30, gender='Male')
+                            for i in range(3)])
+        db.session.commit()
+        db.session.remove()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+        set_metrics(None)
+
+    def series(self, text, name, **labels):
+        """Return the value of one series of the /metrics text."""
+        prefix = name + '{' + ','.join(
+            f'{key}="{value}"' for key, value in labels.items()) + '}'
+        for line in text.splitlines():
+            if line.startswith(prefix + ' '):
+                return float(line.split()[-1])
+        return None
+
+    def test_request_metrics(self):
+        """Test that requests are counted, timed and split into phases."""
+        self.app.get('/actors?paginate=false', headers=self.headers)
+        self.app.get('/actors/42/movies', headers=self.headers)
+        self.app.get('/actors')
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        route = {'method': 'GET', 'route': '/actors'}
+        self.assertEqual(self.series(text, 'http_requests_total',
+                                     **route, status='200'), 1)
+        self.assertEqual(self.series(text, 'http_requests_total',
+                                     **route, status='401'), 1)
+        self.assertEqual(self.series(
+            text, 'http_requests_total', method='GET',
+            route='/actors/<int:actor_id>/movies', status='404'), 1)
+        self.assertEqual(self.series(
+            text, 'http_request_duration_seconds_count', **route), 2)
+        self.assertGreater(self.series(
+            text, 'http_request_sql_statements_sum', **route), 0)
+        for phase in ('auth', 'db', 'serialization'):
+            self.assertGreater(self.series(
+                text, 'http_request_phase_seconds_sum', **route,
+                phase=phase), 0, phase)
+
+    def test_statement_count(self):
+        """Test that each SQL statement of a request is counted once."""
+        with QueryCounter(db.engine) as counter:
+            self.app.get('/movies?paginate=false', headers=self.headers)
+        text = self.metrics.render()
+        route = {'method': 'GET', 'route': '/movies'}
+        self.assertEqual(self.series(
+            text, 'http_request_sql_statements_count', **route), 1)
+        self.assertEqual(self.series(
+            text, 'http_request_sql_statements_sum', **route),
+            len(counter.statements))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from app import app, db
+from app.models import Actor, Movie
+from app.pagination import (
+    PaginationError, decode_cursor, encode_cursor)
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+
+class CursorTestCase(unittest.TestCase):
+    """Test case for cursor encoding."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the position it encodes."""
+        cursor = encode_cursor({'id': 42})
+        self.assertNotIn('42', cursor)
+        self.assertEqual(decode_cursor(cursor), {'id': 42})
+
+    def test_invalid_cursor(self):
+        """Test that garbage cursors are rejected."""
+        for cursor in ('not-a-cursor', encode_cursor([1, 2])):
+            with self.assertRaises(PaginationError):
+                decode_cursor(cursor)
+
+
+class PaginationTestCase(unittest.TestCase):
+    """Test case for paginated list endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add_all(
+            [Actor(name=f'Actor {i}', age=20 + i, gender='Female')
+             for i in range(7)] +
+            [Movie(title=f'Movie {i}', release_date=date(2020, 1, i + 1))
+             for i in range(5)])
+        db.session.commit()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def walk(self, path, key, limit):
+        """Follow next_cursor until the last page; return pages of ids."""
+        pages = []
+        after = None
+        while True:
+            query = {'limit': limit}
+            if after:
+                query['after'] = after
+            response = self.app.get(path, query_string=query,
+                                    headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            body = response.get_json()
+            pages.append([item['id'] for item in body[key]])
+            after = body['next_cursor']
+            if after is None:
+                return pages
+
+    def test_walk_actors(self):
+        """Test that following cursors visits every actor exactly once."""
+        pages = self.walk('/actors', 'actors', 3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        ids = [actor_id for page in pages for actor_id in page]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(len(ids), 7)
+
+    def test_walk_movies(self):
+        """Test that following cursors visits every movie exactly once."""
+        pages = self.walk('/movies', 'movies', 5)
+        self.assertEqual([len(page) for page in pages], [5])
+
+    def test_default_page(self):
+        """Test that a request without arguments returns the first page."""
+        response = self.app.get('/actors', headers=self.headers)
+        body = response.get_json()
+        self.assertEqual(len(body['actors']), 7)
+        self.assertIsNone(body['next_cursor'])
+
+    def test_unpaginated_flag(self):
+        """Test that paginate=false returns every row without a cursor."""
+        response = self.app.get('/actors?paginate=false&limit=1',
+                                headers=self.headers)
+        body = response.get_json()
+        self.assertEqual(len(body['actors']), 7)
+        self.assertNotIn('next_cursor', body)
+
+    def test_invalid_arguments(self):
+        """Test that bad limits and cursors are rejected with 400."""
+        for query in ('limit=0', 'limit=abc', 'limit=100000',
+                      'after=garbage'):
+            response = self.app.get(f'/actors?{query}', headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_page_past_the_end(self):
+        """Test that a cursor past the last row returns an empty page."""
+        after = encode_cursor({'id': 1000})
+        response = self.app.get(f'/actors?after={after}',
+                                headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['actors'], [])
+
+    def test_page_query_uses_keyset(self):
+        """Test that deep pages seek by id instead of using OFFSET."""
+        after = encode_cursor({'id': 5})
+        db.session.remove()
+        with QueryCounter(db.engine) as counter:
+            self.app.get(f'/actors?after={after}&limit=2',
+                         headers=self.headers)
+        statement = counter.statements[0].upper()
+        self.assertIn('WHERE ACTOR.ID >', statement)
+        self.assertIn('ORDER BY ACTOR.ID', statement)
+        self.assertIn('LIMIT', statement)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# Import necessary modules for testing
+import unittest
+from unittest import mock
+from sqlalchemy.exc import OperationalError
+from app import app, db
+from config import engine_options
+
+
+class EngineOptionsTestCase(unittest.TestCase):
+    """Test case for the connection pool settings."""
+
+    def test_defaults(self):
+        """Test the pool settings used when no variable is set."""
+        with mock.patch.dict('os.environ', clear=True):
+            options = engine_options('postgresql://localhost/casting')
+        self.assertEqual(options, {
+            'pool_pre_ping': True, 'pool_recycle': 1800, 'pool_size': 5,
+            'max_overflow': 10, 'pool_timeout': 30.0})
+
+    def test_environment(self):
+        """Test that every setting is read from the environment."""
+        environ = {'DB_POOL_SIZE': '2', 'DB_MAX_OVERFLOW': '0',
+                   'DB_POOL_TIMEOUT': '1.5', 'DB_POOL_RECYCLE': '60',
+                   'DB_POOL_PRE_PING': 'false',
+                   'DB_STATEMENT_TIMEOUT': '5000'}
+        with mock.patch.dict('os.environ', environ, clear=True):
+            options = engine_options('postgresql://localhost/casting')
+            sqlite_options = engine_options('sqlite:///:memory:')
+        self.assertEqual(options['pool_size'], 2)
+        self.assertEqual(options['max_overflow'], 0)
+        self.assertEqual(options['pool_timeout'], 1.5)
+        self.assertEqual(options['pool_recycle'], 60)
+        self.assertFalse(options['pool_pre_ping'])
+        self.assertEqual(options['connect_args'],
+                         {'options': '-c statement_timeout=5000'})
+        self.assertEqual(sqlite_options,
+                         {'pool_pre_ping': False, 'pool_recycle': 60})
+
+
+class DatabaseHealthTestCase(unittest.TestCase):
+    """Test case for the /health/db endpoint."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_pool_counters(self):
+        """Test that a reachable database reports the pool counters."""
+        response = self.app.get('/health/db')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['database'], 'ok')
+        pool = body['pool']
+        self.assertEqual(pool['class'], 'QueuePool')
+        self.assertEqual(pool['size'], app.config[
+            'SQLALCHEMY_ENGINE_OPTIONS']['pool_size'])
+        self.assertEqual(pool['checked_out'], 1)
+
+    def test_unavailable(self):
+        """Test that a failing database returns 503."""
+        error = OperationalError('SELECT 1', {}, Exception('down'))
+        with mock.patch.object(db.session, 'execute', side_effect=error):
+            response = self.app.get('/health/db')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['database'], 'unavailable')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# Import necessary modules for testing
+import json
+import unittest
+from app import app, create_app, db
+from app.models import Actor
+from app.profiler import PROFILE_HEADER, PROFILE_PERMISSION
+from config import Config
+from tests.local_auth import ALL_PERMISSIONS, LocalAuth
+
+
+class SqlProfilerTestCase(unittest.TestCase):
+    """Test case for the slow-query log and the per-request SQL profiler."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add_all([Actor(name=f'Actor {i}', age=30, gender='Male')
+                            for i in range(3)])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def get_actors(self, permissions, profile=True):
+        headers = self.local_auth.headers(permissions)
+        if profile:
+            headers[PROFILE_HEADER] = '1'
+        return self.app.get('/actors?paginate=false', headers=headers)
+
+    def test_profile_with_permission(self):
+        """Test that statements, durations and plans are returned."""
+        response = self.get_actors(ALL_PERMISSIONS + [PROFILE_PERMISSION])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'no-store')
+        self.assertNotIn('ETag', response.headers)
+        data = response.get_json()
+        self.assertEqual(len(data['actors']), 3)
+        profile = data['_debug']['sql']
+        self.assertGreater(profile['count'], 0)
+        self.assertEqual(profile['count'], len(profile['statements']))
+        select = next(entry for entry in profile['statements']
+                      if f'FROM {Actor.__tablename__}' in entry['statement'])
+        self.assertTrue(select['statement'].lstrip().startswith('SELECT'))
+        self.assertGreaterEqual(select['duration_ms'], 0)
+        self.assertTrue(select['plan'])
+
+    def test_header_needs_permission(self):
+        """Test that callers without debug:sql get the plain response."""
+        response = self.get_actors(ALL_PERMISSIONS)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('_debug', response.get_json())
+
+    def test_no_profile_without_header(self):
+        """Test that the profile is only returned when asked for."""
+        response = self.get_actors(ALL_PERMISSIONS + [PROFILE_PERMISSION],
+                                   profile=False)
+        self.assertNotIn('_debug', response.get_json())
+
+    def test_profiler_enabled_by_config(self):
+        """Test that SQL_PROFILER_ENABLED profiles every request."""
+        app.config['SQL_PROFILER_ENABLED'] = True
+        try:
+            response = self.get_actors(ALL_PERMISSIONS, profile=False)
+        finally:
+            app.config['SQL_PROFILER_ENABLED'] = False
+        self.assertIn('_debug', response.get_json())
+
+    def test_slow_query_log(self):
+        """Test that statements over the threshold are logged as JSON."""
+        class SlowConfig(Config):
+            SLOW_QUERY_MS = 0
+            SLOW_QUERY_LOG_PARAMETERS = True
+
+        slow_app = create_app(SlowConfig)
+        with slow_app.app_context(), \
+                self.assertLogs('casting.slow_queries', 'WARNING') as logs:
+            slow_app.test_client().get(
+                '/actors?paginate=false',
+                headers=self.local_auth.headers(ALL_PERMISSIONS))
+        records = [json.loads(record.getMessage())
+                   for record in logs.records]
+        record = next(record for record in records
+                      if f'FROM {Actor.__tablename__}' in record['statement'])
+        self.assertEqual(record['event'], 'slow_query')
+        self.assertEqual(record['threshold_ms'], 0)
+        self.assertEqual(record['path'], '/actors')
+        self.assertIn('parameters', record)
+
+    def test_slow_query_log_threshold(self):
+        """Test that fast statements stay out of the slow-query log."""
+        with self.assertRaises(AssertionError), \
+                self.assertLogs('casting.slow_queries', 'WARNING'):
+            self.get_actors(ALL_PERMISSIONS, profile=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from sqlalchemy import event
+from app import app, db
+from app.models import Actor, Movie
+from tests.local_auth import LocalAuth
+
+
+class QueryCounter:
+    """Context manager that records the SQL statements sent to the engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context,
+                executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+class MovieQueryCountTestCase(unittest.TestCase):
+    """Test that movie endpoints load casts with a bounded number of queries."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def add_movies(self, count, cast_size=3):
+        """Add movies that each have their own cast and return their ids."""
+        movies = []
+        for i in range(count):
+            movie = Movie(title=f'Movie {i}', release_date=date(2024, 1, 1))
+            movie.actors = [
+                Actor(name=f'Actor {i}-{j}', age=30, gender='Female')
+                for j in range(cast_size)]
+            movies.append(movie)
+        db.session.add_all(movies)
+        db.session.commit()
+        movie_ids = [movie.id for movie in movies]
+        db.session.remove()
+        return movie_ids
+
+    def count_queries(self, method, path, **kwargs):
+        """Issue a request and return (response, statement count)."""
+        with QueryCounter(db.engine) as counter:
+            response = self.app.open(
+                path, method=method, headers=self.headers, **kwargs)
+        db.session.remove()
+        return response, counter.count
+
+    def test_get_movies_query_count_independent_of_movie_count(self):
+        """Test that GET /movies does not issue one query per movie."""
+        self.add_movies(2)
+        response, few = self.count_queries('GET', '/movies')
+        self.assertEqual(response.status_code, 200)
+
+        self.add_movies(20)
+        response, many = self.count_queries('GET', '/movies')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['movies']), 22)
+        self.assertEqual(few, many)
+
+    def test_get_movies_includes_casts(self):
+        """Test that eager loading still returns every cast member."""
+        self.add_movies(2, cast_size=2)
+        response, _ = self.count_queries('GET', '/movies')
+        casts = {movie['title']: sorted(movie['actors'])
+                 for movie in response.get_json()['movies']}
+        self.assertEqual(casts['Movie 1'], ['Actor 1-0', 'Actor 1-1'])
+
+    def test_update_movie_query_count_independent_of_cast_size(self):
+        """Test that PATCH /movies/<id> loads the cast in one query.
+
+        Statements: the movie, the UPDATE, the movie again after the commit
+        expired it, and its cast.
+        """
+        small = self.add_movies(1, cast_size=1)[0]
+        large = self.add_movies(1, cast_size=25)[0]
+        _, few = self.count_queries(
+            'PATCH', f'/movies/{small}', json={'title': 'Renamed'})
+        response, many = self.count_queries(
+            'PATCH', f'/movies/{large}', json={'title': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.get_json()['updated_movie']['actors']), 25)
+        self.assertEqual(few, 4)
+        self.assertEqual(many, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# Import necessary modules for testing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from sqlalchemy import insert
+from app import create_app, db
+from app.models import Actor
+from app.replica import REPLICA_BIND
+from app.response_cache import set_response_cache
+from config import Config, replica_binds
+from tests.local_auth import LocalAuth
+
+
+def create_replica_app(primary, replica):
+    """Build an application on two SQLite files."""
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = replica_binds(f'sqlite:///{replica}')
+    return create_app(ReplicaConfig)
+
+
+class ReadReplicaTestCase(unittest.TestCase):
+    """Test case for routing GET requests to a read replica."""
+
+    def setUp(self):
+        """Set up a primary and a replica holding different actors."""
+        self.directory = tempfile.mkdtemp(prefix='casting-replica-')
+        self.test_app = create_replica_app(
+            os.path.join(self.directory, 'primary.db'),
+            os.path.join(self.directory, 'replica.db'))
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = self.test_app.test_client()
+        self.app_context = self.test_app.app_context()
+        self.app_context.push()
+        set_response_cache(None)
+        for bind, name in ((None, 'Primary Actor'),
+                           ('replica', 'Replica Actor')):
+            engine = db.engines[bind]
+            db.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(insert(Actor), [
+                    {'name': name, 'age': 30, 'gender': 'Female'}])
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        self.app_context.pop()
+        # init_app registered an empty metadata for the bind on the shared
+        # `db`; left there, create_all() and drop_all() of the apps without
+        # a replica would look for its engine
+        db.metadatas.pop(REPLICA_BIND, None)
+        self.local_auth.uninstall()
+        set_response_cache(None)
+        shutil.rmtree(self.directory)
+
+    def names(self, client=None, headers=None):
+        """Return the actor names listed by GET /actors."""
+        response = (client or self.app).get(
+            '/actors', headers=headers or self.headers)
+        db.session.remove()
+        return [actor['name'] for actor in response.get_json()['actors']]
+
+    def test_get_reads_replica(self):
+        """Test that GET requests are answered from the replica."""
+        self.assertEqual(self.names(), ['Replica Actor'])
+
+    def test_writes_go_to_primary(self):
+        """Test that the writer reads its own write from the primary."""
+        response = self.app.post('/actors', headers=self.headers, json={
+            'name': 'New Actor', 'age': 40, 'gender': 'Male'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(), ['Primary Actor', 'New Actor'])
+        other = self.local_auth.headers(sub='auth0|other-user')
+        self.assertEqual(self.names(self.test_app.test_client(), other),
+                         ['Replica Actor'])
+
+    def test_replica_reads_not_cached(self):
+        """Test that another client's replica read is not served back to
+        the writer."""
+        self.app.post('/actors', headers=self.headers, json={
+            'name': 'New Actor', 'age': 40, 'gender': 'Male'})
+        other = self.local_auth.headers(sub='auth0|other-user')
+        response = self.test_app.test_client().get('/actors', headers=other)
+        db.session.remove()
+        self.assertEqual(response.headers['X-Cache'], 'BYPASS')
+        self.assertIsNone(response.get_etag()[0])
+        response = self.app.get('/actors', headers=self.headers)
+        db.session.remove()
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertEqual([actor['name'] for actor
+                          in response.get_json()['actors']],
+                         ['Primary Actor', 'New Actor'])
+
+    def test_sticky_cookie(self):
+        """Test that the cookie keeps the writer on the primary elsewhere."""
+        self.app.post('/actors', headers=self.headers, json={
+            'name': 'New Actor', 'age': 40, 'gender': 'Male'})
+        # A second worker has no record of the write, only the cookie
+        worker = create_replica_app(
+            os.path.join(self.directory, 'primary.db'),
+            os.path.join(self.directory, 'replica.db'))
+        client = worker.test_client()
+        self.assertEqual(self.names(client), ['Replica Actor'])
+        client.set_cookie('primary_until',
+                          self.app.get_cookie('primary_until').value)
+        self.assertEqual(self.names(client), ['Primary Actor', 'New Actor'])
+
+    def test_window_expires(self):
+        """Test that the writer returns to the replica after the window."""
+        self.app.post('/actors', headers=self.headers, json={
+            'name': 'New Actor', 'age': 40, 'gender': 'Male'})
+        later = time.time() + Config.REPLICA_STICKY_SECONDS + 1
+        with mock.patch('app.replica.time.time', return_value=later):
+            self.assertEqual(self.names(), ['Replica Actor'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+# Import necessary modules for testing
+import time
+import unittest
+from unittest import mock
+from app import app, db
+from app.models import Actor
+from app.response_cache import (
+    CacheEntry, LocalCacheBackend, ResponseCache, SharedCacheBackend,
+    set_response_cache)
+from app.versioning import LocalVersionStore, set_version_store
+from tests.local_auth import LocalAuth
+from tests.test_etag import FakeRedis
+from tests.test_query_counts import QueryCounter
+
+
+class LocalCacheBackendTestCase(unittest.TestCase):
+    """Test case for the in-process response cache backend."""
+
+    def setUp(self):
+        """Set up a small backend."""
+        self.backend = LocalCacheBackend(maxsize=2, ttl=30)
+        self.entry = CacheEntry(b'{}', 'application/json', 0.01)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        self.backend.set('a', self.entry, ('actor',))
+        self.backend.set('b', self.entry, ('actor',))
+        self.backend.get('a')
+        self.backend.set('c', self.entry, ('actor',))
+        self.assertIsNotNone(self.backend.get('a'))
+        self.assertIsNone(self.backend.get('b'))
+        self.assertEqual(len(self.backend), 2)
+
+    def test_ttl(self):
+        """Test that expired entries are misses."""
+        self.backend.set('a', self.entry, ('actor',))
+        with mock.patch('app.response_cache.time.monotonic',
+                        return_value=time.monotonic() + 31):
+            self.assertIsNone(self.backend.get('a'))
+        self.assertEqual(len(self.backend), 0)
+
+    def test_invalidate_by_table(self):
+        """Test that only entries built from the changed table are dropped."""
+        self.backend.set('actors', self.entry, ('actor',))
+        self.backend.set('movies', self.entry, ('movie', 'actor'))
+        self.backend.invalidate('movie')
+        self.assertIsNotNone(self.backend.get('actors'))
+        self.assertIsNone(self.backend.get('movies'))
+        self.backend.invalidate('actor')
+        self.assertEqual(len(self.backend), 0)
+
+    def test_disabled(self):
+        """Test that a size of 0 disables caching."""
+        backend = LocalCacheBackend(maxsize=0)
+        backend.set('a', self.entry, ('actor',))
+        self.assertIsNone(backend.get('a'))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    """Test case for cached list endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        set_version_store(LocalVersionStore())
+        self.cache = ResponseCache(LocalCacheBackend())
+        set_response_cache(self.cache)
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add_all([Actor(name=f'Actor {i}', age=30, gender='Male')
+                            for i in range(3)])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+        set_response_cache(None)
+        set_version_store(None)
+
+    def get(self, path, headers=None):
+        """Issue a GET request and return (response, statement count)."""
+        with QueryCounter(db.engine) as counter:
+            response = self.app.get(path, headers=headers or self.headers)
+        db.session.remove()
+        return response, counter.count
+
+    def test_hit_skips_database(self):
+        """Test that a repeated request is served without SQL."""
+        first, _ = self.get('/actors?limit=2')
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        second, count = self.get('/actors?limit=2')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(count, 0)
+        self.assertEqual(second.get_data(), first.get_data())
+        self.assertEqual(second.get_etag(), first.get_etag())
+
+    def test_key_includes_query_and_scope(self):
+        """Test that other arguments or permissions do not share entries."""
+        self.get('/actors?limit=2')
+        response, _ = self.get('/actors?limit=1')
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        headers = self.local_auth.headers(['view:actors'])
+        response, _ = self.get('/actors?limit=2', headers)
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+
+    def test_write_invalidates(self):
+        """Test that a write evicts dependent entries and only those."""
+        self.get('/actors')
+        self.get('/movies')
+        response = self.app.patch('/actors/1', headers=self.headers,
+                                  json={'name': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.cache.backend), 0)
+        response, _ = self.get('/actors')
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertEqual(response.get_json()['actors'][0]['name'], 'Renamed')
+
+    def test_errors_not_cached(self):
+        """Test that error responses are not stored."""
+        self.get('/movies')
+        self.assertEqual(len(self.cache.backend), 0)
+
+    def test_shared_backend(self):
+        """Test that entries round-trip through the shared backend."""
+        client = FakeRedis()
+        set_response_cache(ResponseCache(SharedCacheBackend(client)))
+        first, _ = self.get('/actors')
+        self.assertEqual(len(client.values), 1)
+        set_response_cache(ResponseCache(SharedCacheBackend(client)))
+        second, count = self.get('/actors')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.mimetype, 'application/json')
+        self.assertEqual(count, 0)
+
+    def test_metrics(self):
+        """Test that hit ratio and latency saved are reported."""
+        for _ in range(4):
+            self.get('/actors')
+        stats = self.app.get('/metrics/cache').get_json()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.75)
+        self.assertGreaterEqual(stats['latency_saved_ms'], 0)
+        self.assertEqual(stats['size'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from app import app, db
+from app.models import Actor, Movie
+from app.search import PrefixIndex
+from app.versioning import get_version_store
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+NAMES = ['Anne Hathaway', 'Anna Faris', 'Annette Bening', 'Brad Pitt',
+         'Hugh Jackman', 'Anne Heche']
+
+
+class SearchTestCase(unittest.TestCase):
+    """Test case for the /actors/search and /movies/search endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add_all(
+            [Actor(name=name, age=40, gender='Female') for name in NAMES] +
+            [Movie(title=title, release_date=date(2020, 1, 1))
+             for title in ('Interstellar', 'Inception', 'The Interpreter')])
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+
+    def search(self, path, **query):
+        """Issue a search request and return the response."""
+        return self.app.get(path, query_string=query, headers=self.headers)
+
+    def test_prefix_matches_ranked_first(self):
+        """Test that prefix matches come first, case-insensitively."""
+        response = self.search('/actors/search', q='ANN')
+        self.assertEqual(response.status_code, 200)
+        names = [actor['name'] for actor in response.get_json()['actors']]
+        self.assertEqual(names[:4], ['Anna Faris', 'Anne Hathaway',
+                                     'Anne Heche', 'Annette Bening'])
+
+    def test_limit(self):
+        """Test that at most `limit` results are returned."""
+        actors = self.search('/actors/search', q='anne',
+                             limit=2).get_json()['actors']
+        self.assertEqual([actor['name'] for actor in actors],
+                         ['Anne Hathaway', 'Anne Heche'])
+
+    def test_fuzzy_matches(self):
+        """Test that later words and misspellings still match."""
+        names = [actor['name'] for actor in self.search(
+            '/actors/search', q='jackman').get_json()['actors']]
+        self.assertEqual(names, ['Hugh Jackman'])
+        titles = [movie['title'] for movie in self.search(
+            '/movies/search', q='intersteller').get_json()['movies']]
+        self.assertIn('Interstellar', titles)
+
+    def test_results_follow_writes(self):
+        """Test that new and renamed rows are found right away."""
+        self.search('/actors/search', q='zoe')
+        self.app.post('/actors', headers=self.headers,
+                      json={'name': 'Zoe Saldana', 'age': 45,
+                            'gender': 'Female'})
+        self.app.patch('/actors/4', headers=self.headers,
+                       json={'name': 'Zoe Kravitz'})
+        actors = self.search('/actors/search', q='zoe').get_json()['actors']
+        self.assertEqual([actor['name'] for actor in actors],
+                         ['Zoe Kravitz', 'Zoe Saldana'])
+
+    def test_results_follow_other_processes(self):
+        """Test that writes made by another worker are found too."""
+        self.search('/actors/search', q='zoe')
+        # Another worker inserts and bumps the shared version; this
+        # process is never told
+        with db.engine.begin() as connection:
+            connection.execute(Actor.__table__.insert(), [
+                {'name': 'Zoe Saldana', 'age': 45, 'gender': 'Female'}])
+        get_version_store().incr(Actor.__tablename__)
+        actors = self.search('/actors/search', q='zoe').get_json()['actors']
+        self.assertEqual([actor['name'] for actor in actors],
+                         ['Zoe Saldana'])
+
+    def test_invalid_arguments(self):
+        """Test that a missing query or bad limit is rejected."""
+        for query in ({}, {'q': '  '}, {'q': 'a' * 129},
+                      {'q': 'a', 'limit': 0}, {'q': 'a', 'limit': 'x'}):
+            response = self.search('/actors/search', **query)
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_requires_view_permission(self):
+        """Test that movie search requires view:movies."""
+        headers = self.local_auth.headers(['view:actors'])
+        response = self.app.get('/movies/search?q=in', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+
+class PrefixIndexTestCase(unittest.TestCase):
+    """Test case for the in-process search index of other databases."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add_all([Actor(name=name, age=40, gender='Female')
+                            for name in NAMES])
+        db.session.commit()
+        self.index = PrefixIndex(Actor.id, Actor.name)
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def names(self, query, limit=10):
+        """Search the index and return the matching names."""
+        return [name for _, name in self.index.search(query, limit)]
+
+    def test_whole_name_before_word_matches(self):
+        """Test that name prefixes rank above later-word prefixes."""
+        self.assertEqual(self.names('h'), ['Hugh Jackman', 'Anne Hathaway',
+                                           'Anne Heche'])
+        self.assertEqual(self.names('ANNE h'), ['Anne Hathaway',
+                                                'Anne Heche'])
+        self.assertEqual(self.names('ann', limit=2),
+                         ['Anna Faris', 'Anne Hathaway'])
+
+    def test_typos_in_first_letters(self):
+        """Test that misspelt beginnings match through trigrams."""
+        self.assertEqual(self.names('nane hathaway')[:1], ['Anne Hathaway'])
+        self.assertEqual(self.names('hugh jakcman'), ['Hugh Jackman'])
+        self.assertEqual(self.names('zzzz'), [])
+
+    def test_fuzzy_follows_renames(self):
+        """Test that renamed rows no longer match their old name."""
+        self.names('a')
+        db.session.get(Actor, 5).name = 'Meryl Streep'
+        db.session.commit()
+        self.index.mark([5])
+        self.assertEqual(self.names('hugh jakcman'), [])
+        self.assertEqual(self.names('meryl straep'), ['Meryl Streep'])
+
+    def test_incremental_refresh(self):
+        """Test that marked rows are reloaded with one query by id."""
+        self.names('a')
+        actor = db.session.get(Actor, 1)
+        actor.name = 'Meryl Streep'
+        db.session.add(Actor(name='Mia Farrow', age=70, gender='Female'))
+        db.session.commit()
+        self.index.mark([1, len(NAMES) + 1])
+        with QueryCounter(db.engine) as counter:
+            self.assertEqual(self.names('m'), ['Meryl Streep', 'Mia Farrow'])
+        self.assertEqual(len(counter.statements), 1)
+        self.assertIn(' IN ', counter.statements[0].upper())
+        self.assertNotIn('Anne Hathaway', self.names('anne'))
+
+    def test_unknown_changes_rebuild(self):
+        """Test that a change without ids rebuilds the whole index."""
+        self.names('a')
+        db.session.query(Actor).delete()
+        db.session.commit()
+        self.index.mark(None)
+        self.assertEqual(self.names('a'), [])
+        self.assertEqual(len(self.index), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# Import necessary modules for testing
+import unittest
+from datetime import date
+from app import app, db
+from app.models import Actor, Movie
+from app.stats import set_stats_cache
+from tests.local_auth import LocalAuth
+from tests.test_query_counts import QueryCounter
+
+
+class StatsTestCase(unittest.TestCase):
+    """Test case for the /stats endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures before each test."""
+        self.local_auth = LocalAuth().install()
+        self.headers = self.local_auth.headers()
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+        actors = [Actor(name=f'Actor {i}', age=age,
+                        gender='Female' if i % 2 else 'Male')
+                  for i, age in enumerate([19, 25, 33, 38, 51])]
+        movies = [Movie(title=f'Movie {i}', release_date=date(year, 1, 1))
+                  for i, year in enumerate([2019, 2020, 2020, 2021])]
+        movies[0].actors = actors[:3]
+        movies[1].actors = actors[3:]
+        movies[2].actors = actors[:1]
+        db.session.add_all(actors + movies)
+        db.session.commit()
+        db.session.remove()
+        set_stats_cache(None)
+
+    def tearDown(self):
+        """Tear down test fixtures after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.local_auth.uninstall()
+        set_stats_cache(None)
+
+    def get(self, path):
+        """Issue a GET request and return (response, statements)."""
+        with QueryCounter(db.engine) as counter:
+            response = self.app.get(path, headers=self.headers)
+        db.session.remove()
+        return response, counter.statements
+
+    def test_actor_stats(self):
+        """Test that actors are counted by gender and age bucket."""
+        response, statements = self.get('/stats/actors')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['total'], 5)
+        self.assertEqual(body['by_gender'], {'Female': 2, 'Male': 3})
+        self.assertEqual(body['age_histogram'], [
+            {'from': 10, 'to': 19, 'count': 1},
+            {'from': 20, 'to': 29, 'count': 1},
+            {'from': 30, 'to': 39, 'count': 2},
+            {'from': 50, 'to': 59, 'count': 1}])
+        self.assertTrue(all('GROUP BY' in statement
+                            for statement in statements))
+
+    def test_age_bucket(self):
+        """Test that the bucket width is configurable and validated."""
+        response, _ = self.get('/stats/actors?age_bucket=25')
+        self.assertEqual(response.get_json()['age_histogram'], [
+            {'from': 0, 'to': 24, 'count': 1},
+            {'from': 25, 'to': 49, 'count': 3},
+            {'from': 50, 'to': 74, 'count': 1}])
+        for value in ('0', '101', 'ten'):
+            response, _ = self.get(f'/stats/actors?age_bucket={value}')
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_movie_stats(self):
+        """Test that movies are counted per year with the cast size."""
+        response, _ = self.get('/stats/movies')
+        body = response.get_json()
+        self.assertEqual(body['total'], 4)
+        self.assertEqual(body['by_year'], [
+            {'year': 2019, 'count': 1}, {'year': 2020, 'count': 2},
+            {'year': 2021, 'count': 1}])
+        self.assertEqual(body['cast_links'], 6)
+        self.assertEqual(body['average_cast_size'], 1.5)
+
+    def test_cached_until_write(self):
+        """Test that cached statistics run no query until a write."""
+        self.get('/stats/movies')
+        response, statements = self.get('/stats/movies')
+        self.assertEqual(statements, [])
+        self.assertEqual(response.get_json()['total'], 4)
+        self.app.post('/movies', headers=self.headers,
+                      json={'title': 'Movie 4', 'release_date': '2022-01-01'})
+        response, statements = self.get('/stats/movies')
+        self.assertNotEqual(statements, [])
+        self.assertEqual(response.get_json()['total'], 5)
+        self.assertEqual(response.get_json()['by_year'][-1],
+                         {'year': 2022, 'count': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,14 +2,104 @@ import unittest
 from tests.test_actors import ActorsTestCase
 from tests.test_movies import MoviesTestCase
 from tests.test_permissions import TestPermissions
+from tests.test_auth import (
+    JWKSKeyStoreTestCase, VerifiedTokenCacheTestCase, PermissionSetTestCase,
+    RequiresAuthTestCase)
+from tests.test_query_counts import MovieQueryCountTestCase
+from tests.test_pagination import CursorTestCase, PaginationTestCase
+from tests.test_export import ExportTestCase
+from tests.test_fields import FieldsTestCase
+from tests.test_json_provider import (
+    FastJSONProviderTestCase, RowEncoderTestCase)
+from tests.test_etag import VersionStoreTestCase, ETagTestCase
+from tests.test_response_cache import (
+    LocalCacheBackendTestCase, ResponseCacheTestCase)
+from tests.test_bulk import BulkTestCase
+from tests.test_casts import CastTestCase
+from tests.test_filmography import FilmographyTestCase
+from tests.test_filters import FiltersTestCase
+from tests.test_search import SearchTestCase, PrefixIndexTestCase
+from tests.test_graph import CostarGraphTestCase, GraphEndpointsTestCase
+from tests.test_stats import StatsTestCase
+from tests.test_pool import EngineOptionsTestCase, DatabaseHealthTestCase
+from tests.test_replica import ReadReplicaTestCase
+from tests.test_app_factory import AppFactoryTestCase
+from tests.test_metrics import HistogramTestCase, MetricsEndpointTestCase
+from tests.test_profiler import SqlProfilerTestCase
 
 # Load test cases from separate test files
 actors_tests = unittest.TestLoader().loadTestsFromTestCase(ActorsTestCase)
 movies_tests = unittest.TestLoader().loadTestsFromTestCase(MoviesTestCase)
 permission_tests = unittest.TestLoader().loadTestsFromTestCase(TestPermissions)
+jwks_tests = unittest.TestLoader().loadTestsFromTestCase(JWKSKeyStoreTestCase)
+token_cache_tests = unittest.TestLoader().loadTestsFromTestCase(
+    VerifiedTokenCacheTestCase)
+permission_set_tests = unittest.TestLoader().loadTestsFromTestCase(
+    PermissionSetTestCase)
+auth_tests = unittest.TestLoader().loadTestsFromTestCase(RequiresAuthTestCase)
+query_count_tests = unittest.TestLoader().loadTestsFromTestCase(
+    MovieQueryCountTestCase)
+cursor_tests = unittest.TestLoader().loadTestsFromTestCase(CursorTestCase)
+pagination_tests = unittest.TestLoader().loadTestsFromTestCase(
+    PaginationTestCase)
+export_tests = unittest.TestLoader().loadTestsFromTestCase(ExportTestCase)
+fields_tests = unittest.TestLoader().loadTestsFromTestCase(FieldsTestCase)
+json_provider_tests = unittest.TestLoader().loadTestsFromTestCase(
+    FastJSONProviderTestCase)
+row_encoder_tests = unittest.TestLoader().loadTestsFromTestCase(
+    RowEncoderTestCase)
+version_store_tests = unittest.TestLoader().loadTestsFromTestCase(
+    VersionStoreTestCase)
+etag_tests = unittest.TestLoader().loadTestsFromTestCase(ETagTestCase)
+local_cache_backend_tests = unittest.TestLoader().loadTestsFromTestCase(
+    LocalCacheBackendTestCase)
+response_cache_tests = unittest.TestLoader().loadTestsFromTestCase(
+    ResponseCacheTestCase)
+bulk_tests = unittest.TestLoader().loadTestsFromTestCase(BulkTestCase)
+cast_tests = unittest.TestLoader().loadTestsFromTestCase(CastTestCase)
+filmography_tests = unittest.TestLoader().loadTestsFromTestCase(
+    FilmographyTestCase)
+filters_tests = unittest.TestLoader().loadTestsFromTestCase(FiltersTestCase)
+search_tests = unittest.TestLoader().loadTestsFromTestCase(SearchTestCase)
+prefix_index_tests = unittest.TestLoader().loadTestsFromTestCase(
+    PrefixIndexTestCase)
+costar_graph_tests = unittest.TestLoader().loadTestsFromTestCase(
+    CostarGraphTestCase)
+graph_endpoints_tests = unittest.TestLoader().loadTestsFromTestCase(
+    GraphEndpointsTestCase)
+stats_tests = unittest.TestLoader().loadTestsFromTestCase(StatsTestCase)
+engine_options_tests = unittest.TestLoader().loadTestsFromTestCase(
+    EngineOptionsTestCase)
+database_health_tests = unittest.TestLoader().loadTestsFromTestCase(
+    DatabaseHealthTestCase)
+read_replica_tests = unittest.TestLoader().loadTestsFromTestCase(
+    ReadReplicaTestCase)
+app_factory_tests = unittest.TestLoader().loadTestsFromTestCase(
+    AppFactoryTestCase)
+histogram_tests = unittest.TestLoader().loadTestsFromTestCase(
+    HistogramTestCase)
+metrics_endpoint_tests = unittest.TestLoader().loadTestsFromTestCase(
+    MetricsEndpointTestCase)
+sql_profiler_tests = unittest.TestLoader().loadTestsFromTestCase(
+    SqlProfilerTestCase)
 
 # Create test suite combining all test cases
-all_tests = unittest.TestSuite([actors_tests, movies_tests, permission_tests])
+all_tests = unittest.TestSuite([actors_tests, movies_tests, permission_tests,
+                                jwks_tests, token_cache_tests,
+                                permission_set_tests, auth_tests,
+                                query_count_tests, cursor_tests,
+                                pagination_tests, export_tests, fields_tests,
+                                json_provider_tests, row_encoder_tests,
+                                version_store_tests, etag_tests,
+                                local_cache_backend_tests,
+                                response_cache_tests, bulk_tests, cast_tests,
+                                filmography_tests, filters_tests,
+                                search_tests, prefix_index_tests,
+                                costar_graph_tests, graph_endpoints_tests,
+                                stats_tests, engine_options_tests,
+                                database_health_tests, read_replica_tests,
+                                app_factory_tests, histogram_tests,
+                                metrics_endpoint_tests, sql_profiler_tests])
 
 # Run the test suite
 if __name__ == '__main__':